@@ -0,0 +1,5 @@
+import sys
+
+from analyser.cli import main
+
+sys.exit(main())
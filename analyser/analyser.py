@@ -1,56 +1,432 @@
+import collections
+import contextlib
+import json
 import logging
-from typing import Iterator
-
-from analyser import interfaces
-from analyser.reconcilers.close_weight_abs import PortfolioDataReconcilerCloseWeightAbs
-from analyser.reconcilers.closing_weight import PortfolioDataReconcilerClosingWeight
-from analyser.reconcilers.dollar_pnl import PortfolioDataReconcilerDollarPnL
-from analyser.reconcilers.market_cap import PortfolioDataReconcilerMarketCap
-from analyser.reconcilers.opening_weight import PortfolioDataReconcilerOpeningWeight
-from analyser.reconcilers.price_fluctuation import (
-    PortfolioDataReconcilerPriceFluctuation,
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+from analyser import enums, interfaces
+from analyser.chunking import PortfolioChunkSizer
+from analyser.error_store import PortfolioErrorStore
+from analyser.errors import PortfolioErrorBlock
+from analyser.incremental import PortfolioIncrementalState
+from analyser.metrics import (
+    PortfolioAnalysisMetrics,
+    ReconcilerMetrics,
+    measure_reconciler,
+)
+from analyser.pipeline import PipelineStageStats, PortfolioPipeline
+from analyser.reconcilers.aggregate import PortfolioDataReconcilerAggregateBase
+from analyser.reconcilers.context import (
+    PortfolioColumnBuffers,
+    PortfolioReconciliationContext,
 )
-from analyser.reconcilers.return_adjustments import (
-    PortfolioDataReconcilerReturnAdjustments,
+from analyser.reconcilers.fused import PortfolioFusedReconciler
+from analyser.reconcilers.graph import PortfolioReconcilerGraph
+from analyser.reconcilers.history import (
+    PortfolioDataReconcilerHistoryBase,
+    PortfolioTickerHistory,
+)
+from analyser.reconcilers.registry import (
+    AGGREGATE_RECONCILERS,
+    DEFAULT_RECONCILERS,
+    HISTORY_RECONCILERS,
+    PortfolioReconcilerRegistry,
 )
-from analyser.reconcilers.total_return import PortfolioDataReconcilerTotalReturn
-from analyser.reconcilers.trade_day_move import PortfolioDataReconcilerTradeDayMove
-from analyser.reconcilers.trade_weight import PortfolioDataReconcilerTradeWeight
-from analyser.reconcilers.traded_today import PortfolioDataReconcilerTradedToday
-from analyser.reconcilers.value_in_usd import PortfolioDataReconcilerValueInUSD
 
 logger = logging.getLogger(__name__)
 
+# chunk reconciler of a chunk worker process, set when the worker starts
+_worker_chunk_reconciler = None
+
+
+def _init_chunk_worker(
+    chunk_reconciler: Union[PortfolioReconcilerGraph, PortfolioFusedReconciler],
+) -> None:
+    """Initialize a chunk worker process."""
+
+    global _worker_chunk_reconciler
+    _worker_chunk_reconciler = chunk_reconciler
+
+
+def _reconcile_chunk(
+    data_chunk: pd.DataFrame,
+) -> Tuple[List[PortfolioErrorBlock], Dict[str, ReconcilerMetrics], int]:
+    """Reconcile a chunk of data in a chunk worker process.
+
+    Returns the error blocks, the time spent in every reconciler and the bytes
+    per row of the derived columns.
+    """
+
+    timings = {}
+    error_blocks = _worker_chunk_reconciler.reconcile(data_chunk, timings=timings)
+
+    return error_blocks, timings, _worker_chunk_reconciler.derived_bytes_per_row
+
 
 class PortfolioAnalyzer(interfaces.PortfolioAnalyser):
     def __init__(
         self,
         data_feed: interfaces.PortfolioDataFeed,
         error_exporter: interfaces.PortfolioErrorExporter,
+        reconciler_workers: int = 1,
+        chunk_workers: int = 1,
+        fused: bool = False,
+        history_checks: bool = False,
+        aggregate_checks: bool = False,
+        history_path: Optional[str] = None,
+        incremental_path: Optional[str] = None,
+        metrics_path: Optional[str] = None,
+        metrics_format: str = "json",
+        chunk_sizer: Optional[PortfolioChunkSizer] = None,
+        reconcilers: Optional[Sequence[str]] = None,
+        tolerances: Optional[Dict[str, Decimal]] = None,
+        registry: Optional[PortfolioReconcilerRegistry] = None,
     ):
         self.data_feed = data_feed
         self.error_exporter = error_exporter
-        self._data_iterator = self.data_feed.get_data()
-        self._data_headers = None
+        # Reconcilers are selected by name, only their modules are imported.
+        # `reconcilers` replaces the default selection, the checks enabled by
+        # flags are added to it.
+        names = list(DEFAULT_RECONCILERS if reconcilers is None else reconcilers)
+        if history_checks:
+            names += [name for name in HISTORY_RECONCILERS if name not in names]
+        if aggregate_checks:
+            names += [name for name in AGGREGATE_RECONCILERS if name not in names]
+        self.registry = registry or PortfolioReconcilerRegistry()
+        selected = self.registry.create(names, tolerances)
+
         self.reconcilers = [
-            PortfolioDataReconcilerOpeningWeight(),
-            PortfolioDataReconcilerClosingWeight(),
-            PortfolioDataReconcilerValueInUSD(),
-            PortfolioDataReconcilerTradedToday(),
-            PortfolioDataReconcilerTradeDayMove(),
-            PortfolioDataReconcilerTradeWeight(),
-            PortfolioDataReconcilerReturnAdjustments(),
-            PortfolioDataReconcilerTotalReturn(),
-            PortfolioDataReconcilerCloseWeightAbs(),
-            PortfolioDataReconcilerDollarPnL(),
-            PortfolioDataReconcilerMarketCap(),
-            PortfolioDataReconcilerPriceFluctuation(),
+            reconciler
+            for reconciler in selected
+            if not isinstance(
+                reconciler,
+                (
+                    PortfolioDataReconcilerHistoryBase,
+                    PortfolioDataReconcilerAggregateBase,
+                ),
+            )
+        ]
+        self.reconciler_graph = PortfolioReconcilerGraph(
+            self.reconcilers,
+            available_columns=[header.value for header in enums.PortfolioDataHeader],
+        )
+        self.chunk_reconciler = self.reconciler_graph
+        if fused:
+            self.chunk_reconciler = PortfolioFusedReconciler(self.reconciler_graph)
+        self.reconciler_workers = reconciler_workers
+        self.chunk_workers = chunk_workers
+
+        # Reconcilers keeping per-ticker state across chunks. They always run
+        # in this process, after the chunk reconciler, in the order of chunks.
+        self.history_reconcilers = [
+            reconciler
+            for reconciler in selected
+            if isinstance(reconciler, PortfolioDataReconcilerHistoryBase)
+        ]
+        self.history_path = history_path
+        self._load_history()
+        # derived columns of the history and aggregate reconcilers
+        self._in_order_buffers = PortfolioColumnBuffers()
+        # bytes per row derived by the chunk reconciler of a worker process
+        self._worker_derived_bytes_per_row = 0
+
+        # Reconcilers checking portfolio totals of every date, with partial
+        # sums of dates split across chunks. Like history reconcilers, they
+        # run in this process in the order of chunks.
+        self.aggregate_reconcilers = [
+            reconciler
+            for reconciler in selected
+            if isinstance(reconciler, PortfolioDataReconcilerAggregateBase)
         ]
 
+        # fingerprints of the previous run, to only reconcile changed rows
+        self.incremental_state = None
+        if incremental_path:
+            if self.history_reconcilers:
+                raise ValueError("History checks can not be run incrementally")
+            if self.aggregate_reconcilers:
+                raise ValueError("Aggregate checks can not be run incrementally")
+
+            self.incremental_state = PortfolioIncrementalState(
+                incremental_path,
+                locations=[
+                    reconciler._recalc_column for reconciler in self.reconcilers
+                ],
+                settings={
+                    "tolerances": [
+                        str(reconciler.ERROR_TOLERANCE)
+                        for reconciler in self.reconcilers
+                    ],
+                    "numeric_backend": getattr(data_feed, "numeric_backend", None),
+                    "fused": fused,
+                },
+            )
+
+        # chunk size chosen at runtime, if the feed can change it while reading
+        self.chunk_sizer = chunk_sizer
+        if chunk_sizer is not None:
+            if getattr(self.data_feed, "variable_chunk_size", False):
+                self.data_feed.chunk_size = chunk_sizer.chunk_size
+            else:
+                logger.warning(
+                    f"{type(self.data_feed).__name__} has a fixed chunk size, "
+                    "adaptive chunk sizing is disabled"
+                )
+                self.chunk_sizer = None
+
+        # only load the columns the reconcilers read, if the feed supports it
+        self.data_feed.select_columns(self.input_columns)
+
+        # timings and counters, reported once the errors are exported
+        self.metrics = PortfolioAnalysisMetrics()
+        self.metrics_path = metrics_path
+        self.metrics_format = metrics_format
+        if metrics_format not in ("json", "prometheus"):
+            raise ValueError(f"Unknown metrics format '{metrics_format}'")
+
+        self._data_iterator = self.metrics.timed("feed", self.data_feed.get_data())
+        self._data_headers = None
+
+    @property
+    def input_columns(self) -> List[str]:
+        """Return the data columns read by all reconcilers."""
+
+        columns = self.reconciler_graph.input_columns
+        for reconciler in self.history_reconcilers + self.aggregate_reconcilers:
+            for column in reconciler.required_columns:
+                if column not in columns:
+                    columns.append(column)
+
+        return columns
+
     def analyse(self) -> Iterator[interfaces.PortfolioError]:
-        for data_chunk in self.get_data():
-            for reconciler in self.reconcilers:
-                yield from reconciler.reconcile(data_chunk)
+        for error_block in self.analyse_blocks():
+            yield from error_block
+
+    def analyse_blocks(self) -> Iterator[PortfolioErrorBlock]:
+        for error_blocks in self.reconcile_chunks(self.get_data()):
+            yield from error_blocks
+
+    def collect_errors(self, memory_threshold: int = 64 << 20) -> PortfolioErrorStore:
+        """Analyse the portfolio data and keep the errors in a compact store.
+
+        Errors are spilled to disk once they take more than `memory_threshold`
+        bytes; `export_error_blocks(store.blocks())` exports them.
+        """
+
+        store = PortfolioErrorStore(memory_threshold)
+        store.add_blocks(self.analyse_blocks())
+
+        return store
+
+    def reconcile_chunks(
+        self, data_chunks: Iterable[pd.DataFrame]
+    ) -> Iterator[List[PortfolioErrorBlock]]:
+        """Reconcile chunks of data and return the error blocks of every chunk."""
+
+        if self.incremental_state is not None:
+            data_chunks = self.incremental_state.changed_chunks(data_chunks)
+
+        if self.chunk_workers > 1:
+            reconciled_chunks = self._reconcile_chunks_parallel(data_chunks)
+        else:
+            reconciled_chunks = self._reconcile_chunks_serial(data_chunks)
+
+        in_order_reconcilers = self.history_reconcilers + self.aggregate_reconcilers
+        reconcilers = self.reconcilers + in_order_reconcilers
+        chunk_start = time.perf_counter()
+        for data_chunk, error_blocks in self.metrics.timed(
+            "reconcile", reconciled_chunks
+        ):
+            with self.metrics.measure_stage("reconcile"):
+                context = PortfolioReconciliationContext(
+                    data_chunk, self._in_order_buffers
+                )
+                for reconciler in in_order_reconcilers:
+                    with measure_reconciler(
+                        self.metrics.reconcilers, type(reconciler).__name__
+                    ):
+                        error_blocks.append(reconciler.reconcile_block(context))
+                if self.incremental_state is not None:
+                    error_blocks = self.incremental_state.merge(error_blocks)
+
+            self.metrics.record_chunk(len(data_chunk))
+            for reconciler, error_block in zip(reconcilers, error_blocks):
+                self.metrics.record_reconciler(
+                    type(reconciler).__name__, len(data_chunk), len(error_block)
+                )
+            yield error_blocks
+
+            if self.chunk_sizer is not None:
+                # the time between chunks includes reading and exporting them
+                chunk_end = time.perf_counter()
+                self.data_feed.chunk_size = self.chunk_sizer.observe(
+                    len(data_chunk),
+                    self._chunk_memory(data_chunk),
+                    chunk_end - chunk_start,
+                )
+                chunk_start = chunk_end
+
+        if self.aggregate_reconcilers:
+            # the dates still open after the last chunk
+            yield self._finalize_aggregates()
+
+        self._save_history()
+        if self.incremental_state is not None:
+            self.incremental_state.save()
+        if self.chunk_sizer is not None:
+            logger.info(
+                "Chunk sizes used: "
+                + ", ".join(str(size) for size in self.chunk_sizer.history)
+            )
 
     def export_errors(self, errors: Iterator[interfaces.PortfolioError]) -> None:
-        self.error_exporter.export(errors)
+        with self.metrics.measure_stage("export"):
+            self.error_exporter.export(errors)
+        self.report_metrics()
+
+    def export_error_blocks(self, blocks: Iterator[PortfolioErrorBlock]) -> None:
+        with self.metrics.measure_stage("export"):
+            self.error_exporter.export_blocks(blocks)
+        self.report_metrics()
+
+    def report_metrics(self) -> None:
+        """Log the metrics of the run and write them to the metrics file."""
+
+        self.metrics.log_report()
+        if not self.metrics_path:
+            return
+
+        if self.metrics_format == "prometheus":
+            self.metrics.write_prometheus(self.metrics_path)
+        else:
+            self.metrics.write_json(self.metrics_path)
+        logger.info(f"Metrics written to {self.metrics_path}")
+
+    def run_pipelined(self, queue_size: int = 4) -> Dict[str, PipelineStageStats]:
+        """Analyse and export the errors with feed, reconcile and export stages
+        running concurrently.
+
+        Returns the statistics of every stage.
+        """
+
+        return PortfolioPipeline(self, queue_size=queue_size).run()
+
+    def _reconcile_chunks_serial(
+        self, data_chunks: Iterable[pd.DataFrame]
+    ) -> Iterator[Tuple[pd.DataFrame, List[PortfolioErrorBlock]]]:
+        """Reconcile chunks in this process."""
+
+        with self._reconciler_executor() as executor:
+            for data_chunk in data_chunks:
+                yield data_chunk, self.chunk_reconciler.reconcile(
+                    data_chunk, executor, timings=self.metrics.reconcilers
+                )
+
+    def _reconcile_chunks_parallel(
+        self, data_chunks: Iterable[pd.DataFrame]
+    ) -> Iterator[Tuple[pd.DataFrame, List[PortfolioErrorBlock]]]:
+        """Reconcile chunks on a pool of worker processes.
+
+        At most two chunks per worker are in flight, so memory stays bounded
+        when the feed is faster than the workers. Errors are returned in the
+        order of the chunks.
+        """
+
+        max_pending = 2 * self.chunk_workers
+        pending = collections.deque()
+        with ProcessPoolExecutor(
+            max_workers=self.chunk_workers,
+            initializer=_init_chunk_worker,
+            initargs=(self.chunk_reconciler,),
+        ) as executor:
+            for data_chunk in data_chunks:
+                future = executor.submit(_reconcile_chunk, data_chunk)
+                pending.append((data_chunk, future))
+                if len(pending) >= max_pending:
+                    data_chunk, future = pending.popleft()
+                    yield data_chunk, self._chunk_result(future)
+
+            while pending:
+                data_chunk, future = pending.popleft()
+                yield data_chunk, self._chunk_result(future)
+
+    def _chunk_result(self, future: Future) -> List[PortfolioErrorBlock]:
+        """Return the error blocks of a chunk reconciled by a worker process."""
+
+        error_blocks, timings, derived_bytes_per_row = future.result()
+        self.metrics.merge_timings(timings)
+        self._worker_derived_bytes_per_row = derived_bytes_per_row
+
+        return error_blocks
+
+    def _chunk_memory(self, data_chunk: pd.DataFrame) -> int:
+        """Return the bytes of a chunk and of the columns derived from it."""
+
+        if self.chunk_workers > 1:
+            derived_bytes_per_row = self._worker_derived_bytes_per_row
+        else:
+            derived_bytes_per_row = self.chunk_reconciler.derived_bytes_per_row
+        derived_bytes_per_row += self._in_order_buffers.bytes_per_row
+
+        return (
+            data_chunk.memory_usage(deep=True).sum()
+            + len(data_chunk) * derived_bytes_per_row
+        )
+
+    def _finalize_aggregates(self) -> List[PortfolioErrorBlock]:
+        """Check the totals of the last dates of aggregate reconcilers."""
+
+        error_blocks = []
+        with self.metrics.measure_stage("reconcile"):
+            for reconciler in self.aggregate_reconcilers:
+                name = type(reconciler).__name__
+                with measure_reconciler(self.metrics.reconcilers, name):
+                    error_blocks.append(reconciler.finalize())
+                self.metrics.record_reconciler(name, 0, len(error_blocks[-1]))
+
+        return error_blocks
+
+    def _load_history(self) -> None:
+        """Restore the state of history reconcilers saved by a previous run."""
+
+        if not self.history_path or not os.path.exists(self.history_path):
+            return
+
+        with open(self.history_path) as history_file:
+            state = json.load(history_file)
+
+        for reconciler in self.history_reconcilers:
+            if reconciler.YESTERDAY_COLUMN in state:
+                reconciler.history = PortfolioTickerHistory.from_dict(
+                    state[reconciler.YESTERDAY_COLUMN]
+                )
+        logger.info(f"History loaded from {self.history_path}")
+
+    def _save_history(self) -> None:
+        """Save the state of history reconcilers for the next run."""
+
+        if not self.history_path or not self.history_reconcilers:
+            return
+
+        state = {
+            reconciler.YESTERDAY_COLUMN: reconciler.history.to_dict()
+            for reconciler in self.history_reconcilers
+        }
+        with open(self.history_path, "w") as history_file:
+            json.dump(state, history_file)
+        logger.info(f"History saved to {self.history_path}")
+
+    def _reconciler_executor(self):
+        """Return executor for independent reconcilers, if concurrency is enabled."""
+
+        if self.reconciler_workers <= 1:
+            return contextlib.nullcontext()
+
+        return ThreadPoolExecutor(max_workers=self.reconciler_workers)
@@ -0,0 +1,331 @@
+"""Analyse many portfolio files concurrently.
+
+Every input file is analysed with its own `PortfolioAnalyzer` and its errors
+are written to `<output dir>/<reference>.jsonl`, where the reference is a new
+UUID per file. A manifest mapping input files to their references is written
+to `<output dir>/batch-<batch reference>.json`.
+
+Usage:
+
+    python -m analyser.batch "data/*.xlsx" --output results --concurrency 4
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import json
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from analyser.analyser import PortfolioAnalyzer
+from analyser.cli import _positive_int
+from analyser.data_feeds.arrow import (
+    PortfolioDataFeedArrowIPC,
+    PortfolioDataFeedParquet,
+)
+from analyser.data_feeds.base import PortfolioDataFeedBase
+from analyser.data_feeds.csv_feed import PortfolioDataFeedCSV
+from analyser.data_feeds.excel import PortfolioDataFeedExcel
+from analyser.data_feeds.headers import feed_type_for_file, find_input_files
+from analyser.enums import NumericBackend
+from analyser.exporters.json_exporter import encode_blocks
+
+logger = logging.getLogger(__name__)
+
+
+def data_feed_for_file(
+    file_path: str,
+    chunk_size: int = 1000,
+    numeric_backend: NumericBackend = NumericBackend.FLOAT,
+    feed_type: Optional[str] = None,
+) -> PortfolioDataFeedBase:
+    """Return the data feed reading a file.
+
+    The feed type ("excel", "csv", "parquet" or "arrow") is chosen by the
+    file extension unless given.
+    """
+
+    feed_type = feed_type or feed_type_for_file(file_path)
+    if feed_type == "excel":
+        return PortfolioDataFeedExcel(
+            file_path,
+            chunk_size=chunk_size,
+            streaming=True,
+            numeric_backend=numeric_backend,
+        )
+    if feed_type == "csv":
+        return PortfolioDataFeedCSV(
+            file_path, chunk_size=chunk_size, numeric_backend=numeric_backend
+        )
+    if feed_type == "parquet":
+        return PortfolioDataFeedParquet(file_path, numeric_backend=numeric_backend)
+    if feed_type == "arrow":
+        return PortfolioDataFeedArrowIPC(file_path, numeric_backend=numeric_backend)
+
+    raise ValueError(f"Unknown data feed type '{feed_type}'")
+
+
+def analyse_file(
+    file_path: str,
+    error_file_path: str,
+    chunk_size: int = 1000,
+    numeric_backend: NumericBackend = NumericBackend.FLOAT,
+    fused: bool = True,
+) -> Tuple[int, int]:
+    """Analyse a file and write its errors as JSON lines.
+
+    Returns the number of rows and errors. Runs whole files in worker
+    processes of a batch.
+    """
+
+    analyser = PortfolioAnalyzer(
+        data_feed_for_file(
+            file_path, chunk_size=chunk_size, numeric_backend=numeric_backend
+        ),
+        error_exporter=None,
+        fused=fused,
+    )
+    with open(error_file_path, "w") as output_file:
+        for error_blocks in analyser.reconcile_chunks(analyser.get_data()):
+            output_file.write(encode_blocks(error_blocks))
+
+    return analyser.metrics.rows, analyser.metrics.errors
+
+
+@dataclasses.dataclass
+class BatchFileResult:
+    """Outcome of analysing one file of a batch."""
+
+    file_path: str
+    reference: str
+    error_file_path: str
+    errors: int = 0
+    rows: int = 0
+    seconds: float = 0.0
+    failure: Optional[str] = None
+
+
+class PortfolioBatchAnalyzer:
+    """Analyse many files concurrently with asyncio.
+
+    At most `concurrency` files are analysed at the same time. With
+    `processes` (the default), every file is analysed as a whole in a worker
+    process of `executor` (a process pool of `concurrency` workers by
+    default), which writes its result file itself. Reading Excel and CSV
+    files is mostly Python code holding the GIL, so only processes analyse
+    such files in parallel.
+
+    Without `processes`, files are analysed in threads of `executor`, one
+    chunk at a time, while result files are opened, written and closed
+    without blocking the event loop. All files then share one interpreter and
+    its imports, but only I/O and the numpy, numexpr and pyarrow parts of the
+    analysis overlap. A file which fails is reported in its result and doesn't
+    stop the batch.
+    """
+
+    def __init__(
+        self,
+        file_paths: Iterable[str],
+        output_dir: str,
+        concurrency: int = 4,
+        executor: Optional[Executor] = None,
+        processes: bool = True,
+        chunk_size: int = 1000,
+        numeric_backend: NumericBackend = NumericBackend.FLOAT,
+        fused: bool = True,
+    ):
+        self.file_paths = list(file_paths)
+        self.output_dir = output_dir
+        self.concurrency = concurrency
+        self.executor = executor
+        self.processes = processes
+        self.chunk_size = chunk_size
+        self.numeric_backend = numeric_backend
+        self.fused = fused
+        self.reference = str(uuid.uuid4())
+
+    def run(self) -> List[BatchFileResult]:
+        """Analyse all files and return their results."""
+
+        return asyncio.run(self.analyse())
+
+    async def analyse(self) -> List[BatchFileResult]:
+        """Analyse all files, `concurrency` at a time."""
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        executor = self.executor
+        if executor is None and self.processes:
+            executor = ProcessPoolExecutor(max_workers=self.concurrency)
+        elif executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=self.concurrency, thread_name_prefix="batch"
+            )
+        start = time.perf_counter()
+        try:
+            results = await asyncio.gather(
+                *(
+                    self._analyse_file(file_path, semaphore, executor)
+                    for file_path in self.file_paths
+                )
+            )
+        finally:
+            if self.executor is None:
+                executor.shutdown()
+
+        failed = sum(result.failure is not None for result in results)
+        logger.info(
+            "Analysed %d files in %.2fs, %d failed. Batch reference: %s",
+            len(results),
+            time.perf_counter() - start,
+            failed,
+            self.reference,
+        )
+        await asyncio.to_thread(self._write_manifest, results)
+
+        return results
+
+    async def _analyse_file(
+        self, file_path: str, semaphore: asyncio.Semaphore, executor: Executor
+    ) -> BatchFileResult:
+        """Analyse one file and export its errors."""
+
+        reference = str(uuid.uuid4())
+        result = BatchFileResult(
+            file_path=file_path,
+            reference=reference,
+            error_file_path=os.path.join(self.output_dir, f"{reference}.jsonl"),
+        )
+
+        async with semaphore:
+            logger.info(f"Analysing {file_path}. Reference: {reference}")
+            loop = asyncio.get_running_loop()
+            start = time.perf_counter()
+            try:
+                if self.processes:
+                    result.rows, result.errors = await loop.run_in_executor(
+                        executor,
+                        analyse_file,
+                        file_path,
+                        result.error_file_path,
+                        self.chunk_size,
+                        self.numeric_backend,
+                        self.fused,
+                    )
+                else:
+                    await self._analyse_chunks(file_path, result, executor)
+            except Exception as exc:
+                logger.exception(f"Analysis of {file_path} failed")
+                result.failure = f"{type(exc).__name__}: {exc}"
+            finally:
+                result.seconds = time.perf_counter() - start
+
+        if result.failure is not None:
+            if os.path.exists(result.error_file_path):
+                await asyncio.to_thread(os.remove, result.error_file_path)
+        else:
+            logger.info(
+                f"Analysed {file_path} in {result.seconds:.2f}s, "
+                f"{result.errors} errors written to {result.error_file_path}"
+            )
+
+        return result
+
+    async def _analyse_chunks(
+        self, file_path: str, result: BatchFileResult, executor: Executor
+    ) -> None:
+        """Analyse a file in threads, writing the errors of every chunk."""
+
+        loop = asyncio.get_running_loop()
+        output_file = await asyncio.to_thread(open, result.error_file_path, "w")
+        try:
+            analyser = await loop.run_in_executor(
+                executor, self._create_analyser, file_path
+            )
+            chunks = analyser.reconcile_chunks(analyser.get_data())
+
+            while True:
+                # read, reconcile and serialize the next chunk
+                encoded = await loop.run_in_executor(executor, self._next_chunk, chunks)
+                if encoded is None:
+                    break
+                await asyncio.to_thread(output_file.write, encoded)
+
+            result.rows = analyser.metrics.rows
+            result.errors = analyser.metrics.errors
+        finally:
+            await asyncio.to_thread(output_file.close)
+
+    def _create_analyser(self, file_path: str) -> PortfolioAnalyzer:
+        data_feed = data_feed_for_file(
+            file_path, chunk_size=self.chunk_size, numeric_backend=self.numeric_backend
+        )
+
+        return PortfolioAnalyzer(data_feed, error_exporter=None, fused=self.fused)
+
+    @staticmethod
+    def _next_chunk(chunks) -> Optional[str]:
+        """Reconcile the next chunk and return its errors as JSON lines, or None
+        after the last chunk."""
+
+        error_blocks = next(chunks, None)
+        if error_blocks is None:
+            return None
+
+        return encode_blocks(error_blocks)
+
+    def _write_manifest(self, results: List[BatchFileResult]) -> None:
+        manifest_path = os.path.join(self.output_dir, f"batch-{self.reference}.json")
+        with open(manifest_path, "w") as manifest_file:
+            json.dump(
+                {
+                    "reference": self.reference,
+                    "files": [dataclasses.asdict(result) for result in results],
+                },
+                manifest_file,
+                indent=2,
+            )
+        logger.info(f"Batch manifest written to {manifest_path}")
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "inputs", nargs="+", help="Input files, directories or glob patterns"
+    )
+    parser.add_argument("--output", default="results", help="Directory of results")
+    parser.add_argument("--concurrency", type=_positive_int, default=4)
+    parser.add_argument(
+        "--threads",
+        dest="processes",
+        action="store_false",
+        help="analyse files in threads of this process instead of processes",
+    )
+    parser.add_argument("--chunk-size", type=_positive_int, default=1000)
+    parser.add_argument(
+        "--numeric-backend",
+        choices=[backend.value for backend in NumericBackend],
+        default=NumericBackend.FLOAT.value,
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    results = PortfolioBatchAnalyzer(
+        find_input_files(args.inputs),
+        args.output,
+        concurrency=args.concurrency,
+        processes=args.processes,
+        chunk_size=args.chunk_size,
+        numeric_backend=NumericBackend(args.numeric_backend),
+    ).run()
+
+    if any(result.failure is not None for result in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
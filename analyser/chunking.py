@@ -0,0 +1,118 @@
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PortfolioChunkSizer:
+    """Choose the chunk size at runtime from observed chunks.
+
+    Every reconciled chunk is reported with its size in memory, including
+    the derived columns kept in reconciliation buffers and the arrays of the
+    fused reconciler, and the time it took to produce, reconcile and
+    export it. The chunk size starts at `initial_size` and grows by `growth`
+    while rows per second improve by at least `min_gain`, then settles on the
+    fastest size seen. Independently of throughput, the chunk size never
+    exceeds what fits into `memory_budget` bytes at the observed memory per
+    row, so it shrinks again when rows turn out to be wider.
+
+    Chunks of other sizes than the current one (e.g. chunks which were
+    already read when the size changed, or the last chunk) only count for
+    the memory per row.
+    """
+
+    def __init__(
+        self,
+        memory_budget: int = 64 << 20,
+        initial_size: int = 1000,
+        min_size: int = 100,
+        max_size: int = 1_000_000,
+        growth: float = 2.0,
+        min_gain: float = 0.05,
+        samples_per_size: int = 2,
+    ):
+        if not 0 < min_size <= initial_size <= max_size:
+            raise ValueError("Chunk sizes must satisfy 0 < min <= initial <= max")
+        if growth <= 1:
+            raise ValueError("Chunk size growth must be greater than 1")
+
+        self.memory_budget = memory_budget
+        self.min_size = min_size
+        self.max_size = max_size
+        self.growth = growth
+        self.min_gain = min_gain
+        self.samples_per_size = samples_per_size
+
+        self.chunk_size = initial_size
+        self.bytes_per_row: Optional[float] = None
+        self.settled = False
+        self.history: List[int] = [initial_size]
+
+        self._samples: Dict[int, List[float]] = {}
+        self._best_size = initial_size
+        self._best_throughput = 0.0
+
+    @property
+    def memory_limit(self) -> int:
+        """Return the largest chunk size fitting into the memory budget."""
+
+        if not self.bytes_per_row:
+            return self.max_size
+
+        return max(int(self.memory_budget / self.bytes_per_row), self.min_size)
+
+    def observe(self, rows: int, memory_bytes: int, seconds: float) -> int:
+        """Record a processed chunk and return the chunk size for the next ones."""
+
+        if not rows:
+            return self.chunk_size
+
+        # the memory per row is smoothed, as string lengths vary between chunks
+        bytes_per_row = memory_bytes / rows
+        if self.bytes_per_row is None:
+            self.bytes_per_row = bytes_per_row
+        else:
+            self.bytes_per_row = 0.5 * self.bytes_per_row + 0.5 * bytes_per_row
+
+        if not self.settled and rows == self.chunk_size:
+            self._search(rows, seconds)
+
+        if self.chunk_size > self.memory_limit:
+            self._resize(
+                self.memory_limit,
+                f"to fit {self.memory_budget / (1 << 20):.0f} MiB "
+                f"at {self.bytes_per_row:.0f} bytes per row",
+            )
+
+        return self.chunk_size
+
+    def _search(self, rows: int, seconds: float) -> None:
+        """Grow the chunk size while the throughput improves."""
+
+        samples = self._samples.setdefault(rows, [0, 0.0])
+        samples[0] += 1
+        samples[1] += seconds
+        if samples[0] < self.samples_per_size:
+            return
+
+        throughput = rows * samples[0] / samples[1] if samples[1] else float("inf")
+        if throughput > self._best_throughput * (1 + self.min_gain):
+            self._best_size = rows
+            self._best_throughput = throughput
+            next_size = min(int(rows * self.growth), self.max_size, self.memory_limit)
+            if next_size > rows:
+                self._resize(next_size, f"at {throughput:.0f} rows/s")
+                return
+
+        self.settled = True
+        self._resize(self._best_size, f"at {self._best_throughput:.0f} rows/s")
+        logger.info(f"Chunk size settled at {self.chunk_size} rows")
+
+    def _resize(self, chunk_size: int, reason: str) -> None:
+        chunk_size = max(chunk_size, self.min_size)
+        if chunk_size == self.chunk_size:
+            return
+
+        logger.info(f"Chunk size {self.chunk_size} -> {chunk_size} rows ({reason})")
+        self.chunk_size = chunk_size
+        self.history.append(chunk_size)
@@ -0,0 +1,364 @@
+"""Command line interface of the portfolio analyser.
+
+Usage:
+
+    python -m analyser run data/Test.xlsx --exporter parquet --chunk-workers 2
+    python -m analyser validate-headers "incoming/*.csv"
+    python -m analyser bench data/Test.xlsx --chunk-size 5000 --repeat 3
+
+Only the standard library is imported at startup. pandas, NumPy and the
+analyser are imported by the commands which analyse data, so `--help` and
+`validate-headers`, which only reads the header row of every file, start
+quickly enough to run from cron many times a day.
+"""
+
+import argparse
+import contextlib
+import logging
+import os
+import sys
+import time
+import uuid
+from typing import List, Optional, Sequence
+
+from analyser.data_feeds.headers import FEED_TYPES, find_input_files, read_headers
+from analyser.enums import NumericBackend, PortfolioDataHeader
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("jsonl", "parquet", "arrow", "sqlite")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run a command and return its exit status."""
+
+    args = _parser().parse_args(argv)
+    logging.basicConfig(level=args.log_level)
+
+    return args.command(args)
+
+
+def _positive_int(value: str) -> int:
+    """Parse an argument which must be a positive integer."""
+
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not an integer: {value!r}") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+
+    return number
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m analyser", description="Detect errors in portfolio data."
+    )
+    subparsers = parser.add_subparsers(required=True, metavar="command")
+
+    run = subparsers.add_parser(
+        "run",
+        help="analyse files and export their errors",
+        description="Analyse every input file and export its errors to "
+        "<output>/<reference>.<format>, with a new reference per file.",
+    )
+    _add_input_arguments(run)
+    _add_analysis_arguments(run)
+    run.add_argument(
+        "--exporter", choices=EXPORT_FORMATS, default="jsonl", help="error format"
+    )
+    run.add_argument("--output", default="results", help="directory of results")
+    run.add_argument(
+        "--export-chunk-size",
+        type=_positive_int,
+        help="errors per write, the exporter's default if not given",
+    )
+    run.add_argument(
+        "--adaptive-chunk-size",
+        action="store_true",
+        help="grow chunks while throughput improves",
+    )
+    run.add_argument(
+        "--chunk-memory-budget",
+        type=_positive_int,
+        default=64 << 20,
+        help="bytes per chunk, for adaptive sizing",
+    )
+    run.add_argument(
+        "--cache-dir", help="keep parsed chunks between runs in this directory"
+    )
+    run.add_argument(
+        "--metrics",
+        choices=("json", "prometheus"),
+        help="write the metrics of every file next to its errors",
+    )
+    run.set_defaults(command=_run, log_level="INFO")
+
+    validate = subparsers.add_parser(
+        "validate-headers",
+        help="check the headers of files without reading their data",
+        description="Check that the header row of every input file matches the "
+        "portfolio data headers. Exits with status 1 if any file doesn't.",
+    )
+    _add_input_arguments(validate)
+    validate.set_defaults(command=_validate_headers, log_level="WARNING")
+
+    bench = subparsers.add_parser(
+        "bench",
+        help="time the analysis of files without exporting errors",
+        description="Read and reconcile every input file, without exporting "
+        "errors, and print the best time of the repeats.",
+    )
+    _add_input_arguments(bench)
+    _add_analysis_arguments(bench)
+    bench.add_argument("--repeat", type=_positive_int, default=3)
+    bench.set_defaults(command=_bench, log_level="WARNING")
+
+    return parser
+
+
+def _add_input_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "inputs", nargs="+", help="input files, directories or glob patterns"
+    )
+    parser.add_argument(
+        "--feed",
+        choices=FEED_TYPES,
+        help="data feed type, chosen by file extension by default",
+    )
+    parser.add_argument(
+        "--log-level",
+        choices=("DEBUG", "INFO", "WARNING", "ERROR"),
+        help="logging level, INFO for run and WARNING otherwise",
+    )
+
+
+def _add_analysis_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--chunk-size", type=_positive_int, default=1000, help="rows per chunk"
+    )
+    parser.add_argument(
+        "--chunk-workers",
+        type=_positive_int,
+        default=1,
+        help="processes reconciling chunks",
+    )
+    parser.add_argument(
+        "--reconciler-workers",
+        type=_positive_int,
+        default=1,
+        help="threads running independent reconcilers",
+    )
+    parser.add_argument(
+        "--numeric-backend",
+        choices=[backend.value for backend in NumericBackend],
+        default=NumericBackend.FLOAT.value,
+    )
+    parser.add_argument(
+        "--no-fused",
+        dest="fused",
+        action="store_false",
+        help="run reconcilers one by one instead of as one fused plan",
+    )
+    parser.add_argument("--history-checks", action="store_true")
+    parser.add_argument("--aggregate-checks", action="store_true")
+    parser.add_argument(
+        "--reconciler-config", help="JSON file selecting reconcilers and tolerances"
+    )
+
+
+def _input_files(args: argparse.Namespace) -> List[str]:
+    file_paths = find_input_files(args.inputs)
+    if not file_paths:
+        logger.error("No input files found")
+
+    return file_paths
+
+
+def _validate_headers(args: argparse.Namespace) -> int:
+    """Print whether the headers of every file match, without importing pandas."""
+
+    expected = [header.value for header in PortfolioDataHeader]
+    file_paths = _input_files(args)
+    invalid = 0
+    for file_path in file_paths:
+        try:
+            headers = read_headers(file_path, args.feed)
+        except Exception as exc:
+            invalid += 1
+            print(f"{file_path}: can not be read: {exc}")
+            continue
+
+        if headers == expected:
+            print(f"{file_path}: OK")
+            continue
+
+        invalid += 1
+        missing = [header for header in expected if header not in headers]
+        unexpected = [header for header in headers if header not in expected]
+        problems = []
+        if missing:
+            problems.append(f"missing {', '.join(missing)}")
+        if unexpected:
+            problems.append(f"unexpected {', '.join(unexpected)}")
+        print(f"{file_path}: {'; '.join(problems) or 'columns out of order'}")
+
+    return 1 if invalid or not file_paths else 0
+
+
+def _create_data_feed(args: argparse.Namespace, file_path: str):
+    """Create the data feed of a file with the feed arguments."""
+
+    from analyser.batch import data_feed_for_file
+
+    return data_feed_for_file(
+        file_path,
+        chunk_size=args.chunk_size,
+        numeric_backend=NumericBackend(args.numeric_backend),
+        feed_type=args.feed,
+    )
+
+
+def _create_analyser(args: argparse.Namespace, data_feed, error_exporter, **kwargs):
+    """Create an analyser with the analysis arguments."""
+
+    from analyser.analyser import PortfolioAnalyzer
+    from analyser.reconcilers.registry import PortfolioReconcilerConfig
+
+    reconciler_config = PortfolioReconcilerConfig()
+    if args.reconciler_config:
+        reconciler_config = PortfolioReconcilerConfig.from_file(args.reconciler_config)
+
+    return PortfolioAnalyzer(
+        data_feed,
+        error_exporter,
+        reconciler_workers=args.reconciler_workers,
+        chunk_workers=args.chunk_workers,
+        fused=args.fused,
+        history_checks=args.history_checks,
+        aggregate_checks=args.aggregate_checks,
+        reconcilers=reconciler_config.reconcilers,
+        tolerances=reconciler_config.tolerances,
+        **kwargs,
+    )
+
+
+def _run(args: argparse.Namespace) -> int:
+    """Analyse every file and export its errors, one file after another."""
+
+    file_paths = _input_files(args)
+    os.makedirs(args.output, exist_ok=True)
+    failed = 0
+    for file_path in file_paths:
+        reference = str(uuid.uuid4())
+        logger.info("Analysing %s. Reference: %s", file_path, reference)
+        try:
+            with contextlib.ExitStack() as exit_stack:
+                analyser = _create_run_analyser(args, file_path, reference, exit_stack)
+                analyser.run_pipelined()
+        except Exception:
+            logger.exception(f"Analysis of {file_path} failed")
+            failed += 1
+        else:
+            logger.info("Analysis of %s completed", file_path)
+
+    return 1 if failed or not file_paths else 0
+
+
+def _create_run_analyser(
+    args: argparse.Namespace,
+    file_path: str,
+    reference: str,
+    exit_stack: contextlib.ExitStack,
+):
+    """Create the analyser of a file, exporting its errors under the reference."""
+
+    from analyser.chunking import PortfolioChunkSizer
+
+    data_feed = _create_data_feed(args, file_path)
+    if args.cache_dir:
+        from analyser.data_feeds.cache import PortfolioDataFeedCache
+
+        data_feed = PortfolioDataFeedCache(data_feed, args.cache_dir)
+
+    chunk_sizer = None
+    if args.adaptive_chunk_size:
+        chunk_sizer = PortfolioChunkSizer(
+            memory_budget=args.chunk_memory_budget, initial_size=args.chunk_size
+        )
+
+    metrics_path = None
+    if args.metrics:
+        extension = "prom" if args.metrics == "prometheus" else "json"
+        metrics_path = os.path.join(args.output, f"{reference}.metrics.{extension}")
+
+    return _create_analyser(
+        args,
+        data_feed,
+        _create_exporter(args, reference, exit_stack),
+        chunk_sizer=chunk_sizer,
+        metrics_path=metrics_path,
+        metrics_format=args.metrics or "json",
+    )
+
+
+def _create_exporter(
+    args: argparse.Namespace, reference: str, exit_stack: contextlib.ExitStack
+):
+    """Create the error exporter of the export format."""
+
+    error_file_path = os.path.join(args.output, f"{reference}.{args.exporter}")
+    options = {}
+    if args.export_chunk_size:
+        options["chunk_size"] = args.export_chunk_size
+    if args.exporter == "parquet":
+        from analyser.exporters.arrow_exporter import PortfolioErrorExporterParquet
+
+        return PortfolioErrorExporterParquet(error_file_path, **options)
+    if args.exporter == "arrow":
+        from analyser.exporters.arrow_exporter import PortfolioErrorExporterArrowIPC
+
+        return PortfolioErrorExporterArrowIPC(error_file_path, **options)
+    if args.exporter == "sqlite":
+        from analyser.exporters.sqlite_exporter import PortfolioErrorExporterSQLite
+
+        # shared by all runs
+        return PortfolioErrorExporterSQLite(
+            os.path.join(args.output, "errors.sqlite"),
+            reference,
+            **options,
+        )
+
+    from analyser.exporters.json_exporter import PortfolioErrorExporterJSON
+
+    error_output_file = exit_stack.enter_context(open(error_file_path, "w"))
+    return PortfolioErrorExporterJSON(error_output_file, batched=True, **options)
+
+
+def _bench(args: argparse.Namespace) -> int:
+    """Print the best time of reading and reconciling every file."""
+
+    file_paths = _input_files(args)
+    for file_path in file_paths:
+        best_time = float("inf")
+        for _ in range(args.repeat):
+            analyser = _create_analyser(
+                args, _create_data_feed(args, file_path), error_exporter=None
+            )
+            start = time.perf_counter()
+            for _ in analyser.reconcile_chunks(analyser.get_data()):
+                pass
+            best_time = min(best_time, time.perf_counter() - start)
+
+        rows = analyser.metrics.rows
+        print(
+            f"{file_path}: {rows} rows, {analyser.metrics.errors} errors, "
+            f"best {best_time * 1000:.1f} ms, {rows / best_time:,.0f} rows/s"
+        )
+
+    return 0 if file_paths else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
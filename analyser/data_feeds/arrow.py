@@ -0,0 +1,156 @@
+import logging
+from typing import Iterator, List
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from analyser.data_feeds.base import PortfolioDataFeedBase
+from analyser.enums import PORTFOLIO_DATA_DTYPES, NumericBackend
+from analyser.interfaces import PortfolioDataFeed
+
+logger = logging.getLogger(__name__)
+
+# Arrow types of the pandas dtypes in PORTFOLIO_DATA_DTYPES
+_ARROW_TYPES = {
+    "datetime64[ns]": pa.timestamp("ns"),
+    "object": pa.string(),
+    "float64": pa.float64(),
+    "int64": pa.int64(),
+    "bool": pa.bool_(),
+}
+
+PORTFOLIO_DATA_SCHEMA = pa.schema(
+    [
+        (header.value, _ARROW_TYPES[dtype])
+        for header, dtype in PORTFOLIO_DATA_DTYPES.items()
+    ]
+)
+
+
+class PortfolioDataFeedArrowBase(PortfolioDataFeedBase):
+    """Base class for feeds reading columnar Arrow based files.
+
+    Only the selected columns are read from the file. With the float numeric
+    backend, numeric columns without nulls are handed to pandas without
+    copying, straight from the memory-mapped file.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        memory_map: bool = True,
+        numeric_backend: NumericBackend = NumericBackend.DECIMAL,
+    ):
+        super().__init__(numeric_backend)
+
+        self.file_path = file_path
+        self.memory_map = memory_map
+
+    def _raw_columns(self, raw_headers: List[str]) -> List[str]:
+        """Return the names of the selected columns as they are in the file."""
+
+        if self.columns is None:
+            return list(raw_headers)
+
+        return [
+            header
+            for header in raw_headers
+            if self.normalize_header(header) in self.columns
+        ]
+
+    def _to_frame(self, table: pa.Table) -> pd.DataFrame:
+        """Convert a table to a DataFrame with normalized headers."""
+
+        table = table.rename_columns(
+            [self.normalize_header(header) for header in table.column_names]
+        )
+        df = table.to_pandas(split_blocks=True)
+        self._convert_numeric(df)
+
+        return df
+
+
+class PortfolioDataFeedParquet(PortfolioDataFeedArrowBase):
+    """Read portfolio data from a Parquet file, one row group per chunk."""
+
+    def get_data(self) -> Iterator[pd.DataFrame]:
+        """Get the data for portfolio."""
+
+        parquet_file = pq.ParquetFile(self.file_path, memory_map=self.memory_map)
+        raw_headers = parquet_file.schema_arrow.names
+        headers = [self.normalize_header(header) for header in raw_headers]
+        yield headers
+        logger.debug(f"Headers: {headers}")
+        raw_columns = self._raw_columns(raw_headers)
+
+        for row_group in range(parquet_file.num_row_groups):
+            logger.debug(f"Reading row group {row_group}")
+            yield self._to_frame(
+                parquet_file.read_row_group(row_group, columns=raw_columns)
+            )
+
+        logger.debug("No more data to read")
+
+
+class PortfolioDataFeedArrowIPC(PortfolioDataFeedArrowBase):
+    """Read portfolio data from an Arrow IPC file, one record batch per chunk."""
+
+    def get_data(self) -> Iterator[pd.DataFrame]:
+        """Get the data for portfolio."""
+
+        if self.memory_map:
+            source = pa.memory_map(self.file_path)
+        else:
+            source = pa.OSFile(self.file_path)
+
+        with source:
+            reader = pa.ipc.open_file(source)
+            raw_headers = reader.schema.names
+            headers = [self.normalize_header(header) for header in raw_headers]
+            yield headers
+            logger.debug(f"Headers: {headers}")
+            raw_columns = self._raw_columns(raw_headers)
+
+            for batch_index in range(reader.num_record_batches):
+                logger.debug(f"Reading record batch {batch_index}")
+                batch = reader.get_batch(batch_index).select(raw_columns)
+                yield self._to_frame(pa.Table.from_batches([batch]))
+
+        logger.debug("No more data to read")
+
+
+def _iterate_tables(data_feed: PortfolioDataFeed) -> Iterator[pa.Table]:
+    """Convert the chunks of a feed to tables of the portfolio data schema.
+
+    The feed has to use the float numeric backend.
+    """
+
+    data = data_feed.get_data()
+    next(data)  # headers
+    for df in data:
+        yield pa.Table.from_pandas(
+            df, schema=PORTFOLIO_DATA_SCHEMA, preserve_index=False
+        )
+
+
+def write_parquet(
+    data_feed: PortfolioDataFeed, file_path: str, compression: str = "zstd"
+) -> None:
+    """Write the data of a feed to a Parquet file, one row group per chunk."""
+
+    with pq.ParquetWriter(
+        file_path, PORTFOLIO_DATA_SCHEMA, compression=compression
+    ) as writer:
+        for table in _iterate_tables(data_feed):
+            writer.write_table(table, row_group_size=max(table.num_rows, 1))
+
+
+def write_arrow_ipc(data_feed: PortfolioDataFeed, file_path: str) -> None:
+    """Write the data of a feed to an Arrow IPC file, one record batch per chunk."""
+
+    with pa.OSFile(file_path, "wb") as sink:
+        with pa.ipc.new_file(sink, PORTFOLIO_DATA_SCHEMA) as writer:
+            for table in _iterate_tables(data_feed):
+                for batch in table.to_batches(max_chunksize=table.num_rows or None):
+                    writer.write_batch(batch)
@@ -0,0 +1,47 @@
+from decimal import Decimal
+from typing import Iterable, List, Optional
+
+import pandas as pd
+
+from analyser.enums import NumericBackend
+from analyser.interfaces import PortfolioDataFeed
+
+
+class PortfolioDataFeedBase(PortfolioDataFeed):
+    """Base class for portfolio data feeds."""
+
+    # Feeds reading `chunk_size` again before every chunk, so the chunk size
+    # can be changed while the data is read.
+    variable_chunk_size = False
+
+    def __init__(self, numeric_backend: NumericBackend = NumericBackend.DECIMAL):
+        self.numeric_backend = NumericBackend(numeric_backend)
+        self.columns: Optional[List[str]] = None
+
+    def select_columns(self, columns: Optional[Iterable[str]]) -> None:
+        """Only load the given columns, or all columns if None."""
+
+        self.columns = list(columns) if columns is not None else None
+
+    def _project(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Drop the columns which are not selected."""
+
+        if self.columns is None:
+            return df
+
+        return df.drop(
+            columns=[column for column in df.columns if column not in self.columns]
+        )
+
+    def _convert_numeric(self, df: pd.DataFrame) -> None:
+        """Convert float columns to the configured numeric backend.
+
+        Float columns are kept as float64 for the float backend, otherwise all
+        float values are converted to Decimal.
+        """
+
+        if self.numeric_backend == NumericBackend.FLOAT:
+            return
+
+        for col in df.select_dtypes(include=["float"]).columns:
+            df[col] = df[col].apply(Decimal)
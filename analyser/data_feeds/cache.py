@@ -0,0 +1,223 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+from typing import Iterable, Iterator, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+
+from analyser.data_feeds.base import PortfolioDataFeedBase
+from analyser.enums import NumericBackend
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE_NAME = "manifest.json"
+
+
+class PortfolioDataFeedCache(PortfolioDataFeedBase):
+    """Cache the parsed chunks of another feed on disk.
+
+    Cache entries are keyed by the source file (path, modification time, size
+    and optionally a hash of its contents), the chunk size, the feed class and
+    the selected columns. Every chunk is stored as an Arrow IPC file and read
+    memory-mapped on later runs, so the source file is not parsed again.
+
+    Chunks are cached with float values and converted to the numeric backend
+    of the wrapped feed after loading; converting floats to Decimal is exact,
+    so both backends get the same values as without the cache. The least
+    recently used entries are evicted when the cache grows over `max_size`
+    bytes.
+    """
+
+    def __init__(
+        self,
+        data_feed: PortfolioDataFeedBase,
+        cache_dir: str,
+        max_size: int = 1 << 30,
+        hash_contents: bool = False,
+    ):
+        super().__init__(data_feed.numeric_backend)
+
+        self.data_feed = data_feed
+        self.data_feed.numeric_backend = NumericBackend.FLOAT
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.hash_contents = hash_contents
+
+    @property
+    def file_path(self) -> str:
+        """Return the absolute path of the source file."""
+
+        return os.path.abspath(self.data_feed.file_path)
+
+    def select_columns(self, columns: Optional[Iterable[str]]) -> None:
+        """Only load the given columns, or all columns if None."""
+
+        super().select_columns(columns)
+        self.data_feed.select_columns(columns)
+
+    def get_data(self) -> Iterator[pd.DataFrame]:
+        """Get the data for portfolio, from the cache if it's there."""
+
+        entry_path = os.path.join(self.cache_dir, self.cache_key())
+        if os.path.exists(os.path.join(entry_path, MANIFEST_FILE_NAME)):
+            logger.info(f"Reading cached chunks of {self.file_path}")
+            yield from self._read_entry(entry_path)
+        else:
+            logger.info(f"Caching chunks of {self.file_path}")
+            yield from self._write_entry(entry_path)
+
+    def cache_key(self) -> str:
+        """Return the key of the cache entry of the current source file."""
+
+        stat = os.stat(self.file_path)
+        key = {
+            "file_path": self.file_path,
+            "mtime": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "hash": self._hash_contents() if self.hash_contents else None,
+            "feed": type(self.data_feed).__qualname__,
+            "chunk_size": getattr(self.data_feed, "chunk_size", None),
+            "columns": self.columns,
+        }
+        encoded_key = json.dumps(key, sort_keys=True).encode()
+
+        return hashlib.sha256(encoded_key).hexdigest()[:32]
+
+    def invalidate(self) -> None:
+        """Remove every cache entry of the source file."""
+
+        for entry_path, manifest in _cache_entries(self.cache_dir):
+            if manifest["file_path"] == self.file_path:
+                shutil.rmtree(entry_path, ignore_errors=True)
+                logger.info(f"Cache entry {entry_path} invalidated")
+
+    def _read_entry(self, entry_path: str) -> Iterator[pd.DataFrame]:
+        """Read the chunks of a cache entry."""
+
+        manifest_path = os.path.join(entry_path, MANIFEST_FILE_NAME)
+        with open(manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+        os.utime(manifest_path)  # mark the entry as recently used
+
+        yield manifest["headers"]
+
+        for chunk_index in range(manifest["chunks"]):
+            logger.debug(f"Reading cached chunk {chunk_index}")
+            with pa.memory_map(_chunk_path(entry_path, chunk_index)) as source:
+                table = pa.ipc.open_file(source).read_all()
+                df = table.to_pandas(split_blocks=True)
+            self._convert_numeric(df)
+            yield df
+
+    def _write_entry(self, entry_path: str) -> Iterator[pd.DataFrame]:
+        """Read the chunks from the wrapped feed and cache them.
+
+        The entry is only stored once every chunk was read.
+        """
+
+        temporary_path = f"{entry_path}.tmp-{os.getpid()}"
+        os.makedirs(temporary_path, exist_ok=True)
+        try:
+            data = self.data_feed.get_data()
+            headers = next(data)
+            yield headers
+
+            chunk_count = 0
+            for df in data:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                chunk_path = _chunk_path(temporary_path, chunk_count)
+                with pa.OSFile(chunk_path, "wb") as sink:
+                    with pa.ipc.new_file(sink, table.schema) as writer:
+                        writer.write_table(table)
+                chunk_count += 1
+
+                self._convert_numeric(df)
+                yield df
+
+            manifest = {
+                "file_path": self.file_path,
+                "headers": headers,
+                "chunks": chunk_count,
+            }
+            with open(os.path.join(temporary_path, MANIFEST_FILE_NAME), "w") as file:
+                json.dump(manifest, file)
+
+            shutil.rmtree(entry_path, ignore_errors=True)
+            os.replace(temporary_path, entry_path)
+            logger.info(f"Cache entry {entry_path} stored")
+        finally:
+            shutil.rmtree(temporary_path, ignore_errors=True)
+
+        evict_cache(self.cache_dir, self.max_size)
+
+    def _hash_contents(self) -> str:
+        """Return the SHA-256 hash of the source file."""
+
+        digest = hashlib.sha256()
+        with open(self.file_path, "rb") as source_file:
+            for block in iter(lambda: source_file.read(1 << 20), b""):
+                digest.update(block)
+
+        return digest.hexdigest()
+
+
+def evict_cache(cache_dir: str, max_size: int) -> None:
+    """Remove the least recently used cache entries until the cache fits into
+    `max_size` bytes."""
+
+    entries = []
+    for entry_path, _ in _cache_entries(cache_dir):
+        last_used = os.path.getmtime(os.path.join(entry_path, MANIFEST_FILE_NAME))
+        entries.append((last_used, _entry_size(entry_path), entry_path))
+
+    cache_size = sum(size for _, size, _ in entries)
+    for _, size, entry_path in sorted(entries):
+        if cache_size <= max_size:
+            break
+
+        shutil.rmtree(entry_path, ignore_errors=True)
+        cache_size -= size
+        logger.info(f"Cache entry {entry_path} evicted")
+
+
+def clear_cache(cache_dir: str) -> None:
+    """Remove every cache entry."""
+
+    for entry_path, _ in _cache_entries(cache_dir):
+        shutil.rmtree(entry_path, ignore_errors=True)
+
+
+def _cache_entries(cache_dir: str) -> List[tuple]:
+    """Return the paths and manifests of the stored cache entries."""
+
+    if not os.path.isdir(cache_dir):
+        return []
+
+    entries = []
+    for entry_name in os.listdir(cache_dir):
+        manifest_path = os.path.join(cache_dir, entry_name, MANIFEST_FILE_NAME)
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as manifest_file:
+                entries.append(
+                    (os.path.dirname(manifest_path), json.load(manifest_file))
+                )
+
+    return entries
+
+
+def _entry_size(entry_path: str) -> int:
+    """Return the size of the files of a cache entry in bytes."""
+
+    return sum(
+        os.path.getsize(os.path.join(entry_path, file_name))
+        for file_name in os.listdir(entry_path)
+    )
+
+
+def _chunk_path(entry_path: str, chunk_index: int) -> str:
+    """Return the path of a cached chunk."""
+
+    return os.path.join(entry_path, f"{chunk_index:06d}.arrow")
@@ -0,0 +1,104 @@
+import logging
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from analyser.data_feeds.base import PortfolioDataFeedBase
+from analyser.enums import PORTFOLIO_DATA_DTYPES, NumericBackend
+from analyser.interfaces import validate_headers
+
+logger = logging.getLogger(__name__)
+
+# nullable dtypes parsing the columns whose dtype can't hold missing values
+_NULLABLE_DTYPES = {"int64": "Int64", "bool": "boolean"}
+
+
+class PortfolioDataFeedCSV(PortfolioDataFeedBase):
+    """Read portfolio data from a CSV file in chunks.
+
+    Column types are taken from PORTFOLIO_DATA_DTYPES, so no column goes
+    through type inference. Integer and bool columns are parsed as nullable
+    columns, so a row with a missing quantity or flag is read and reported
+    instead of failing the file, and are given the dtypes pandas reads the
+    same values from Excel with: their own dtype when no value is missing,
+    float64 for integers with missing values and objects with NaN for flags. Compression (e.g. gzip or zstd) is inferred from
+    the file extension unless given explicitly.
+    """
+
+    variable_chunk_size = True
+
+    def __init__(
+        self,
+        file_path: str,
+        chunk_size: int = 1000,
+        compression: str = "infer",
+        numeric_backend: NumericBackend = NumericBackend.DECIMAL,
+    ):
+        super().__init__(numeric_backend)
+
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.compression = compression
+
+    def get_data(self) -> Iterator[pd.DataFrame]:
+        """Get the data for portfolio."""
+
+        first_row = pd.read_csv(self.file_path, nrows=0, compression=self.compression)
+        headers = [self.normalize_header(header) for header in first_row.columns]
+        yield headers
+        logger.debug(f"Headers: {headers}")
+        # column types are looked up by header, so they have to be known
+        validate_headers(headers)
+
+        dtypes = {
+            header.value: _NULLABLE_DTYPES.get(dtype, dtype)
+            for header, dtype in PORTFOLIO_DATA_DTYPES.items()
+            if dtype != "datetime64[ns]"
+        }
+        date_columns = [
+            header.value
+            for header, dtype in PORTFOLIO_DATA_DTYPES.items()
+            if dtype == "datetime64[ns]"
+        ]
+        usecols = self.columns
+        if usecols is not None:
+            dtypes = {key: value for key, value in dtypes.items() if key in usecols}
+            date_columns = [column for column in date_columns if column in usecols]
+
+        with pd.read_csv(
+            self.file_path,
+            header=0,
+            names=headers,
+            usecols=usecols,
+            dtype=dtypes,
+            parse_dates=date_columns,
+            compression=self.compression,
+            chunksize=self.chunk_size,
+        ) as reader:
+            while True:
+                try:
+                    df = reader.get_chunk(self.chunk_size)
+                except StopIteration:
+                    break
+
+                logger.debug(f"Read chunk of {len(df)} rows")
+                df.reset_index(drop=True, inplace=True)
+                self._restore_dtypes(df)
+                self._convert_numeric(df)
+                yield df
+
+        logger.debug("No more data to read")
+
+    @staticmethod
+    def _restore_dtypes(df: pd.DataFrame) -> None:
+        """Convert nullable columns to the dtypes of the Excel data feed."""
+
+        for column in df.select_dtypes(include=["Int64", "boolean"]).columns:
+            series = df[column]
+            if not series.hasnans:
+                df[column] = series.to_numpy(dtype=series.dtype.numpy_dtype)
+            elif series.dtype == "Int64":
+                df[column] = series.to_numpy(dtype="float64", na_value=np.nan)
+            else:
+                df[column] = series.to_numpy(dtype=object, na_value=np.nan)
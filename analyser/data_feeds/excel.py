@@ -1,22 +1,65 @@
+import itertools
 import logging
-from decimal import Decimal
 from typing import Iterator
 
+import openpyxl
 import pandas as pd
+from pandas.io.parsers import TextParser
 
-from analyser.interfaces import PortfolioDataFeed
+from analyser.data_feeds.base import PortfolioDataFeedBase
+from analyser.enums import NumericBackend
 
 logger = logging.getLogger(__name__)
 
 
-class PortfolioDataFeedExcel(PortfolioDataFeed):
-    def __init__(self, file_path: str, chunk_size: int = 1000):
+def _sheet_rows(rows: Iterator[tuple]) -> Iterator[tuple]:
+    """Return the rows of a sheet as `pd.read_excel` parses them.
+
+    Empty cells become empty strings, and the empty rows at the end of the
+    sheet, which openpyxl reports for formatted cells after the data, are
+    dropped. Empty rows between data rows are kept.
+    """
+
+    empty_rows = []
+    for row in rows:
+        if None in row:
+            row = tuple("" if value is None else value for value in row)
+        if not any(value != "" for value in row):
+            empty_rows.append(row)
+            continue
+
+        yield from empty_rows
+        empty_rows.clear()
+        yield row
+
+
+class PortfolioDataFeedExcel(PortfolioDataFeedBase):
+    variable_chunk_size = True
+
+    def __init__(
+        self,
+        file_path: str,
+        chunk_size: int = 1000,
+        streaming: bool = False,
+        numeric_backend: NumericBackend = NumericBackend.DECIMAL,
+    ):
+        super().__init__(numeric_backend)
+
         self.file_path = file_path
         self.chunk_size = chunk_size
+        self.streaming = streaming
 
     def get_data(self) -> Iterator[pd.DataFrame]:
         """Get the data for portfolio."""
 
+        if self.streaming:
+            yield from self._get_data_streaming()
+        else:
+            yield from self._get_data_chunked()
+
+    def _get_data_chunked(self) -> Iterator[pd.DataFrame]:
+        """Read the workbook chunk by chunk, re-opening it for every chunk."""
+
         first_row = pd.read_excel(self.file_path, nrows=0)
         headers = [self.normalize_header(header) for header in first_row.columns]
         yield headers
@@ -24,23 +67,59 @@ class PortfolioDataFeedExcel(PortfolioDataFeed):
         skip_rows = 1
 
         while True:
+            chunk_size = self.chunk_size
             logger.debug(f"Reading chunk from row {skip_rows}")
             df = pd.read_excel(
                 self.file_path,
                 skiprows=skip_rows,
                 header=None,
                 names=headers,
-                nrows=self.chunk_size,
+                nrows=chunk_size,
             )
 
             if df.empty:
                 break
 
-            # Convert all float values to Decimal
-            for col in df.select_dtypes(include=["float"]).columns:
-                df[col] = df[col].apply(Decimal)
-
-            skip_rows += self.chunk_size
+            df = self._project(df)
+            self._convert_numeric(df)
+            skip_rows += chunk_size
             yield df
 
         logger.debug("No more data to read")
+
+    def _get_data_streaming(self) -> Iterator[pd.DataFrame]:
+        """Read the workbook in a single forward pass.
+
+        The workbook is opened once in read-only mode and rows are parsed into
+        chunks as they are streamed, so only one chunk is held in memory.
+        """
+
+        workbook = openpyxl.load_workbook(
+            self.file_path, read_only=True, data_only=True
+        )
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            headers = [self.normalize_header(header) for header in next(rows, ())]
+            rows = _sheet_rows(rows)
+            yield headers
+            logger.debug(f"Headers: {headers}")
+            row_number = 1
+
+            while True:
+                logger.debug(f"Reading chunk from row {row_number}")
+                chunk_rows = list(itertools.islice(rows, self.chunk_size))
+
+                if not chunk_rows:
+                    break
+
+                # TextParser applies the same NA handling and type inference
+                # as pd.read_excel, so both modes produce identical frames.
+                df = TextParser(chunk_rows, header=None, names=headers).read()
+                df = self._project(df)
+                self._convert_numeric(df)
+                row_number += len(chunk_rows)
+                yield df
+        finally:
+            workbook.close()
+
+        logger.debug("No more data to read")
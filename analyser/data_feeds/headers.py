@@ -0,0 +1,254 @@
+"""Find portfolio data files and read their headers without loading their data.
+
+Excel and CSV headers are read with the standard library only, so header
+validation doesn't pay for importing pandas. Parquet and Arrow IPC headers
+are read from the file schema with pyarrow.
+"""
+
+import bz2
+import csv
+import glob
+import gzip
+import io
+import lzma
+import os
+import posixpath
+import zipfile
+from typing import Dict, Iterable, List, Optional
+from xml.etree import ElementTree
+
+from analyser.interfaces import normalize_header
+
+# data feed types by file extension
+FEED_EXTENSIONS = {
+    ".xlsx": "excel",
+    ".csv": "csv",
+    ".csv.gz": "csv",
+    ".csv.bz2": "csv",
+    ".csv.xz": "csv",
+    ".csv.zst": "csv",
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+}
+FEED_TYPES = ("excel", "csv", "parquet", "arrow")
+
+_SPREADSHEET_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_RELATIONSHIPS_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_DOCUMENT_RELATIONSHIPS_NS = (
+    "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+)
+
+_CSV_OPENERS = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+}
+
+
+def feed_type_for_file(file_path: str) -> str:
+    """Return the data feed type reading a file, chosen by its extension."""
+
+    name = file_path.lower()
+    for extension, feed_type in FEED_EXTENSIONS.items():
+        if name.endswith(extension):
+            return feed_type
+
+    raise ValueError(f"No data feed for file '{file_path}'")
+
+
+def find_input_files(inputs: Iterable[str]) -> List[str]:
+    """Expand directories and glob patterns to the input files they contain.
+
+    Only files with a supported extension are taken from directories.
+    """
+
+    file_paths = []
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            matches = [
+                file_path
+                for file_path in glob.glob(os.path.join(pattern, "*"))
+                if file_path.lower().endswith(tuple(FEED_EXTENSIONS))
+            ]
+        else:
+            matches = glob.glob(pattern)
+        for file_path in sorted(matches):
+            if os.path.isfile(file_path) and file_path not in file_paths:
+                file_paths.append(file_path)
+
+    return file_paths
+
+
+def read_headers(file_path: str, feed_type: Optional[str] = None) -> List[str]:
+    """Return the normalized headers of a file, as its data feed yields them."""
+
+    feed_type = feed_type or feed_type_for_file(file_path)
+    if feed_type == "excel":
+        raw_headers = _read_excel_headers(file_path)
+    elif feed_type == "csv":
+        raw_headers = _read_csv_headers(file_path)
+    elif feed_type in ("parquet", "arrow"):
+        raw_headers = _read_arrow_headers(file_path, feed_type)
+    else:
+        raise ValueError(f"Unknown data feed type '{feed_type}'")
+
+    return [normalize_header(header) for header in raw_headers]
+
+
+def _read_csv_headers(file_path: str) -> List[str]:
+    """Return the first record of a CSV file, decompressing it by extension."""
+
+    name = file_path.lower()
+    if name.endswith(".zst"):
+        import zstandard
+
+        binary_file = zstandard.open(file_path, "rb")
+    else:
+        opener = next(
+            (
+                opener
+                for extension, opener in _CSV_OPENERS.items()
+                if name.endswith(extension)
+            ),
+            open,
+        )
+        binary_file = opener(file_path, "rb")
+
+    with binary_file, io.TextIOWrapper(binary_file, encoding="utf-8-sig") as text:
+        return next(csv.reader(text), [])
+
+
+def _read_arrow_headers(file_path: str, feed_type: str) -> List[str]:
+    """Return the column names in the schema of a Parquet or Arrow IPC file."""
+
+    import pyarrow as pa
+
+    if feed_type == "parquet":
+        import pyarrow.parquet as pq
+
+        return pq.read_schema(file_path).names
+
+    with pa.memory_map(file_path) as source:
+        return pa.ipc.open_file(source).schema.names
+
+
+def _read_excel_headers(file_path: str) -> List[str]:
+    """Return the values of the first row of the first worksheet.
+
+    Only the workbook part, the start of the worksheet and the shared strings
+    used by the first row are parsed.
+    """
+
+    with zipfile.ZipFile(file_path) as workbook:
+        sheet_path, shared_strings_path = _workbook_parts(workbook)
+        cells = _first_row(workbook, sheet_path)
+
+        shared_indexes = {
+            int(value) for shared, value in cells.values() if shared and value
+        }
+        shared_strings = {}
+        if shared_indexes and shared_strings_path in workbook.namelist():
+            shared_strings = _shared_strings(
+                workbook, shared_strings_path, shared_indexes
+            )
+
+    headers = [""] * (max(cells) + 1 if cells else 0)
+    for column, (shared, value) in cells.items():
+        headers[column] = shared_strings.get(int(value), "") if shared else value
+
+    return headers
+
+
+def _workbook_parts(workbook: zipfile.ZipFile) -> tuple:
+    """Return the paths of the first worksheet and the shared strings."""
+
+    relationships = ElementTree.fromstring(workbook.read("xl/_rels/workbook.xml.rels"))
+    targets = {}
+    shared_strings_path = "xl/sharedStrings.xml"
+    for relationship in relationships.iter(f"{_RELATIONSHIPS_NS}Relationship"):
+        target = relationship.get("Target")
+        if target.startswith("/"):
+            target = target[1:]
+        else:
+            target = posixpath.normpath(posixpath.join("xl", target))
+        targets[relationship.get("Id")] = target
+        if relationship.get("Type", "").endswith("/sharedStrings"):
+            shared_strings_path = target
+
+    sheet = ElementTree.fromstring(workbook.read("xl/workbook.xml")).find(
+        f"{_SPREADSHEET_NS}sheets/{_SPREADSHEET_NS}sheet"
+    )
+    if sheet is None:
+        raise ValueError("Workbook has no worksheets")
+
+    return targets[sheet.get(f"{_DOCUMENT_RELATIONSHIPS_NS}id")], shared_strings_path
+
+
+def _first_row(workbook: zipfile.ZipFile, sheet_path: str) -> Dict[int, tuple]:
+    """Return the cells of the first row by column index, as (shared, value)."""
+
+    cells = {}
+    with workbook.open(sheet_path) as sheet:
+        for _, element in ElementTree.iterparse(sheet):
+            if element.tag == f"{_SPREADSHEET_NS}c":
+                column = _column_index(element.get("r"), len(cells))
+                if element.get("t") == "inlineStr":
+                    cells[column] = (False, _text(element.find(f"{_SPREADSHEET_NS}is")))
+                else:
+                    value = element.findtext(f"{_SPREADSHEET_NS}v", "")
+                    cells[column] = (element.get("t") == "s", value)
+            elif element.tag == f"{_SPREADSHEET_NS}row":
+                break
+
+    return cells
+
+
+def _shared_strings(
+    workbook: zipfile.ZipFile, shared_strings_path: str, indexes: set
+) -> Dict[int, str]:
+    """Return the shared strings at the indexes, parsing no further than needed."""
+
+    strings = {}
+    last_index = max(indexes)
+    index = 0
+    with workbook.open(shared_strings_path) as shared_strings:
+        for _, element in ElementTree.iterparse(shared_strings):
+            if element.tag != f"{_SPREADSHEET_NS}si":
+                continue
+            if index in indexes:
+                strings[index] = _text(element)
+            if index == last_index:
+                break
+            element.clear()
+            index += 1
+
+    return strings
+
+
+def _text(element: Optional[ElementTree.Element]) -> str:
+    """Return the text of a string item, joining rich text runs."""
+
+    if element is None:
+        return ""
+
+    return "".join(
+        text.text or ""
+        for run in [element, *element.iter(f"{_SPREADSHEET_NS}r")]
+        for text in run.findall(f"{_SPREADSHEET_NS}t")
+    )
+
+
+def _column_index(reference: Optional[str], default: int) -> int:
+    """Return the zero based column of a cell reference like "AB1"."""
+
+    if not reference:
+        return default
+
+    column = 0
+    for character in reference:
+        if not character.isalpha():
+            break
+        column = column * 26 + ord(character.upper()) - ord("A") + 1
+
+    return column - 1
@@ -36,3 +36,49 @@ class PortfolioDataHeader(str, Enum):
     SHARESOUT = "sharesout"
     MARKET_CAP = "market_cap"
     CAP_CLASS = "cap_class"
+
+
+# pandas dtypes of the portfolio data columns
+PORTFOLIO_DATA_DTYPES = {
+    PortfolioDataHeader.DATE: "datetime64[ns]",
+    PortfolioDataHeader.P_TICKER: "object",
+    PortfolioDataHeader.SHORT_NAME: "object",
+    PortfolioDataHeader.OPENING_WEIGHTS: "float64",
+    PortfolioDataHeader.OPEN_QUANTITY: "int64",
+    PortfolioDataHeader.CLOSE_QUANTITY: "int64",
+    PortfolioDataHeader.CLOSING_WEIGHTS: "float64",
+    PortfolioDataHeader.CURRENCY: "object",
+    PortfolioDataHeader.PRICE: "float64",
+    PortfolioDataHeader.EXCHANGE_RATE: "float64",
+    PortfolioDataHeader.VALUE_IN_USD: "float64",
+    PortfolioDataHeader.PRICE_YESTERDAY: "float64",
+    PortfolioDataHeader.STOCK_MOVEMENT: "float64",
+    PortfolioDataHeader.PERFORMANCE_CONTRIBUTION: "float64",
+    PortfolioDataHeader.TRADED_TODAY: "float64",
+    PortfolioDataHeader.TRADE_PRICE: "float64",
+    PortfolioDataHeader.TRADE_DAY_MOVE: "float64",
+    PortfolioDataHeader.TRADE_WEIGHT: "float64",
+    PortfolioDataHeader.RETURN_ADJUSTMENTS: "float64",
+    PortfolioDataHeader.TOTAL_RETURN: "float64",
+    PortfolioDataHeader.CALCULATED_NAV: "float64",
+    PortfolioDataHeader.NAV_YESTERDAY: "float64",
+    PortfolioDataHeader.COUNTRY: "object",
+    PortfolioDataHeader.SECTOR: "object",
+    PortfolioDataHeader.INDUSTRY: "object",
+    PortfolioDataHeader.SUB_IND: "object",
+    PortfolioDataHeader.IS_CURRENCY: "bool",
+    PortfolioDataHeader.CLOSE_WEIGHT_ABS: "float64",
+    PortfolioDataHeader.IS_FUTURE: "bool",
+    PortfolioDataHeader.SHORT_POS: "bool",
+    PortfolioDataHeader.DOLLAR_PNL: "float64",
+    PortfolioDataHeader.SHARESOUT: "float64",
+    PortfolioDataHeader.MARKET_CAP: "float64",
+    PortfolioDataHeader.CAP_CLASS: "object",
+}
+
+
+class NumericBackend(str, Enum):
+    """Representation of numeric columns in portfolio data."""
+
+    DECIMAL = "decimal"
+    FLOAT = "float"
@@ -0,0 +1,360 @@
+import logging
+import tempfile
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+import numpy as np
+import pandas as pd
+
+from analyser.errors import PortfolioErrorBase, PortfolioErrorBlock
+from analyser.interfaces import PortfolioError
+
+logger = logging.getLogger(__name__)
+
+# One error, packed into 28 bytes. Tickers, locations and error classes are
+# interned, dates are days since 1970-01-01 and values are fixed-point with
+# the 4 decimal places errors are reported with.
+ERROR_RECORD_DTYPE = np.dtype(
+    [
+        ("error_class", np.uint8),
+        ("location", np.uint16),
+        ("ticker", np.uint32),
+        ("date", np.int32),
+        ("flags", np.uint8),
+        ("value", np.int64),
+        ("correct_value", np.int64),
+    ]
+)
+
+VALUE_SCALE = 10_000
+_QUANTUM = Decimal("0.0001")
+# float64 represents every integer up to 2**53 exactly
+_MAX_EXACT_FLOAT = float(2**53)
+
+# Flags of values which are not plain fixed-point numbers. Special values
+# (missing, not finite, not numeric or out of range) are kept as they are.
+FLAG_VALUE_NEGATIVE_ZERO = 1
+FLAG_VALUE_SPECIAL = 2
+FLAG_CORRECT_VALUE_NEGATIVE_ZERO = 4
+FLAG_CORRECT_VALUE_SPECIAL = 8
+FLAG_NO_CORRECT_VALUE = 16
+FLAG_NO_DATE = 32
+
+
+def to_fixed_point(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Quantize values to 4 decimal places as scaled integers.
+
+    Values are rounded exactly like `PortfolioErrorBase._convert_decimal`:
+    float values are rounded in a vectorized way and only values close to a
+    rounding boundary are rounded through Decimal.
+
+    Returns the scaled values, a mask of negative zeros and a mask of special
+    values which can not be represented.
+    """
+
+    if values.dtype.kind in "fiu":
+        values = values.astype(np.float64)
+        with np.errstate(invalid="ignore", over="ignore"):
+            scaled = values * VALUE_SCALE
+            fixed = np.rint(scaled)
+            special = ~np.isfinite(scaled) | (np.abs(scaled) >= _MAX_EXACT_FLOAT)
+            # the scaled float may be off by a rounding error of the multiplication
+            fraction = np.abs(scaled - np.floor(scaled) - 0.5)
+            ambiguous = ~special & (fraction <= np.abs(scaled) * 1e-15 + 1e-9)
+        fixed[special] = 0
+        fixed = fixed.astype(np.int64)
+        negative_zero = ~special & (fixed == 0) & np.signbit(values)
+
+        for index in np.flatnonzero(ambiguous):
+            fixed[index], negative_zero[index], _ = _decimal_to_fixed_point(
+                Decimal(float(values[index]))
+            )
+        return fixed, negative_zero, special
+
+    fixed = np.zeros(len(values), dtype=np.int64)
+    negative_zero = np.zeros(len(values), dtype=bool)
+    special = np.zeros(len(values), dtype=bool)
+    for index, value in enumerate(values):
+        if isinstance(value, (int, np.integer)) and not isinstance(value, bool):
+            value = Decimal(int(value))
+        elif isinstance(value, (float, np.floating)):
+            value = Decimal(float(value))
+
+        if isinstance(value, Decimal):
+            fixed[index], negative_zero[index], special[index] = (
+                _decimal_to_fixed_point(value)
+            )
+        else:
+            special[index] = True
+
+    return fixed, negative_zero, special
+
+
+def from_fixed_point(value: int, negative_zero: bool = False) -> Decimal:
+    """Convert a scaled integer back to a Decimal with 4 decimal places."""
+
+    if negative_zero:
+        return Decimal("-0.0000")
+
+    return Decimal(int(value)).scaleb(-4)
+
+
+def to_decimals(values: np.ndarray) -> np.ndarray:
+    """Quantize values to Decimals with 4 decimal places.
+
+    Returns the same Decimals as `PortfolioErrorBase._convert_decimal`, but
+    float values are quantized in a vectorized way first, which is several
+    times faster for large blocks.
+    """
+
+    fixed, negative_zero, special = to_fixed_point(values)
+    decimals = np.empty(len(fixed), dtype=object)
+    decimals[:] = [
+        from_fixed_point(value, is_negative_zero)
+        for value, is_negative_zero in zip(fixed.tolist(), negative_zero.tolist())
+    ]
+    for index in np.flatnonzero(special):
+        decimals[index] = PortfolioErrorBase._convert_decimal(values[index])
+
+    return decimals
+
+
+def _decimal_to_fixed_point(value: Decimal) -> Tuple[int, bool, bool]:
+    if not value.is_finite():
+        return 0, False, True
+
+    quantized = value.quantize(_QUANTUM)
+    fixed = int(quantized.scaleb(4))
+    if not -(2**63) < fixed < 2**63:
+        return 0, False, True
+
+    return fixed, fixed == 0 and quantized.is_signed(), False
+
+
+class PortfolioErrorStore:
+    """Compact columnar store of errors.
+
+    Errors are packed into arrays of fixed-size records (`ERROR_RECORD_DTYPE`)
+    instead of being kept as objects. Once the records in memory take more
+    than `memory_threshold` bytes, they are spilled to a temporary file, so
+    millions of errors can be kept with little memory. Errors are returned in
+    the order they were added, as error blocks which only build descriptions
+    when they are exported.
+    """
+
+    def __init__(self, memory_threshold: int = 64 << 20, read_size: int = 65536):
+        self.memory_threshold = memory_threshold
+        self.read_size = read_size
+
+        self._error_classes: List[Type[PortfolioErrorBase]] = []
+        self._locations: List[str] = []
+        self._tickers: List[Any] = []
+        self._ids: Dict[tuple, int] = {}
+        # values which could not be packed, by record number and field
+        self._special: Dict[Tuple[int, str], Any] = {}
+
+        self._records: List[np.ndarray] = []
+        self._memory_size = 0
+        self._spill_file = None
+        self._spilled = 0
+
+    def __len__(self) -> int:
+        return self._spilled + sum(len(records) for records in self._records)
+
+    @property
+    def spilled(self) -> int:
+        """Return the number of errors spilled to disk."""
+
+        return self._spilled
+
+    def add_block(self, error_block: PortfolioErrorBlock) -> None:
+        """Pack the errors of a block and add them to the store."""
+
+        count = len(error_block)
+        if not count:
+            return
+
+        records = np.zeros(count, dtype=ERROR_RECORD_DTYPE)
+        records["error_class"] = self._intern(
+            "error_class", error_block.error_class, self._error_classes
+        )
+        records["location"] = self._intern(
+            "location", error_block.location, self._locations
+        )
+        codes, _ = pd.factorize(error_block.tickers, use_na_sentinel=False)
+        # factorize returns missing tickers as NaN, the first of every ticker is
+        # interned as it was given
+        _, first_positions = np.unique(codes, return_index=True)
+        ticker_ids = [
+            self._intern("ticker", error_block.tickers[position], self._tickers)
+            for position in first_positions
+        ]
+        records["ticker"] = np.asarray(ticker_ids, dtype=np.uint32)[codes]
+
+        dates = pd.to_datetime(pd.Series(error_block.dates), errors="coerce")
+        no_date = dates.isna().to_numpy()
+        records["date"] = np.where(
+            no_date, 0, dates.to_numpy().astype("datetime64[D]").astype(np.int64)
+        )
+        flags = np.where(no_date, FLAG_NO_DATE, 0)
+
+        first_record = len(self)
+        for index in np.flatnonzero(no_date):
+            self._special[first_record + index, "date"] = error_block.dates[index]
+        fixed, negative_zero, special = to_fixed_point(np.asarray(error_block.values))
+        records["value"] = fixed
+        flags |= np.where(negative_zero, FLAG_VALUE_NEGATIVE_ZERO, 0)
+        flags |= np.where(special, FLAG_VALUE_SPECIAL, 0)
+        for index in np.flatnonzero(special):
+            self._special[first_record + index, "value"] = error_block.values[index]
+
+        if error_block.correct_values is None:
+            flags |= FLAG_NO_CORRECT_VALUE
+        else:
+            correct_values = np.asarray(error_block.correct_values)
+            fixed, negative_zero, special = to_fixed_point(correct_values)
+            records["correct_value"] = fixed
+            flags |= np.where(negative_zero, FLAG_CORRECT_VALUE_NEGATIVE_ZERO, 0)
+            flags |= np.where(special, FLAG_CORRECT_VALUE_SPECIAL, 0)
+            for index in np.flatnonzero(special):
+                self._special[first_record + index, "correct_value"] = correct_values[
+                    index
+                ]
+
+        records["flags"] = flags
+        self._records.append(records)
+        self._memory_size += records.nbytes
+        if self._memory_size > self.memory_threshold:
+            self._spill()
+
+    def add_blocks(self, error_blocks: Iterable[PortfolioErrorBlock]) -> None:
+        for error_block in error_blocks:
+            self.add_block(error_block)
+
+    def blocks(self) -> Iterator[PortfolioErrorBlock]:
+        """Return the errors as error blocks, in the order they were added."""
+
+        tickers = np.empty(len(self._tickers), dtype=object)
+        tickers[:] = self._tickers
+
+        record_number = 0
+        for records in self._iterate_records():
+            # a block for every run of errors of the same kind and location
+            kinds = records["error_class"].astype(np.uint32) << 16
+            kinds |= records["location"]
+            kinds |= (records["flags"] & FLAG_NO_CORRECT_VALUE).astype(np.uint32) << 24
+            starts = np.flatnonzero(np.diff(kinds, prepend=kinds[0] ^ 1))
+            ends = np.append(starts[1:], len(records))
+            for start, end in zip(starts, ends):
+                yield self._unpack(records[start:end], record_number + start, tickers)
+            record_number += len(records)
+
+    def __iter__(self) -> Iterator[PortfolioError]:
+        """Build the error objects of all errors."""
+
+        for error_block in self.blocks():
+            yield from error_block
+
+    def close(self) -> None:
+        """Remove the spill file."""
+
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
+    def __enter__(self) -> "PortfolioErrorStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _intern(self, kind: str, value: Any, values: List[Any]) -> int:
+        """Return the id of a ticker, location or error class."""
+
+        key = (kind, value)
+        value_id = self._ids.get(key)
+        if value_id is None:
+            value_id = self._ids[key] = len(values)
+            values.append(value)
+
+        return value_id
+
+    def _spill(self) -> None:
+        """Move the records in memory to the spill file."""
+
+        if self._spill_file is None:
+            self._spill_file = tempfile.TemporaryFile(prefix="portfolio-errors-")
+
+        self._spill_file.seek(0, 2)
+        for records in self._records:
+            self._spill_file.write(records.tobytes())
+            self._spilled += len(records)
+        logger.debug(f"Spilled {self._memory_size} bytes of errors to disk")
+
+        self._records = []
+        self._memory_size = 0
+
+    def _iterate_records(self) -> Iterator[np.ndarray]:
+        """Read the spilled records in batches, then the records in memory."""
+
+        record_size = ERROR_RECORD_DTYPE.itemsize
+        for start in range(0, self._spilled, self.read_size):
+            count = min(self.read_size, self._spilled - start)
+            self._spill_file.seek(start * record_size)
+            yield np.frombuffer(
+                self._spill_file.read(count * record_size), dtype=ERROR_RECORD_DTYPE
+            )
+
+        yield from self._records
+
+    def _unpack(
+        self, records: np.ndarray, first_record: int, tickers: np.ndarray
+    ) -> PortfolioErrorBlock:
+        """Build an error block from records of the same kind and location."""
+
+        flags = records["flags"]
+        dates = records["date"].astype("datetime64[D]").astype(object)
+        for index in np.flatnonzero(flags & FLAG_NO_DATE):
+            dates[index] = self._special[first_record + index, "date"]
+
+        correct_values = None
+        if not flags[0] & FLAG_NO_CORRECT_VALUE:
+            correct_values = self._unpack_values(
+                records,
+                first_record,
+                "correct_value",
+                FLAG_CORRECT_VALUE_NEGATIVE_ZERO,
+                FLAG_CORRECT_VALUE_SPECIAL,
+            )
+
+        return PortfolioErrorBlock(
+            error_class=self._error_classes[records["error_class"][0]],
+            location=self._locations[records["location"][0]],
+            tickers=tickers[records["ticker"]],
+            dates=dates,
+            values=self._unpack_values(
+                records,
+                first_record,
+                "value",
+                FLAG_VALUE_NEGATIVE_ZERO,
+                FLAG_VALUE_SPECIAL,
+            ),
+            correct_values=correct_values,
+        )
+
+    def _unpack_values(
+        self,
+        records: np.ndarray,
+        first_record: int,
+        field: str,
+        negative_zero_flag: int,
+        special_flag: int,
+    ) -> np.ndarray:
+        values = np.empty(len(records), dtype=object)
+        for index, (value, flags) in enumerate(zip(records[field], records["flags"])):
+            if flags & special_flag:
+                values[index] = self._special[first_record + index, field]
+            else:
+                values[index] = from_fixed_point(value, flags & negative_zero_flag)
+
+        return values
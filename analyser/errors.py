@@ -1,43 +1,101 @@
+import numbers
+from abc import abstractmethod
+from dataclasses import dataclass
 from datetime import date
 from decimal import Decimal
-from typing import Any
+from typing import Any, Iterator, Optional, Type, Union
 
+import numpy as np
+import pandas as pd
+
+from analyser.enums import PortfolioDataHeader
 from analyser.interfaces import PortfolioError, PortfolioErrorContext
+from analyser.reconcilers.context import PortfolioReconciliationContext
+
+# errors are reported with 4 decimal places
+_QUANTUM = Decimal("0.0001")
+_FLOAT_TYPES = (float, np.float64)
 
 
 class PortfolioErrorBase(PortfolioError):
-    """Base class for portfolio errors."""
+    """Base class for portfolio errors.
+
+    Error blocks describe errors with the `_describe` class method of their
+    error class, without creating error objects. Subclasses must therefore
+    implement it when they are defined, unless they declare it abstract again.
+    """
 
     error_code: str = "ERR_UNKNOWN"
 
-    def __init__(self, ticker: str, date: date, location: str, value: Any):
-        if isinstance(value, Decimal):
-            value_converted = self._convert_decimal(value)
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        if "_describe" not in cls.__dict__ and getattr(
+            cls._describe, "__isabstractmethod__", False
+        ):
+            raise TypeError(f"{cls.__name__} must implement _describe")
 
+    def __init__(self, ticker: str, date: date, location: str, value: Any):
         self._context = PortfolioErrorContext(
             ticker=ticker,
             date=date,
             location=location,
-            value=value_converted,
+            value=self._convert_decimal(value),
         )
 
+    def describe(self) -> str:
+        """Describe the error."""
+
+        return self._describe(self._context)
+
     def to_dict(self) -> dict:
         """Convert error to dictionary."""
 
-        context_data = self._context.__dict__
+        return self._build_dict(self._context)
+
+    @classmethod
+    @abstractmethod
+    def _describe(cls, context: PortfolioErrorContext, **extra: Any) -> str:
+        """Describe an error from its context and extra fields."""
+
+        ...
+
+    @classmethod
+    def _build_dict(cls, context: PortfolioErrorContext, **extra: Any) -> dict:
+        """Build the dictionary of an error from its context and extra fields."""
+
+        context_data = context.__dict__
         error_data = {
-            "error_code": self.error_code,
-            "description": self.describe(),
+            "error_code": cls.error_code,
+            "description": cls._describe(context, **extra),
             "context": context_data,
         }
+        error_data.update(extra)
 
         return error_data
 
     @staticmethod
-    def _convert_decimal(value: Decimal) -> Decimal:
-        """Convert Decimal 4 precision for better readability."""
+    def _convert_decimal(value: Any) -> Any:
+        """Convert Decimal 4 precision for better readability.
+
+        Integer and float values are converted to Decimal first, so errors are
+        reported the same way regardless of the numeric backend of the data.
+        """
 
-        return value.quantize(Decimal("0.0001"))
+        # exact type checks first, they are much cheaper than the ABC checks
+        value_type = type(value)
+        if value_type in _FLOAT_TYPES:
+            value = Decimal(float(value))
+        elif value_type is not Decimal:
+            if isinstance(value, numbers.Integral):
+                value = Decimal(int(value))
+            elif isinstance(value, numbers.Real):
+                value = Decimal(float(value))
+
+            if not isinstance(value, Decimal):
+                return value
+
+        return value.quantize(_QUANTUM)
 
 
 class PortfolioErrorHighVolatility(PortfolioErrorBase):
@@ -45,10 +103,11 @@ class PortfolioErrorHighVolatility(PortfolioErrorBase):
 
     error_code = "ERR_HIGH_VOLATILITY"
 
-    def describe(self) -> str:
+    @classmethod
+    def _describe(cls, context: PortfolioErrorContext) -> str:
         """Describe the error."""
 
-        return f"High volatility detected on date '{self._context.date}'."
+        return f"High volatility detected on date '{context.date}'."
 
 
 class PortfolioErrorCalculation(PortfolioErrorBase):
@@ -66,22 +125,122 @@ class PortfolioErrorCalculation(PortfolioErrorBase):
     def to_dict(self):
         """Convert error to dictionary."""
 
-        data = super().to_dict()
-        data.update(correct_value=self.correct_value)
-
-        return data
+        return self._build_dict(self._context, correct_value=self.correct_value)
 
     def describe(self) -> str:
         """Describe the error."""
 
-        if self._context.value > self.correct_value:
+        return self._describe(self._context, correct_value=self.correct_value)
+
+    @classmethod
+    def _describe(cls, context: PortfolioErrorContext, correct_value: Any) -> str:
+        """Describe the error."""
+
+        if context.value > correct_value:
             description = "Value is greater than expected"
         else:
             description = "Value is less than expected"
 
-        difference = self._convert_decimal(
-            abs(self._context.value - self.correct_value)
-        )
+        difference = cls._convert_decimal(abs(context.value - correct_value))
         description += f" by amount '{difference}'."
 
         return description
+
+
+@dataclass
+class PortfolioErrorBlock:
+    """Columnar block of errors of one kind reported for one location.
+
+    Each array holds one entry per error. Error objects and their dictionaries
+    are only built when the block is iterated or exported.
+    """
+
+    error_class: Type[PortfolioErrorBase]
+    location: str
+    tickers: np.ndarray
+    dates: np.ndarray
+    values: np.ndarray
+    correct_values: Optional[np.ndarray] = None
+    # positions of the rows the errors were reported for, within their chunk
+    rows: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_frame(
+        cls,
+        data: Union[pd.DataFrame, PortfolioReconciliationContext],
+        mask: Union[pd.Series, np.ndarray],
+        error_class: Type[PortfolioErrorBase],
+        location: str,
+        value_column: str,
+        correct_values: Optional[Union[pd.Series, np.ndarray]] = None,
+    ) -> "PortfolioErrorBlock":
+        """Build a block from the masked rows of portfolio data.
+
+        Only the masked values of the columns are copied. `correct_values` are
+        aligned with the rows of the data by position.
+        """
+
+        mask = np.asarray(mask, dtype=bool)
+        dates = data[PortfolioDataHeader.DATE.value][mask]
+
+        if correct_values is not None:
+            correct_values = np.asarray(correct_values)[mask]
+
+        return cls(
+            error_class=error_class,
+            location=location,
+            tickers=data[PortfolioDataHeader.P_TICKER.value].to_numpy()[mask],
+            dates=dates.dt.date.to_numpy(),
+            values=data[value_column].to_numpy()[mask],
+            correct_values=correct_values,
+            rows=np.flatnonzero(mask),
+        )
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def __iter__(self) -> Iterator[PortfolioError]:
+        """Build the error objects of the block."""
+
+        for ticker, date, value, extra in self._rows():
+            yield self.error_class(
+                ticker=ticker, date=date, location=self.location, value=value, **extra
+            )
+
+    def to_dicts(self) -> Iterator[dict]:
+        """Convert errors to dictionaries without building error objects."""
+
+        for context, extra in self._contexts():
+            yield self.error_class._build_dict(context, **extra)
+
+    def descriptions(self) -> Iterator[str]:
+        """Describe the errors without building error objects."""
+
+        for context, extra in self._contexts():
+            yield self.error_class._describe(context, **extra)
+
+    def _contexts(self) -> Iterator[tuple]:
+        """Iterate over the context and converted extra fields of every error."""
+
+        convert_decimal = self.error_class._convert_decimal
+        for ticker, date, value, extra in self._rows():
+            context = PortfolioErrorContext(
+                ticker=ticker,
+                date=date,
+                location=self.location,
+                value=convert_decimal(value),
+            )
+            extra = {key: convert_decimal(value) for key, value in extra.items()}
+            yield context, extra
+
+    def _rows(self) -> Iterator[tuple]:
+        """Iterate over ticker, date, value and extra fields of every error."""
+
+        if self.correct_values is None:
+            for ticker, date, value in zip(self.tickers, self.dates, self.values):
+                yield ticker, date, value, {}
+        else:
+            for ticker, date, value, correct_value in zip(
+                self.tickers, self.dates, self.values, self.correct_values
+            ):
+                yield ticker, date, value, {"correct_value": correct_value}
@@ -0,0 +1,288 @@
+import logging
+from abc import abstractmethod
+from decimal import Decimal, InvalidOperation
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from analyser.error_store import to_fixed_point
+from analyser.errors import PortfolioErrorBase, PortfolioErrorBlock
+from analyser.interfaces import PortfolioError, PortfolioErrorExporter
+
+logger = logging.getLogger(__name__)
+
+# Values are reported with 4 decimal places
+VALUE_TYPE = pa.decimal128(38, 4)
+
+PORTFOLIO_ERROR_SCHEMA = pa.schema(
+    [
+        ("error_code", pa.dictionary(pa.int32(), pa.string())),
+        ("ticker", pa.dictionary(pa.int32(), pa.string())),
+        ("date", pa.date32()),
+        ("location", pa.dictionary(pa.int32(), pa.string())),
+        ("value", VALUE_TYPE),
+        ("correct_value", VALUE_TYPE),
+        ("description", pa.string()),
+    ]
+)
+
+# columns stored as indices into a dictionary of their distinct values
+DICTIONARY_COLUMNS = ("error_code", "ticker", "location")
+
+
+def _decimal_array(values: np.ndarray) -> pa.Array:
+    """Convert values to a decimal array, with nulls for missing values.
+
+    Values are quantized like in error descriptions and the scaled integers
+    are used as the decimal storage directly, without building a Decimal
+    object for every value. Values out of the range of the scaled integers
+    are converted to Decimal one by one, and only values which are missing,
+    not numeric or not finite are nulls.
+    """
+
+    fixed, _, special = to_fixed_point(values)
+    # 128-bit little endian two's complement integers
+    storage = np.empty((len(fixed), 2), dtype="<i8")
+    storage[:, 0] = fixed
+    storage[:, 1] = fixed >> 63
+    valid = ~special
+    storage_bytes = storage.view(np.uint8).reshape(len(fixed), 16)
+    for index in np.flatnonzero(special):
+        scaled = _scaled_decimal(values[index])
+        if scaled is not None:
+            storage_bytes[index] = np.frombuffer(
+                scaled.to_bytes(16, "little", signed=True), dtype=np.uint8
+            )
+            valid[index] = True
+
+    validity = None
+    if not valid.all():
+        validity = pa.py_buffer(np.packbits(valid, bitorder="little"))
+
+    return pa.Array.from_buffers(
+        VALUE_TYPE,
+        len(fixed),
+        [validity, pa.py_buffer(storage.tobytes())],
+        null_count=int((~valid).sum()),
+    )
+
+
+def _scaled_decimal(value) -> Optional[int]:
+    """Return a value quantized to 4 decimal places as a scaled integer, or None
+    if it is not a finite number of at most `VALUE_TYPE.precision` digits."""
+
+    try:
+        value = PortfolioErrorBase._convert_decimal(value)
+    except InvalidOperation:
+        return None
+    if not isinstance(value, Decimal) or not value.is_finite():
+        return None
+
+    scaled = int(value.scaleb(VALUE_TYPE.scale))
+    if abs(scaled) >= 10**VALUE_TYPE.precision:
+        return None
+
+    return scaled
+
+
+class PortfolioErrorExporterArrowBase(PortfolioErrorExporter):
+    """Base class for exporters writing errors as Arrow tables.
+
+    Errors are written in tables of `chunk_size` rows with the
+    `PORTFOLIO_ERROR_SCHEMA`. Error codes, tickers and locations are
+    dictionary encoded with one dictionary for the whole file, which only
+    grows as new values are seen.
+    """
+
+    def __init__(
+        self,
+        output_file: Union[str, BinaryIO],
+        chunk_size: int = 100000,
+        compression: str = "zstd",
+    ):
+        self.output_file = output_file
+        self.chunk_size = chunk_size
+        self.compression = compression
+
+        self._dictionaries: Dict[str, Dict[str, int]] = {
+            column: {} for column in DICTIONARY_COLUMNS
+        }
+
+    def export(self, errors: Iterable[PortfolioError]):
+        """Export the errors."""
+
+        self._export_columns(self._error_columns(errors))
+
+    def export_blocks(self, blocks: Iterable[PortfolioErrorBlock]):
+        """Export the errors given in columnar blocks."""
+
+        self._export_columns(self._block_columns(block) for block in blocks)
+
+    @abstractmethod
+    def _open_writer(self):
+        """Return a writer with a `write_table` method, used as context manager."""
+
+        ...
+
+    def _export_columns(self, columns: Iterable[Dict[str, np.ndarray]]):
+        """Write batches of columns in tables of `chunk_size` rows."""
+
+        logger.info(f"Exporting errors to {type(self).__name__}")
+        error_counter = 0
+        pending: List[Dict[str, np.ndarray]] = []
+        pending_rows = 0
+
+        with self._open_writer() as writer:
+            for batch in columns:
+                pending.append(batch)
+                pending_rows += len(batch["error_code"])
+
+                while pending_rows >= self.chunk_size:
+                    chunk = self._concatenate(pending)
+                    writer.write_table(
+                        self._table(
+                            {
+                                name: values[: self.chunk_size]
+                                for name, values in chunk.items()
+                            }
+                        )
+                    )
+                    pending = [
+                        {
+                            name: values[self.chunk_size :]
+                            for name, values in chunk.items()
+                        }
+                    ]
+                    pending_rows -= self.chunk_size
+                    error_counter += self.chunk_size
+                    logger.debug(f"Exported {error_counter} errors")
+
+            if pending_rows:
+                writer.write_table(self._table(self._concatenate(pending)))
+                error_counter += pending_rows
+
+        logger.info("Detected %d errors in total", error_counter)
+        logger.info(f"Errors exported to {type(self).__name__}")
+
+    def _block_columns(self, block: PortfolioErrorBlock) -> Dict[str, np.ndarray]:
+        """Return the columns of the errors of a block."""
+
+        count = len(block)
+        correct_values = block.correct_values
+        if correct_values is None:
+            correct_values = np.full(count, None, dtype=object)
+
+        return {
+            "error_code": np.full(count, block.error_class.error_code, dtype=object),
+            "ticker": np.asarray(block.tickers, dtype=object),
+            "date": np.asarray(block.dates, dtype=object),
+            "location": np.full(count, block.location, dtype=object),
+            "value": np.asarray(block.values),
+            "correct_value": np.asarray(correct_values),
+            "description": np.fromiter(block.descriptions(), dtype=object, count=count),
+        }
+
+    def _error_columns(
+        self, errors: Iterable[PortfolioError]
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        """Return the columns of error objects, `chunk_size` errors at a time."""
+
+        rows = []
+        for error in errors:
+            error_data = error.to_dict()
+            context = error_data["context"]
+            rows.append(
+                (
+                    error_data["error_code"],
+                    context["ticker"],
+                    context["date"],
+                    context["location"],
+                    context["value"],
+                    error_data.get("correct_value"),
+                    error_data["description"],
+                )
+            )
+            if len(rows) == self.chunk_size:
+                yield self._rows_to_columns(rows)
+                rows = []
+
+        if rows:
+            yield self._rows_to_columns(rows)
+
+    @staticmethod
+    def _rows_to_columns(rows: List[tuple]) -> Dict[str, np.ndarray]:
+        columns = {}
+        for name, values in zip(PORTFOLIO_ERROR_SCHEMA.names, zip(*rows)):
+            columns[name] = np.empty(len(values), dtype=object)
+            columns[name][:] = values
+
+        return columns
+
+    @staticmethod
+    def _concatenate(batches: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+        if len(batches) == 1:
+            return batches[0]
+
+        return {
+            name: np.concatenate([batch[name] for batch in batches])
+            for name in PORTFOLIO_ERROR_SCHEMA.names
+        }
+
+    def _table(self, columns: Dict[str, np.ndarray]) -> pa.Table:
+        """Convert columns of errors to a table of the error schema."""
+
+        arrays = [
+            self._dictionary_array("error_code", columns["error_code"]),
+            self._dictionary_array("ticker", columns["ticker"]),
+            pa.array(columns["date"], type=pa.date32(), from_pandas=True),
+            self._dictionary_array("location", columns["location"]),
+            _decimal_array(columns["value"]),
+            _decimal_array(columns["correct_value"]),
+            pa.array(columns["description"], type=pa.string()),
+        ]
+
+        return pa.Table.from_arrays(arrays, schema=PORTFOLIO_ERROR_SCHEMA)
+
+    def _dictionary_array(self, name: str, values: np.ndarray) -> pa.DictionaryArray:
+        """Encode values as indices into the dictionary of the column."""
+
+        dictionary = self._dictionaries[name]
+        codes, uniques = pd.factorize(values)
+        ids = [dictionary.setdefault(str(value), len(dictionary)) for value in uniques]
+        # missing values have code -1, which picks the last, unused id
+        ids = np.array(ids + [0], dtype=np.int32)
+        indices = pa.array(ids[codes], mask=codes < 0, type=pa.int32())
+
+        return pa.DictionaryArray.from_arrays(
+            indices, pa.array(list(dictionary), type=pa.string())
+        )
+
+
+class PortfolioErrorExporterParquet(PortfolioErrorExporterArrowBase):
+    """Export portfolio errors to a Parquet file, one row group per chunk."""
+
+    def _open_writer(self) -> pq.ParquetWriter:
+        return pq.ParquetWriter(
+            self.output_file,
+            PORTFOLIO_ERROR_SCHEMA,
+            compression=self.compression,
+        )
+
+
+class PortfolioErrorExporterArrowIPC(PortfolioErrorExporterArrowBase):
+    """Export portfolio errors to an Arrow IPC file, one record batch per chunk.
+
+    New tickers are written as dictionary deltas.
+    """
+
+    def _open_writer(self) -> pa.ipc.RecordBatchFileWriter:
+        options = pa.ipc.IpcWriteOptions(
+            compression=self.compression, emit_dictionary_deltas=True
+        )
+
+        return pa.ipc.new_file(
+            self.output_file, PORTFOLIO_ERROR_SCHEMA, options=options
+        )
@@ -3,11 +3,17 @@ import json
 import logging
 from datetime import date
 from decimal import Decimal
-from typing import Iterable
+from typing import Iterable, Sequence
 
+from analyser.errors import PortfolioErrorBlock
 from analyser.interfaces import PortfolioError, PortfolioErrorExporter
 from analyser.utils import chunked_iterable
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,27 +28,100 @@ class PortfolioErrorEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
+def _orjson_default(obj):
+    """Serialize types orjson does not support natively."""
+
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError
+
+
+_encoder = PortfolioErrorEncoder()
+
+
+def encode_errors(error_chunk: Sequence[dict], use_orjson: bool = False) -> str:
+    """Serialize errors converted to dictionaries to JSON lines.
+
+    With `use_orjson`, orjson must be installed.
+    """
+
+    if use_orjson:
+        encoded = b"\n".join(
+            orjson.dumps(error_data, default=_orjson_default)
+            for error_data in error_chunk
+        )
+        return encoded.decode() + "\n"
+
+    encode = _encoder.encode
+    return "".join([f"{encode(error_data)}\n" for error_data in error_chunk])
+
+
+def encode_blocks(
+    blocks: Iterable[PortfolioErrorBlock], use_orjson: bool = False
+) -> str:
+    """Serialize the errors of blocks to JSON lines without writing them."""
+
+    error_chunk = [error_data for block in blocks for error_data in block.to_dicts()]
+    if not error_chunk:
+        return ""
+
+    return encode_errors(error_chunk, use_orjson)
+
+
 class PortfolioErrorExporterJSON(PortfolioErrorExporter):
-    """Export portfolio errors to JSON."""
+    """Export portfolio errors to JSON.
+
+    In batched mode every chunk of errors is serialized into one buffer and
+    written with a single call. With `fast_encoder`, orjson is used for
+    batched serialization when it is installed; its output is compact JSON
+    without spaces after separators.
+    """
 
-    def __init__(self, output_file: io.TextIOWrapper, chunk_size: int = 1000):
+    def __init__(
+        self,
+        output_file: io.TextIOWrapper,
+        chunk_size: int = 1000,
+        batched: bool = False,
+        fast_encoder: bool = False,
+    ):
         self.output_file = output_file
         self.chunk_size = chunk_size
+        self.batched = batched
+        self.use_orjson = batched and fast_encoder and orjson is not None
+
+        if batched and fast_encoder and orjson is None:
+            logger.warning("orjson is not installed, using the standard encoder")
 
     def export(self, errors: Iterable[PortfolioError]):
         """Export the errors."""
 
+        self._export_dicts(error.to_dict() for error in errors)
+
+    def export_blocks(self, blocks: Iterable[PortfolioErrorBlock]):
+        """Export the errors given in columnar blocks."""
+
+        self._export_dicts(
+            error_data for block in blocks for error_data in block.to_dicts()
+        )
+
+    def _export_dicts(self, errors: Iterable[dict]):
+        """Export the errors converted to dictionaries."""
+
         logger.info("Exporting errors to JSON")
         chunk_start = 0
         error_counter = 0
 
         for error_chunk in chunked_iterable(errors, self.chunk_size):
-            for error in error_chunk:
-                self.output_file.write(
-                    json.dumps(error.to_dict(), cls=PortfolioErrorEncoder)
-                )
-                self.output_file.write("\n")
-                error_counter += 1
+            if self.batched:
+                self.output_file.write(encode_errors(error_chunk, self.use_orjson))
+                error_counter += len(error_chunk)
+            else:
+                for error_data in error_chunk:
+                    self.output_file.write(
+                        json.dumps(error_data, cls=PortfolioErrorEncoder)
+                    )
+                    self.output_file.write("\n")
+                    error_counter += 1
 
             chunk_start += self.chunk_size
             logger.debug(f"Exported errors from {chunk_start} rows")
@@ -0,0 +1,208 @@
+import dataclasses
+import datetime
+import itertools
+import logging
+import sqlite3
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from analyser.error_store import to_decimals
+from analyser.errors import PortfolioErrorBlock
+from analyser.interfaces import PortfolioError, PortfolioErrorExporter
+from analyser.utils import chunked_iterable
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    reference TEXT NOT NULL UNIQUE,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    errors INTEGER
+);
+CREATE TABLE IF NOT EXISTS errors (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    error_code TEXT NOT NULL,
+    ticker TEXT,
+    date TEXT,
+    location TEXT NOT NULL,
+    value TEXT,
+    correct_value TEXT,
+    description TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS errors_run_ticker ON errors (run_id, ticker);
+CREATE INDEX IF NOT EXISTS errors_run_error_code ON errors (run_id, error_code);
+CREATE INDEX IF NOT EXISTS errors_run_date ON errors (run_id, date);
+"""
+
+INSERT_ERROR = "INSERT INTO errors VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+
+
+def _to_text(value: Any) -> Optional[str]:
+    """Convert a value to text, as it is written to JSON."""
+
+    if value is None:
+        return None
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return str(value)
+
+
+def _now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+class PortfolioErrorExporterSQLite(PortfolioErrorExporter):
+    """Export portfolio errors to a SQLite database.
+
+    Every export is recorded as a run tagged with `reference`, and its errors
+    are inserted with `executemany`, one transaction per chunk. The database
+    is kept in WAL mode, so it can be queried while errors are exported.
+    Dates are ISO strings and values are decimal strings, exactly as in the
+    JSON export.
+
+    Automatic checkpoints are replaced by a passive checkpoint every
+    `checkpoint_interval` chunks, which writes index pages changed by several
+    chunks back at once while keeping the WAL (and the time readers spend
+    searching it) bounded.
+    """
+
+    def __init__(
+        self,
+        database_path: str,
+        reference: str,
+        chunk_size: int = 10000,
+        cache_size: int = 64 << 20,
+        checkpoint_interval: int = 10,
+    ):
+        self.database_path = database_path
+        self.reference = reference
+        self.chunk_size = chunk_size
+        self.cache_size = cache_size
+        self.checkpoint_interval = checkpoint_interval
+
+    def export(self, errors: Iterable[PortfolioError]):
+        """Export the errors."""
+
+        self._export_rows(
+            lambda run_id: (self._dict_row(run_id, error.to_dict()) for error in errors)
+        )
+
+    def export_blocks(self, blocks: Iterable[PortfolioErrorBlock]):
+        """Export the errors given in columnar blocks.
+
+        Dates and values are formatted a block at a time, only descriptions
+        are rendered error by error.
+        """
+
+        self._export_rows(
+            lambda run_id: itertools.chain.from_iterable(
+                self._block_rows(run_id, block) for block in blocks
+            )
+        )
+
+    def connect(self) -> sqlite3.Connection:
+        """Open the database and create the schema if it doesn't exist."""
+
+        connection = sqlite3.connect(self.database_path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # with WAL, commits are durable once the WAL is checkpointed
+        connection.execute("PRAGMA synchronous=NORMAL")
+        # a negative cache size is in KiB
+        connection.execute(f"PRAGMA cache_size={-(self.cache_size >> 10)}")
+        connection.executescript(SCHEMA)
+
+        return connection
+
+    def _export_rows(self, rows: Callable[[int], Iterable[tuple]]):
+        """Insert the rows of errors of a new run.
+
+        `rows` returns the rows given the id of the run.
+        """
+
+        logger.info(f"Exporting errors to {self.database_path}")
+        connection = self.connect()
+        (autocheckpoint,) = connection.execute("PRAGMA wal_autocheckpoint").fetchone()
+        try:
+            with connection:
+                run_id = connection.execute(
+                    "INSERT INTO runs (reference, started_at) VALUES (?, ?)",
+                    (self.reference, _now()),
+                ).lastrowid
+
+            # Index pages change with every chunk, so the WAL is written back
+            # to the database every few chunks instead of every 1000 pages.
+            connection.execute("PRAGMA wal_autocheckpoint=0")
+            error_counter = 0
+            for chunk_number, error_chunk in enumerate(
+                chunked_iterable(rows(run_id), self.chunk_size), start=1
+            ):
+                with connection:
+                    connection.executemany(INSERT_ERROR, error_chunk)
+                error_counter += len(error_chunk)
+                logger.debug(f"Exported {error_counter} errors")
+                if chunk_number % self.checkpoint_interval == 0:
+                    connection.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+            with connection:
+                connection.execute(
+                    "UPDATE runs SET finished_at = ?, errors = ? WHERE id = ?",
+                    (_now(), error_counter, run_id),
+                )
+            connection.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        finally:
+            connection.execute(f"PRAGMA wal_autocheckpoint={int(autocheckpoint)}")
+            connection.close()
+
+        logger.info("Detected %d errors in total", error_counter)
+        logger.info(f"Errors exported to run '{self.reference}'")
+
+    @staticmethod
+    def _dict_row(run_id: int, error_data: dict) -> tuple:
+        context = error_data["context"]
+
+        return (
+            run_id,
+            error_data["error_code"],
+            context["ticker"],
+            _to_text(context["date"]),
+            context["location"],
+            _to_text(context["value"]),
+            _to_text(error_data.get("correct_value")),
+            error_data["description"],
+        )
+
+    @staticmethod
+    def _block_rows(run_id: int, block: PortfolioErrorBlock) -> Iterator[tuple]:
+        # Values are quantized once for the whole block, for their text and
+        # for the descriptions.
+        block = dataclasses.replace(
+            block,
+            values=to_decimals(np.asarray(block.values)),
+            correct_values=(
+                None
+                if block.correct_values is None
+                else to_decimals(np.asarray(block.correct_values))
+            ),
+        )
+        count = len(block)
+        dates = pd.to_datetime(pd.Series(block.dates), errors="coerce")
+        date_texts = dates.dt.strftime("%Y-%m-%d").replace({np.nan: None})
+
+        correct_values = itertools.repeat(None, count)
+        if block.correct_values is not None:
+            correct_values = map(_to_text, block.correct_values)
+
+        return zip(
+            itertools.repeat(run_id, count),
+            itertools.repeat(block.error_class.error_code, count),
+            block.tickers.tolist(),
+            date_texts.tolist(),
+            itertools.repeat(block.location, count),
+            map(_to_text, block.values),
+            correct_values,
+            block.descriptions(),
+        )
@@ -0,0 +1,210 @@
+import collections
+import logging
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from analyser.errors import PortfolioErrorBlock
+
+logger = logging.getLogger(__name__)
+
+
+def _empty_errors() -> pd.DataFrame:
+    """Return an empty frame of errors kept for the next run."""
+
+    return pd.DataFrame(
+        {
+            "fingerprint": np.array([], dtype=np.uint64),
+            "slot": np.array([], dtype=np.int64),
+            "ticker": np.array([], dtype=object),
+            "date": np.array([], dtype=object),
+            "value": np.array([], dtype=object),
+            "correct_value": np.array([], dtype=object),
+        }
+    )
+
+
+class PortfolioIncrementalState:
+    """Row fingerprints and errors of the previous run, used to only reconcile
+    new or changed rows.
+
+    Every row is fingerprinted by hashing the columns the reconcilers read.
+    Rows whose fingerprint was seen in the previous run are not reconciled
+    again and their previous errors are carried forward, merged with the
+    errors of the changed rows in row order. This is only valid for
+    reconcilers which check every row on its own.
+
+    The state is only reused when the reconcilers and `settings` (anything
+    else that changes the errors, e.g. error tolerances, the numeric backend
+    and fusing) match the previous run. It is stored as a pickle file and
+    must only be loaded from trusted locations.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        locations: Iterable[str],
+        settings: Optional[Dict[str, Any]] = None,
+    ):
+        self.path = path
+        self.locations = list(locations)
+        self.settings = dict(settings or {})
+
+        self._previous_fingerprints = np.array([], dtype=np.uint64)
+        self._previous_errors = _empty_errors()
+        self._fingerprints = []
+        self._errors = []
+        self._pending = collections.deque()
+        self.rows_total = 0
+        self.rows_changed = 0
+
+        self._load()
+
+    def changed_chunks(
+        self, data_chunks: Iterable[pd.DataFrame]
+    ) -> Iterator[pd.DataFrame]:
+        """Return the new or changed rows of every chunk.
+
+        Chunks must be passed to `merge` in the same order, with their errors.
+        """
+
+        for data_chunk in data_chunks:
+            fingerprints = pd.util.hash_pandas_object(
+                data_chunk, index=False
+            ).to_numpy()
+            unchanged = np.isin(fingerprints, self._previous_fingerprints)
+            changed_rows = np.flatnonzero(~unchanged)
+
+            carried = pd.DataFrame(
+                {
+                    "fingerprint": fingerprints[unchanged],
+                    "row": np.flatnonzero(unchanged),
+                }
+            ).merge(self._previous_errors, on="fingerprint")
+            self._pending.append((fingerprints, changed_rows, carried))
+
+            self.rows_total += len(data_chunk)
+            self.rows_changed += len(changed_rows)
+            logger.debug(
+                f"Reconciling {len(changed_rows)} of {len(data_chunk)} rows of chunk"
+            )
+            yield data_chunk.iloc[changed_rows].reset_index(drop=True)
+
+    def merge(
+        self, error_blocks: List[PortfolioErrorBlock]
+    ) -> List[PortfolioErrorBlock]:
+        """Merge the errors of the changed rows of the next chunk with the
+        errors carried forward for its unchanged rows."""
+
+        fingerprints, changed_rows, carried = self._pending.popleft()
+        carried_slots = dict(tuple(carried.groupby("slot")))
+
+        merged_blocks = []
+        for slot, error_block in enumerate(error_blocks):
+            block_carried = carried_slots.get(slot, carried.iloc[:0])
+            merged_block = self._merge_block(error_block, changed_rows, block_carried)
+            self._record(merged_block, slot, fingerprints)
+            merged_blocks.append(merged_block)
+
+        self._fingerprints.append(fingerprints)
+        return merged_blocks
+
+    def save(self) -> None:
+        """Save the fingerprints and errors of this run for the next one."""
+
+        fingerprints = np.unique(
+            np.concatenate(self._fingerprints or [np.array([], dtype=np.uint64)])
+        )
+        errors = pd.concat([_empty_errors(), *self._errors], ignore_index=True)
+        # identical rows report identical errors
+        errors = errors.drop_duplicates(["fingerprint", "slot"])
+
+        pd.to_pickle(
+            {
+                "locations": self.locations,
+                "settings": self.settings,
+                "fingerprints": fingerprints,
+                "errors": errors,
+            },
+            self.path,
+        )
+        logger.info(
+            f"Reconciled {self.rows_changed} changed rows of {self.rows_total}, "
+            f"fingerprints saved to {self.path}"
+        )
+
+    def _load(self) -> None:
+        """Load the state of the previous run, unless reconcilers or settings
+        changed."""
+
+        if not os.path.exists(self.path):
+            return
+
+        state = pd.read_pickle(self.path)
+        if state["locations"] != self.locations:
+            logger.info("Reconcilers changed, reconciling every row")
+            return
+        if state.get("settings") != self.settings:
+            logger.info("Analysis settings changed, reconciling every row")
+            return
+
+        self._previous_fingerprints = state["fingerprints"]
+        self._previous_errors = state["errors"]
+        logger.info(f"Fingerprints loaded from {self.path}")
+
+    @staticmethod
+    def _merge_block(
+        error_block: PortfolioErrorBlock,
+        changed_rows: np.ndarray,
+        carried: pd.DataFrame,
+    ) -> PortfolioErrorBlock:
+        """Merge the errors of a block with carried errors, in row order."""
+
+        rows = np.concatenate(
+            [changed_rows[error_block.rows], carried["row"].to_numpy()]
+        )
+        order = np.argsort(rows, kind="stable")
+
+        def merged(values: np.ndarray, column: str) -> np.ndarray:
+            return np.concatenate([values, carried[column].to_numpy()])[order]
+
+        correct_values = None
+        if error_block.correct_values is not None:
+            correct_values = merged(error_block.correct_values, "correct_value")
+
+        return PortfolioErrorBlock(
+            error_class=error_block.error_class,
+            location=error_block.location,
+            tickers=merged(error_block.tickers, "ticker"),
+            dates=merged(error_block.dates, "date"),
+            values=merged(error_block.values, "value"),
+            correct_values=correct_values,
+            rows=rows[order],
+        )
+
+    def _record(
+        self, error_block: PortfolioErrorBlock, slot: int, fingerprints: np.ndarray
+    ) -> None:
+        """Keep the errors of a block for the next run."""
+
+        if not len(error_block):
+            return
+
+        correct_values: Optional[np.ndarray] = error_block.correct_values
+        if correct_values is None:
+            correct_values = np.full(len(error_block), None, dtype=object)
+
+        self._errors.append(
+            pd.DataFrame(
+                {
+                    "fingerprint": fingerprints[error_block.rows],
+                    "slot": slot,
+                    "ticker": error_block.tickers,
+                    "date": error_block.dates,
+                    "value": error_block.values,
+                    "correct_value": correct_values,
+                }
+            )
+        )
@@ -2,12 +2,32 @@ from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from datetime import date
 from decimal import Decimal
-from typing import Any, Iterator
-
-import pandas as pd
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Optional, Tuple
 
 from analyser import enums
 
+if TYPE_CHECKING:
+    # pandas is only imported by implementations, so that importing the
+    # interfaces (e.g. to validate headers) stays fast
+    import pandas as pd
+
+    from analyser.errors import PortfolioErrorBlock
+
+
+def normalize_header(header: str) -> str:
+    """Normalize a header of the input data to a portfolio data header."""
+
+    return header.strip().lower().replace(" ", "_")
+
+
+def validate_headers(headers: Iterable[str]) -> None:
+    """Check that normalized headers match the portfolio data headers."""
+
+    assert headers is not None, "Headers not found in data feed."
+    assert list(headers) == [
+        header.value for header in enums.PortfolioDataHeader
+    ], f"Headers do not match expected headers."
+
 
 class PortfolioAnalyser(ABC):
     """Portfolio Analyser interface."""
@@ -23,14 +43,11 @@ class PortfolioAnalyser(ABC):
             return self._data_headers
 
         headers = next(self._data_iterator)
-        assert headers is not None, "Headers not found in data feed."
-        assert list(headers) == [
-            header.value for header in enums.PortfolioDataHeader
-        ], f"Headers do not match expected headers."
+        validate_headers(headers)
 
         return headers
 
-    def get_data(self) -> Iterator[pd.DataFrame]:
+    def get_data(self) -> Iterator["pd.DataFrame"]:
         """Get the data for portfolio."""
 
         if self._data_headers is None:
@@ -44,26 +61,46 @@ class PortfolioAnalyser(ABC):
 
         ...
 
+    @abstractmethod
+    def analyse_blocks(self) -> Iterator["PortfolioErrorBlock"]:
+        """Analyse the portfolio data and return errors in columnar blocks."""
+
+        ...
+
     @abstractmethod
     def export_errors(self, errors: Iterator["PortfolioError"]) -> None:
         """Export the errors."""
 
         ...
 
+    @abstractmethod
+    def export_error_blocks(self, blocks: Iterator["PortfolioErrorBlock"]) -> None:
+        """Export the errors given in columnar blocks."""
+
+        ...
+
 
 class PortfolioDataReconciler(ABC):
     """Portfolio Data Reconciler interface."""
 
     ERROR_TOLERANCE: Decimal
+    required_columns: Tuple[str, ...]
+    provided_columns: Tuple[str, ...]
 
     @abstractmethod
-    def reconcile(self, data: pd.DataFrame) -> Iterator["PortfolioError"]:
+    def reconcile(self, data: "pd.DataFrame") -> Iterator["PortfolioError"]:
         """Reconcile the data."""
 
         ...
 
     @abstractmethod
-    def recalculate(self, data: pd.DataFrame) -> None:
+    def reconcile_block(self, data: "pd.DataFrame") -> "PortfolioErrorBlock":
+        """Reconcile the data and return the errors as a columnar block."""
+
+        ...
+
+    @abstractmethod
+    def recalculate(self, data: "pd.DataFrame") -> None:
         """Recalculate the data."""
 
         ...
@@ -73,13 +110,19 @@ class PortfolioDataFeed(ABC):
     """Portfolio Data Feed interface."""
 
     @abstractmethod
-    def get_data(self) -> Iterator[pd.DataFrame]:
+    def get_data(self) -> Iterator["pd.DataFrame"]:
         """Get the data for portfolio."""
 
         ...
 
+    def select_columns(self, columns: Optional[Iterable[str]]) -> None:
+        """Only load the given columns, or all columns if None.
+
+        Feeds which can not skip columns ignore the selection.
+        """
+
     def normalize_header(self, header: str) -> str:
-        return header.strip().lower().replace(" ", "_")
+        return normalize_header(header)
 
 
 class PortfolioError(ABC):
@@ -118,3 +161,8 @@ class PortfolioErrorExporter(ABC):
         """Export the errors."""
 
         ...
+
+    def export_blocks(self, blocks: Iterable["PortfolioErrorBlock"]):
+        """Export the errors given in columnar blocks."""
+
+        self.export(error for block in blocks for error in block)
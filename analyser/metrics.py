@@ -0,0 +1,293 @@
+import contextlib
+import json
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Stages of the analysis whose time is measured. "wait" is the time pipeline
+# stages are blocked on their queues.
+ANALYSIS_STAGES = ("feed", "reconcile", "export", "wait")
+
+
+@dataclass
+class ReconcilerMetrics:
+    """Time spent in a reconciler and what it found.
+
+    CPU time is the time of the thread running the reconciler, so it stays
+    meaningful when reconcilers run concurrently.
+    """
+
+    name: str
+    chunks: int = 0
+    rows: int = 0
+    errors: int = 0
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        if not self.wall_seconds:
+            return 0.0
+
+        return self.rows / self.wall_seconds
+
+    def merge(self, other: "ReconcilerMetrics") -> None:
+        """Add the metrics of another run of the same reconciler."""
+
+        self.chunks += other.chunks
+        self.rows += other.rows
+        self.errors += other.errors
+        self.wall_seconds += other.wall_seconds
+        self.cpu_seconds += other.cpu_seconds
+
+
+@contextlib.contextmanager
+def measure_reconciler(
+    timings: Optional[Dict[str, ReconcilerMetrics]], name: str
+) -> Iterator[None]:
+    """Add the wall and CPU time of the block to the timings of a reconciler.
+
+    Does nothing when `timings` is None.
+    """
+
+    if timings is None:
+        yield
+        return
+
+    metrics = timings.setdefault(name, ReconcilerMetrics(name))
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        yield
+    finally:
+        metrics.wall_seconds += time.perf_counter() - wall_start
+        metrics.cpu_seconds += time.thread_time() - cpu_start
+
+
+class PortfolioAnalysisMetrics:
+    """Timings and counters of an analysis run.
+
+    Stage time is exclusive: time spent reading the feed while reconciling a
+    chunk is only counted for the feed, and time spent reconciling while
+    exporting errors only for reconciliation. Stages running in different
+    threads are measured independently: every thread adds to its own totals,
+    which are merged when `stage_seconds` is read. Work stages are summed over
+    threads, while "wait" is the longest any thread was blocked on its queues,
+    as threads wait at the same time and the sum of their waits can exceed the
+    elapsed time. The waits of every thread are in `thread_stage_seconds`.
+    """
+
+    def __init__(self):
+        self.reconcilers: Dict[str, ReconcilerMetrics] = {}
+        self.chunks = 0
+        self.rows = 0
+        self.errors = 0
+        self._started = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # stage totals of every thread which measured a stage, by thread name
+        self._thread_seconds: List[Tuple[str, Dict[str, float]]] = []
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return time.perf_counter() - self._started
+
+    @property
+    def thread_stage_seconds(self) -> Dict[str, Dict[str, float]]:
+        """Return the stage totals of every thread, by thread name."""
+
+        with self._lock:
+            thread_seconds = list(self._thread_seconds)
+
+        merged = {}
+        for name, seconds in thread_seconds:
+            totals = merged.setdefault(name, {stage: 0.0 for stage in ANALYSIS_STAGES})
+            for stage, value in seconds.items():
+                totals[stage] += value
+
+        return merged
+
+    @property
+    def stage_seconds(self) -> Dict[str, float]:
+        """Return the stage totals merged over threads."""
+
+        stage_seconds = {stage: 0.0 for stage in ANALYSIS_STAGES}
+        for seconds in self.thread_stage_seconds.values():
+            for stage, value in seconds.items():
+                if stage == "wait":
+                    stage_seconds[stage] = max(stage_seconds[stage], value)
+                else:
+                    stage_seconds[stage] += value
+
+        return stage_seconds
+
+    @contextlib.contextmanager
+    def measure_stage(self, stage: str) -> Iterator[None]:
+        """Add the time of the block to the stage, pausing the enclosing stage."""
+
+        stack = self._local.__dict__.setdefault("stack", [])
+        now = time.perf_counter()
+        if stack:
+            self._stop(stack[-1], now)
+        stack.append([stage, now])
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self._stop(stack.pop(), now)
+            if stack:
+                stack[-1][1] = now
+
+    def timed(self, stage: str, items: Iterable[T]) -> Iterator[T]:
+        """Iterate over the items, adding the time to produce them to the stage.
+
+        The items are closed when the iteration is, if they can be.
+        """
+
+        iterator = iter(items)
+        try:
+            while True:
+                with self.measure_stage(stage):
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        return
+                yield item
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    def record_chunk(self, rows: int) -> None:
+        self.chunks += 1
+        self.rows += rows
+
+    def record_reconciler(self, name: str, rows: int, errors: int) -> None:
+        """Count a chunk reconciled by a reconciler."""
+
+        metrics = self.reconcilers.setdefault(name, ReconcilerMetrics(name))
+        metrics.chunks += 1
+        metrics.rows += rows
+        metrics.errors += errors
+        self.errors += errors
+
+    def merge_timings(self, timings: Dict[str, ReconcilerMetrics]) -> None:
+        """Add reconciler timings measured for a chunk."""
+
+        for name, metrics in timings.items():
+            self.reconcilers.setdefault(name, ReconcilerMetrics(name)).merge(metrics)
+
+    def to_dict(self) -> dict:
+        """Return the metrics as a structured report."""
+
+        return {
+            "elapsed_seconds": self.elapsed_seconds,
+            "chunks": self.chunks,
+            "rows": self.rows,
+            "errors": self.errors,
+            "stages": self.stage_seconds,
+            "thread_stages": self.thread_stage_seconds,
+            "reconcilers": [
+                {**asdict(metrics), "rows_per_second": metrics.rows_per_second}
+                for metrics in self.reconcilers.values()
+            ],
+        }
+
+    def to_prometheus(self) -> str:
+        """Return the metrics in the Prometheus text exposition format."""
+
+        lines = []
+
+        def metric(name: str, help_text: str, samples: Dict[str, float]) -> None:
+            lines.append(f"# HELP portfolio_{name} {help_text}")
+            lines.append(f"# TYPE portfolio_{name} counter")
+            for labels, value in samples.items():
+                lines.append(f"portfolio_{name}{labels} {value}")
+
+        metric("rows_total", "Rows reconciled.", {"": self.rows})
+        metric("chunks_total", "Chunks reconciled.", {"": self.chunks})
+        metric("errors_total", "Errors found.", {"": self.errors})
+        metric(
+            "stage_seconds_total",
+            "Time spent in an analysis stage.",
+            {
+                f'{{stage="{stage}"}}': value
+                for stage, value in self.stage_seconds.items()
+            },
+        )
+        for name, attribute, help_text in (
+            ("reconciler_wall_seconds_total", "wall_seconds", "Wall time of a check."),
+            ("reconciler_cpu_seconds_total", "cpu_seconds", "CPU time of a check."),
+            ("reconciler_rows_total", "rows", "Rows checked by a check."),
+            ("reconciler_errors_total", "errors", "Errors found by a check."),
+        ):
+            metric(
+                name,
+                help_text,
+                {
+                    f'{{reconciler="{metrics.name}"}}': getattr(metrics, attribute)
+                    for metrics in self.reconcilers.values()
+                },
+            )
+
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path: str) -> None:
+        with open(path, "w") as metrics_file:
+            json.dump(self.to_dict(), metrics_file, indent=2)
+
+    def write_prometheus(self, path: str) -> None:
+        with open(path, "w") as metrics_file:
+            metrics_file.write(self.to_prometheus())
+
+    def log_report(self) -> None:
+        """Log the metrics, slowest reconcilers first."""
+
+        stage_seconds = self.stage_seconds
+        logger.info(
+            "Analysed %d rows in %d chunks in %.2fs, %d errors "
+            "(feed %.2fs, reconcile %.2fs, export %.2fs, waiting up to %.2fs)",
+            self.rows,
+            self.chunks,
+            self.elapsed_seconds,
+            self.errors,
+            stage_seconds["feed"],
+            stage_seconds["reconcile"],
+            stage_seconds["export"],
+            stage_seconds["wait"],
+        )
+        reconcilers = sorted(
+            self.reconcilers.values(),
+            key=lambda metrics: metrics.wall_seconds,
+            reverse=True,
+        )
+        for metrics in reconcilers:
+            logger.info(
+                "Reconciler '%s': %.3fs wall, %.3fs CPU, %.0f rows/s, %d errors",
+                metrics.name,
+                metrics.wall_seconds,
+                metrics.cpu_seconds,
+                metrics.rows_per_second,
+                metrics.errors,
+            )
+
+    def _stop(self, entry: list, now: float) -> None:
+        """Add the time since the entry was (re)started to the stage totals of
+        the thread."""
+
+        seconds = self._local.__dict__.get("seconds")
+        if seconds is None:
+            # every stage is set up front, so the dictionary never changes size
+            # while other threads read it
+            seconds = self._local.seconds = {stage: 0.0 for stage in ANALYSIS_STAGES}
+            with self._lock:
+                self._thread_seconds.append((threading.current_thread().name, seconds))
+
+        stage, started = entry
+        seconds[stage] += now - started
@@ -0,0 +1,244 @@
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator
+
+if TYPE_CHECKING:
+    from analyser.analyser import PortfolioAnalyzer
+
+logger = logging.getLogger(__name__)
+
+# marks the end of the items in a stage queue
+_END_OF_STAGE = object()
+
+
+@dataclass
+class PipelineStageStats:
+    """Statistics of a pipeline stage.
+
+    `items` counts the items the stage produced (or consumed, for the last
+    stage). `wait_seconds` is the time the stage was blocked on its input or
+    output queue, so `busy_seconds` is the time spent on actual work. Queue
+    occupancy is sampled every time the stage puts an item into its output
+    queue.
+    """
+
+    name: str
+    items: int = 0
+    elapsed_seconds: float = 0.0
+    wait_seconds: float = 0.0
+    queue_samples: int = 0
+    queue_occupancy_total: int = 0
+    queue_occupancy_max: int = 0
+
+    @property
+    def busy_seconds(self) -> float:
+        return max(self.elapsed_seconds - self.wait_seconds, 0.0)
+
+    @property
+    def throughput(self) -> float:
+        """Items processed per second of busy time."""
+
+        if not self.busy_seconds:
+            return 0.0
+
+        return self.items / self.busy_seconds
+
+    @property
+    def queue_occupancy_mean(self) -> float:
+        if not self.queue_samples:
+            return 0.0
+
+        return self.queue_occupancy_total / self.queue_samples
+
+    def record_queue_occupancy(self, occupancy: int) -> None:
+        self.queue_samples += 1
+        self.queue_occupancy_total += occupancy
+        self.queue_occupancy_max = max(self.queue_occupancy_max, occupancy)
+
+
+class PortfolioPipeline:
+    """Run the analysis as feed, reconcile and export stages.
+
+    The feed and reconcile stages run in their own threads and the export
+    stage runs in the calling thread. Stages are connected by bounded queues,
+    so a slow stage blocks the stages before it instead of letting chunks and
+    errors pile up in memory. When a stage fails, the other stages stop
+    pulling items and close their iterators, and the error is raised once all
+    stage threads have finished.
+    """
+
+    def __init__(self, analyser: "PortfolioAnalyzer", queue_size: int = 4):
+        self.analyser = analyser
+        self.queue_size = queue_size
+        self.stats = {
+            name: PipelineStageStats(name) for name in ("feed", "reconcile", "export")
+        }
+        self._stopped = threading.Event()
+        self._errors = []
+
+    def run(self) -> Dict[str, PipelineStageStats]:
+        """Run the pipeline until all errors are exported."""
+
+        chunk_queue = queue.Queue(maxsize=self.queue_size)
+        block_queue = queue.Queue(maxsize=self.queue_size)
+
+        feed_stats = self.stats["feed"]
+        reconcile_stats = self.stats["reconcile"]
+        export_stats = self.stats["export"]
+
+        threads = [
+            self._start_stage(
+                feed_stats,
+                lambda: self._fill_queue(
+                    self.analyser.get_data(), chunk_queue, feed_stats
+                ),
+            ),
+            self._start_stage(
+                reconcile_stats,
+                lambda: self._fill_queue(
+                    self.analyser.reconcile_chunks(
+                        self._iterate_queue(chunk_queue, reconcile_stats)
+                    ),
+                    block_queue,
+                    reconcile_stats,
+                ),
+            ),
+        ]
+
+        start = time.perf_counter()
+        try:
+            error_blocks = self._iterate_queue(block_queue, export_stats, count=True)
+            self.analyser.export_error_blocks(
+                block for blocks in error_blocks for block in blocks
+            )
+        except BaseException:
+            # a failing stage stops the export, otherwise the export failed
+            stopped_by_stage = self._stopped.is_set()
+            self._stopped.set()
+            for thread in threads:
+                thread.join()
+            if stopped_by_stage and self._errors:
+                raise self._errors[0]
+            raise
+        finally:
+            export_stats.elapsed_seconds = time.perf_counter() - start
+
+        for thread in threads:
+            thread.join()
+        if self._errors:
+            raise self._errors[0]
+
+        self._log_stats()
+
+        return self.stats
+
+    def _start_stage(
+        self, stats: PipelineStageStats, target: Callable[[], None]
+    ) -> threading.Thread:
+        """Start a stage in its own thread."""
+
+        def run_stage():
+            start = time.perf_counter()
+            try:
+                target()
+            except BaseException as exc:
+                if self._stopped.is_set():
+                    # stopped after another stage failed
+                    logger.debug("Pipeline stage '%s' stopped", stats.name)
+                    return
+                logger.exception("Pipeline stage '%s' failed", stats.name)
+                self._errors.append(exc)
+                self._stopped.set()
+            finally:
+                stats.elapsed_seconds = time.perf_counter() - start
+
+        thread = threading.Thread(
+            target=run_stage, name=f"pipeline-{stats.name}", daemon=True
+        )
+        thread.start()
+
+        return thread
+
+    def _fill_queue(
+        self, items: Iterable[Any], output_queue: queue.Queue, stats: PipelineStageStats
+    ) -> None:
+        """Put the items into the queue, followed by the end marker.
+
+        Stops pulling items once the pipeline is stopped and closes the items,
+        so a feed stops reading its file.
+        """
+
+        try:
+            for item in items:
+                if self._stopped.is_set():
+                    break
+                stats.items += 1
+                self._put(output_queue, item, stats)
+                stats.record_queue_occupancy(output_queue.qsize())
+        finally:
+            close = getattr(items, "close", None)
+            if close is not None:
+                close()
+            self._put(output_queue, _END_OF_STAGE, stats)
+
+    def _iterate_queue(
+        self, input_queue: queue.Queue, stats: PipelineStageStats, count: bool = False
+    ) -> Iterator[Any]:
+        """Get the items from the queue until the end marker.
+
+        Raises RuntimeError when the pipeline is stopped by a failing stage.
+        """
+
+        while True:
+            start = time.perf_counter()
+            try:
+                with self.analyser.metrics.measure_stage("wait"):
+                    item = input_queue.get(timeout=0.1)
+            except queue.Empty:
+                if self._stopped.is_set():
+                    raise RuntimeError("Pipeline stopped after a stage failed.")
+                continue
+            finally:
+                stats.wait_seconds += time.perf_counter() - start
+
+            if item is _END_OF_STAGE:
+                return
+
+            if count:
+                stats.items += 1
+            yield item
+
+    def _put(
+        self, output_queue: queue.Queue, item: Any, stats: PipelineStageStats
+    ) -> None:
+        """Put an item into the queue, giving up once the pipeline is stopped."""
+
+        start = time.perf_counter()
+        try:
+            with self.analyser.metrics.measure_stage("wait"):
+                while not self._stopped.is_set():
+                    try:
+                        output_queue.put(item, timeout=0.1)
+                        return
+                    except queue.Full:
+                        continue
+        finally:
+            stats.wait_seconds += time.perf_counter() - start
+
+    def _log_stats(self) -> None:
+        for stats in self.stats.values():
+            logger.info(
+                "Pipeline stage '%s': %d items in %.2fs (busy %.2fs, waiting %.2fs, "
+                "%.1f items/s), output queue occupancy mean %.1f max %d",
+                stats.name,
+                stats.items,
+                stats.elapsed_seconds,
+                stats.busy_seconds,
+                stats.wait_seconds,
+                stats.throughput,
+                stats.queue_occupancy_mean,
+                stats.queue_occupancy_max,
+            )
@@ -0,0 +1,208 @@
+import logging
+from abc import abstractmethod
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from analyser.enums import PortfolioDataHeader
+from analyser.errors import PortfolioErrorBlock, PortfolioErrorCalculation
+from analyser.reconcilers.base import PortfolioDataReconcilerBase
+
+logger = logging.getLogger(__name__)
+
+# column counting the rows summed into the totals of every date
+_ROWS = "_rows"
+
+
+class PortfolioDateTotals:
+    """Partial aggregates of open portfolio dates, carried across chunks.
+
+    Every chunk adds its aggregates by date, and a date is closed once a later
+    date is seen, as no more rows of it will follow. Only open dates are kept,
+    so memory grows with the number of dates spread over consecutive chunks
+    (usually one) and not with the number of rows. Data must be fed in
+    ascending date order.
+
+    `aggregations` maps every column to "sum" or "last". Both can be combined
+    from partial aggregates, which is what makes dates split across chunks
+    add up to the same totals as whole dates.
+    """
+
+    def __init__(self, aggregations: Dict[str, str]):
+        self.aggregations = aggregations
+        self.last_closed_date: Optional[pd.Timestamp] = None
+        self._open = pd.DataFrame(
+            columns=list(aggregations), index=pd.DatetimeIndex([]), dtype=float
+        )
+
+    def __len__(self) -> int:
+        return len(self._open)
+
+    def add(self, partials: pd.DataFrame) -> None:
+        """Add the aggregates of a chunk, indexed by date."""
+
+        if (
+            self.last_closed_date is not None
+            and partials.index[0] <= self.last_closed_date
+        ):
+            logger.warning(
+                f"Date {partials.index[0].date()} was seen after later dates, "
+                "its totals are checked separately"
+            )
+
+        if self._open.empty:
+            self._open = partials
+        else:
+            self._open = (
+                pd.concat([self._open, partials])
+                .groupby(level=0, sort=True)
+                .agg(self.aggregations)
+            )
+
+    def close_before(self, date: pd.Timestamp) -> pd.DataFrame:
+        """Remove and return the totals of the dates before the date."""
+
+        closed = self._open.index < date
+        return self._close(closed)
+
+    def close_all(self) -> pd.DataFrame:
+        """Remove and return the totals of all open dates."""
+
+        return self._close(np.ones(len(self._open), dtype=bool))
+
+    def _close(self, closed: np.ndarray) -> pd.DataFrame:
+        totals = self._open[closed]
+        self._open = self._open[~closed]
+        if not totals.empty:
+            self.last_closed_date = totals.index[-1]
+
+        return totals
+
+
+class PortfolioDataReconcilerAggregateBase(PortfolioDataReconcilerBase):
+    """Base class for reconcilers checking portfolio totals of every date.
+
+    Every chunk is reduced to aggregates by date with a vectorized group-by,
+    and the aggregates of dates split across chunks are combined in a
+    `PortfolioDateTotals`. Totals are checked when their date is closed, so
+    errors of a date are reported with the chunk after its last row, and
+    `finalize` must be called after the last chunk to check the last date.
+
+    `ERROR_TOLERANCE` is the tolerance of every summed row, like the tolerance
+    the row reconcilers check each value with, so a date is only reported when
+    its total is off by more than the tolerance times the number of its rows.
+    Rounding of every row adds up in the total, and a fixed tolerance would
+    report large portfolios for rounding alone.
+
+    Errors are reported without a ticker, with the total as the value and the
+    expected total as the correct value. Like the history reconcilers, these
+    reconcilers must see every chunk in order and can not run in chunk worker
+    processes.
+    """
+
+    # columns to aggregate and their aggregation, "sum" or "last"
+    AGGREGATIONS: Dict[str, str]
+    # location the errors are reported for
+    LOCATION: str
+
+    def __init__(self):
+        super().__init__()
+
+        self.totals = PortfolioDateTotals({**self.AGGREGATIONS, _ROWS: "sum"})
+        self.required_columns = tuple(self.AGGREGATIONS)
+
+    @property
+    def provided_columns(self):
+        """Aggregate reconcilers don't derive columns of the data."""
+
+        return ()
+
+    def reconcile_block(self, data: pd.DataFrame) -> PortfolioErrorBlock:
+        """Add the aggregates of the chunk and check the dates it closes."""
+
+        logger.info(f"Reconciling '{self.LOCATION}'")
+        partials = self.calculate(data)
+        if partials.empty:
+            closed = self.totals.close_before(pd.Timestamp.min)
+        else:
+            self.totals.add(partials)
+            closed = self.totals.close_before(partials.index[-1])
+        errors = self._check(closed)
+
+        logger.info(f"'{self.LOCATION}' reconciled")
+        return errors
+
+    def finalize(self) -> PortfolioErrorBlock:
+        """Check the dates still open after the last chunk."""
+
+        return self._check(self.totals.close_all())
+
+    def calculate(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Aggregate the chunk by date.
+
+        Returns one row of partial aggregates per date of the chunk instead of
+        a column aligned with the data, with the number of rows aggregated.
+        """
+
+        dates = data[PortfolioDataHeader.DATE.value]
+        return (
+            self.partials(data)
+            .assign(**{_ROWS: 1.0})
+            .groupby(dates.to_numpy(), sort=True)
+            .agg(self.totals.aggregations)
+        )
+
+    def partials(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Return the values aggregated for every row, as floats.
+
+        Reconcilers aggregating values derived from the data override this
+        and declare the columns they read in `required_columns`.
+        """
+
+        return pd.DataFrame(
+            {column: data[column].astype(float) for column in self.AGGREGATIONS},
+            index=data.index,
+        )
+
+    @abstractmethod
+    def total(self, totals: pd.DataFrame) -> pd.Series:
+        """Return the reported total of every date."""
+
+        ...
+
+    @abstractmethod
+    def expected(self, totals: pd.DataFrame) -> pd.Series:
+        """Return the expected total of every date."""
+
+        ...
+
+    def error_block(
+        self, data: pd.DataFrame, mask: pd.Series, calculated: pd.Series
+    ) -> PortfolioErrorBlock:
+        """Build the block of errors for the masked dates.
+
+        `data` holds the totals of closed dates and `calculated` the expected
+        totals.
+        """
+
+        mask = np.asarray(mask, dtype=bool)
+        dates = data.index[mask]
+
+        return PortfolioErrorBlock(
+            error_class=PortfolioErrorCalculation,
+            location=self.LOCATION,
+            tickers=np.full(len(dates), None, dtype=object),
+            dates=dates.date,
+            values=self.total(data).to_numpy()[mask],
+            correct_values=np.asarray(calculated)[mask],
+        )
+
+    def _check(self, totals: pd.DataFrame) -> PortfolioErrorBlock:
+        """Check the totals of closed dates against the tolerance of their rows."""
+
+        expected = self.expected(totals)
+        tolerance = float(self.ERROR_TOLERANCE) * totals[_ROWS]
+        mask = (self.total(totals) - expected).abs() > tolerance
+
+        return self.error_block(totals, mask, expected)
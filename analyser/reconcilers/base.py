@@ -1,6 +1,14 @@
+from abc import abstractmethod
 from enum import Enum
+from typing import Iterator, Optional, Tuple
 
-from analyser.interfaces import PortfolioDataReconciler
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_float_dtype
+
+from analyser.enums import PortfolioDataHeader
+from analyser.errors import PortfolioErrorBlock
+from analyser.interfaces import PortfolioDataReconciler, PortfolioError
 
 
 class AddedColumnSuffix(Enum):
@@ -11,7 +19,97 @@ class AddedColumnSuffix(Enum):
 
 
 class PortfolioDataReconcilerBase(PortfolioDataReconciler):
-    """Base class for portfolio data reconcilers."""
+    """Base class for portfolio data reconcilers.
+
+    Reconcilers declare the columns they read in `required_columns` and derive
+    a single recalculated column, which is listed in `provided_columns`.
+
+    The data given to reconcilers is a `PortfolioReconciliationContext` when
+    they are run by the reconciler graph or the analyser: derived and
+    difference columns assigned to it are kept in reused buffers next to the
+    data, which itself stays unmodified. Plain data frames are still accepted,
+    and then get the columns added.
+    """
+
+    # columns read by every reconciler to report errors
+    ERROR_CONTEXT_COLUMNS = (
+        PortfolioDataHeader.P_TICKER.value,
+        PortfolioDataHeader.DATE.value,
+    )
+
+    # Formula of the derived column and of its deviation from the reported
+    # value, written over column names. Both are only used by the fused
+    # reconciler and must match `calculate` and `reconcile_block`. Instead of
+    # `short_pos`, expressions branch on `is_short` and `has_side`, the bool
+    # arrays `_select_by_position` selects with.
+    EXPRESSION: Optional[str] = None
+    DEVIATION_EXPRESSION: Optional[str] = None
+
+    required_columns: Tuple[str, ...] = ()
+
+    @property
+    def provided_columns(self) -> Tuple[str, ...]:
+        """Return the derived columns calculated by the reconciler."""
+
+        return (self._recalc_column,)
+
+    def reconcile(self, data: pd.DataFrame) -> Iterator[PortfolioError]:
+        """Reconcile the data."""
+
+        yield from self.reconcile_block(data)
+
+    def recalculate(self, data: pd.DataFrame) -> None:
+        """Recalculate the data unless the derived column is already present."""
+
+        if self._recalc_column in data:
+            return
+
+        self.store_calculated(data, self.calculate(data))
+
+    @abstractmethod
+    def calculate(self, data: pd.DataFrame) -> pd.Series:
+        """Calculate the derived column without modifying the data."""
+
+        ...
+
+    @abstractmethod
+    def error_block(
+        self, data: pd.DataFrame, mask: pd.Series, calculated: pd.Series
+    ) -> PortfolioErrorBlock:
+        """Build the block of errors for the masked rows.
+
+        `calculated` holds the derived column of the reconciler, aligned with
+        the rows of the data by position.
+        """
+
+        ...
+
+    def store_calculated(self, data: pd.DataFrame, calculated: pd.Series) -> None:
+        """Store the result of `calculate` in the data."""
+
+        data[self._recalc_column] = calculated
+
+    def _select_by_position(
+        self, data: pd.DataFrame, short_values: pd.Series, long_values: pd.Series
+    ) -> pd.Series:
+        """Return the values of short positions for rows with `short_pos` set
+        and the values of long positions for the other rows.
+
+        Both branches are evaluated over all rows and combined in one pass,
+        instead of filtering the data into short and long rows and scattering
+        the results back. Formulas should only branch on the terms which
+        differ between the sides. Rows without a position side get NaN.
+        """
+
+        short_pos = data[PortfolioDataHeader.SHORT_POS.value]
+        is_short = (short_pos == True).to_numpy()
+        selected = np.where(is_short, short_values, long_values)
+
+        has_side = is_short | (short_pos == False).to_numpy()
+        if not has_side.all():
+            selected = np.where(has_side, selected, np.nan)
+
+        return pd.Series(selected, index=data.index)
 
     def _recalculate_column_name_factory(self, column_name: str) -> str:
         """Return the recalculated column name."""
@@ -20,3 +118,16 @@ class PortfolioDataReconcilerBase(PortfolioDataReconciler):
     def _difference_column_name_factory(self, column_name: str) -> str:
         """Return the difference column name."""
         return f"{column_name}{AddedColumnSuffix.DIFF.value}"
+
+    def _exceeds_tolerance(self, values: pd.Series) -> pd.Series:
+        """Return mask of values whose magnitude exceeds the error tolerance.
+
+        Float columns are compared against a float tolerance so the check stays
+        vectorized instead of falling back to object comparison.
+        """
+
+        tolerance = self.ERROR_TOLERANCE
+        if is_float_dtype(values.dtype):
+            tolerance = float(tolerance)
+
+        return values.abs() > tolerance
@@ -1,12 +1,10 @@
 import logging
 from decimal import Decimal
-from typing import Iterator
 
 import pandas as pd
 
 from analyser.enums import PortfolioDataHeader
-from analyser.errors import PortfolioErrorCalculation
-from analyser.interfaces import PortfolioError
+from analyser.errors import PortfolioErrorBlock, PortfolioErrorCalculation
 from analyser.reconcilers.base import PortfolioDataReconcilerBase
 
 logger = logging.getLogger(__name__)
@@ -16,6 +14,11 @@ class PortfolioDataReconcilerCloseWeightAbs(PortfolioDataReconcilerBase):
     """Reconcile portfolio data for close weight abs."""
 
     ERROR_TOLERANCE = Decimal("0.01")
+    EXPRESSION = (
+        "where(closing_weights_recalc != closing_weights_recalc,"
+        " 0, abs(closing_weights_recalc))"
+    )
+    DEVIATION_EXPRESSION = "abs(close_weight_abs_recalc - close_weight_abs)"
 
     def __init__(self):
         super().__init__()
@@ -30,7 +33,12 @@ class PortfolioDataReconcilerCloseWeightAbs(PortfolioDataReconcilerBase):
             PortfolioDataHeader.CLOSING_WEIGHTS.value
         )
 
-    def reconcile(self, data: pd.DataFrame) -> Iterator[PortfolioError]:
+        self.required_columns = (
+            self._recalc_column_close_weights,
+            PortfolioDataHeader.CLOSE_WEIGHT_ABS.value,
+        )
+
+    def reconcile_block(self, data: pd.DataFrame) -> PortfolioErrorBlock:
         """Reconcile the data for close weight abs."""
 
         logger.info("Reconciling 'close weight abs'")
@@ -40,25 +48,29 @@ class PortfolioDataReconcilerCloseWeightAbs(PortfolioDataReconcilerBase):
             data[self._recalc_column] - data[PortfolioDataHeader.CLOSE_WEIGHT_ABS.value]
         )
         # find the rows where the difference is greater than the tolerance
-        mask = data[self._diff_column].abs() > self.ERROR_TOLERANCE
-        for _, row in data[mask].iterrows():
-            error = PortfolioErrorCalculation(
-                ticker=row[PortfolioDataHeader.P_TICKER.value],
-                location=PortfolioDataHeader.CLOSE_WEIGHT_ABS.value,
-                date=row[PortfolioDataHeader.DATE.value].date(),
-                value=row[PortfolioDataHeader.CLOSE_WEIGHT_ABS.value],
-                correct_value=row[self._recalc_column],
-            )
-            yield error
+        mask = self._exceeds_tolerance(data[self._diff_column])
+        errors = self.error_block(data, mask, data[self._recalc_column])
 
         logger.info("'close weight abs' reconciled")
+        return errors
 
-    def recalculate(self, data):
-        """Recalculate the data for close weight abs."""
+    def error_block(
+        self, data: pd.DataFrame, mask: pd.Series, calculated: pd.Series
+    ) -> PortfolioErrorBlock:
+        """Build the block of errors for the masked rows."""
 
-        if self._recalc_column in data:
-            return
+        return PortfolioErrorBlock.from_frame(
+            data,
+            mask,
+            error_class=PortfolioErrorCalculation,
+            location=PortfolioDataHeader.CLOSE_WEIGHT_ABS.value,
+            value_column=PortfolioDataHeader.CLOSE_WEIGHT_ABS.value,
+            correct_values=calculated,
+        )
+
+    def calculate(self, data: pd.DataFrame) -> pd.Series:
+        """Recalculate the data for close weight abs."""
 
         logger.debug("Recalculating 'close weight abs'")
-        data[self._recalc_column] = data[self._recalc_column_close_weights].abs()
-        data[self._recalc_column] = data[self._recalc_column].fillna(0)
+        recalculated = data[self._recalc_column_close_weights].abs()
+        return recalculated.fillna(0)
@@ -0,0 +1,54 @@
+from decimal import Decimal
+
+import pandas as pd
+
+from analyser.enums import PortfolioDataHeader
+from analyser.reconcilers.aggregate import PortfolioDataReconcilerAggregateBase
+
+# sum of the absolute closing weights, the gross exposure of the portfolio
+_GROSS_WEIGHTS = "gross_closing_weights"
+
+
+class PortfolioDataReconcilerCloseWeightAbsTotal(PortfolioDataReconcilerAggregateBase):
+    """Reconcile the absolute closing weights of every date summing up to the
+    gross exposure of the closing weights."""
+
+    ERROR_TOLERANCE = Decimal("0.01")
+    AGGREGATIONS = {
+        PortfolioDataHeader.CLOSE_WEIGHT_ABS.value: "sum",
+        _GROSS_WEIGHTS: "sum",
+    }
+    LOCATION = "close_weight_abs_total"
+
+    def __init__(self):
+        super().__init__()
+
+        self.required_columns = (
+            PortfolioDataHeader.CLOSE_WEIGHT_ABS.value,
+            PortfolioDataHeader.CLOSING_WEIGHTS.value,
+        )
+
+    def partials(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Return the absolute and the unsigned closing weights of every row."""
+
+        return pd.DataFrame(
+            {
+                PortfolioDataHeader.CLOSE_WEIGHT_ABS.value: data[
+                    PortfolioDataHeader.CLOSE_WEIGHT_ABS.value
+                ].astype(float),
+                _GROSS_WEIGHTS: data[PortfolioDataHeader.CLOSING_WEIGHTS.value]
+                .astype(float)
+                .abs(),
+            },
+            index=data.index,
+        )
+
+    def total(self, totals: pd.DataFrame) -> pd.Series:
+        """Return the sum of absolute closing weights."""
+
+        return totals[PortfolioDataHeader.CLOSE_WEIGHT_ABS.value]
+
+    def expected(self, totals: pd.DataFrame) -> pd.Series:
+        """Return the sum of unsigned closing weights."""
+
+        return totals[_GROSS_WEIGHTS]
@@ -1,12 +1,10 @@
 import logging
 from decimal import Decimal
-from typing import Iterator
 
 import pandas as pd
 
 from analyser.enums import PortfolioDataHeader
-from analyser.errors import PortfolioErrorCalculation
-from analyser.interfaces import PortfolioError
+from analyser.errors import PortfolioErrorBlock, PortfolioErrorCalculation
 from analyser.reconcilers.base import PortfolioDataReconcilerBase
 
 logger = logging.getLogger(__name__)
@@ -16,6 +14,8 @@ class PortfolioDataReconcilerClosingWeight(PortfolioDataReconcilerBase):
     """Reconcile portfolio data for closing weight."""
 
     ERROR_TOLERANCE = Decimal("0.01")
+    EXPRESSION = "close_quantity * exchange_rate * price / calculated_nav"
+    DEVIATION_EXPRESSION = "abs(closing_weights_recalc - closing_weights)"
 
     def __init__(self):
         super().__init__()
@@ -27,7 +27,15 @@ class PortfolioDataReconcilerClosingWeight(PortfolioDataReconcilerBase):
             PortfolioDataHeader.CLOSING_WEIGHTS.value
         )
 
-    def reconcile(self, data: pd.DataFrame) -> Iterator[PortfolioError]:
+        self.required_columns = (
+            PortfolioDataHeader.CLOSE_QUANTITY.value,
+            PortfolioDataHeader.EXCHANGE_RATE.value,
+            PortfolioDataHeader.PRICE.value,
+            PortfolioDataHeader.CALCULATED_NAV.value,
+            PortfolioDataHeader.CLOSING_WEIGHTS.value,
+        )
+
+    def reconcile_block(self, data: pd.DataFrame) -> PortfolioErrorBlock:
         """Reconcile the closing weights calculation."""
 
         logger.info("Reconciling closing weights")
@@ -37,30 +45,35 @@ class PortfolioDataReconcilerClosingWeight(PortfolioDataReconcilerBase):
             data[self._recalc_column] - data[PortfolioDataHeader.CLOSING_WEIGHTS.value]
         )
         # find the rows where the difference is greater than the tolerance
-        mask = data[self._diff_column].abs() > self.ERROR_TOLERANCE
-        for _, row in data[mask].iterrows():
-            error = PortfolioErrorCalculation(
-                ticker=row[PortfolioDataHeader.P_TICKER.value],
-                location=PortfolioDataHeader.CLOSING_WEIGHTS.value,
-                date=row[PortfolioDataHeader.DATE.value].date(),
-                value=row[PortfolioDataHeader.CLOSING_WEIGHTS.value],
-                correct_value=row[self._recalc_column],
-            )
-            yield error
+        mask = self._exceeds_tolerance(data[self._diff_column])
+        errors = self.error_block(data, mask, data[self._recalc_column])
 
         logger.info("Closing weights reconciled")
+        return errors
 
-    def recalculate(self, data: pd.DataFrame):
-        """Recalculate the closing weights."""
+    def error_block(
+        self, data: pd.DataFrame, mask: pd.Series, calculated: pd.Series
+    ) -> PortfolioErrorBlock:
+        """Build the block of errors for the masked rows."""
 
-        if self._recalc_column in data:
-            return
+        return PortfolioErrorBlock.from_frame(
+            data,
+            mask,
+            error_class=PortfolioErrorCalculation,
+            location=PortfolioDataHeader.CLOSING_WEIGHTS.value,
+            value_column=PortfolioDataHeader.CLOSING_WEIGHTS.value,
+            correct_values=calculated,
+        )
+
+    def calculate(self, data: pd.DataFrame) -> pd.Series:
+        """Recalculate the closing weights."""
 
         logger.debug("Recalculating closing weights")
-        data[self._recalc_column] = (
+        recalculated = (
             data[PortfolioDataHeader.CLOSE_QUANTITY.value]
             * data[PortfolioDataHeader.EXCHANGE_RATE.value]
             * data[PortfolioDataHeader.PRICE.value]
             / data[PortfolioDataHeader.CALCULATED_NAV.value]
         )
         logger.debug("Closing weights recalculated")
+        return recalculated
@@ -0,0 +1,24 @@
+from decimal import Decimal
+
+import pandas as pd
+
+from analyser.enums import PortfolioDataHeader
+from analyser.reconcilers.aggregate import PortfolioDataReconcilerAggregateBase
+
+
+class PortfolioDataReconcilerClosingWeightTotal(PortfolioDataReconcilerAggregateBase):
+    """Reconcile the closing weights of every date summing up to 1."""
+
+    ERROR_TOLERANCE = Decimal("0.01")
+    AGGREGATIONS = {PortfolioDataHeader.CLOSING_WEIGHTS.value: "sum"}
+    LOCATION = "closing_weights_total"
+
+    def total(self, totals: pd.DataFrame) -> pd.Series:
+        """Return the sum of closing weights."""
+
+        return totals[PortfolioDataHeader.CLOSING_WEIGHTS.value]
+
+    def expected(self, totals: pd.DataFrame) -> pd.Series:
+        """Return the weight of the whole portfolio."""
+
+        return pd.Series(1.0, index=totals.index)
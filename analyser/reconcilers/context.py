@@ -0,0 +1,121 @@
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+
+class PortfolioColumnBuffers:
+    """Preallocated arrays for derived columns, reused across chunks.
+
+    Every derived column gets its own buffer, which is only reallocated when
+    a chunk has more rows than any chunk before it or the values change their
+    dtype, so reconciling a chunk of the usual size allocates no column
+    storage.
+    """
+
+    def __init__(self):
+        self._buffers: Dict[str, np.ndarray] = {}
+
+    @property
+    def bytes_per_row(self) -> int:
+        """Return the bytes a row of every derived column takes."""
+
+        return sum(buffer.itemsize for buffer in self._buffers.values())
+
+    def get(self, column: str, dtype: np.dtype, rows: int) -> np.ndarray:
+        """Return the buffer of a column for the rows."""
+
+        buffer = self._buffers.get(column)
+        if buffer is None or buffer.dtype != dtype or len(buffer) < rows:
+            buffer = self._buffers[column] = np.empty(rows, dtype=dtype)
+
+        return buffer[:rows]
+
+
+class PortfolioReconciliationContext:
+    """Chunk of portfolio data together with the columns derived from it.
+
+    Reconcilers read input and derived columns alike with `context[column]`
+    and store derived columns with `context[column] = values`. Derived values
+    are copied into buffers of a `PortfolioColumnBuffers` instead of being
+    added to the data, so the data frame is never modified and can be shared
+    between reconcilers and workers without copying it. Buffers are reused
+    by the next chunk, so derived columns are only valid until then; error
+    blocks copy the values they report.
+    """
+
+    def __init__(
+        self,
+        data: pd.DataFrame,
+        buffers: Optional[PortfolioColumnBuffers] = None,
+    ):
+        self.data = data
+        self.buffers = buffers if buffers is not None else PortfolioColumnBuffers()
+        self._derived: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def wrap(
+        cls,
+        data: Union[pd.DataFrame, "PortfolioReconciliationContext"],
+        buffers: Optional[PortfolioColumnBuffers] = None,
+    ) -> "PortfolioReconciliationContext":
+        """Return a context for the data, or the data if it is a context."""
+
+        if isinstance(data, cls):
+            return data
+
+        return cls(data, buffers)
+
+    @property
+    def index(self) -> pd.Index:
+        return self.data.index
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __contains__(self, column: str) -> bool:
+        return column in self._derived or column in self.data
+
+    def __getitem__(self, column: str) -> pd.Series:
+        values = self._derived.get(column)
+        if values is None:
+            return self.data[column]
+
+        return pd.Series(values, index=self.data.index, name=column, copy=False)
+
+    def __setitem__(self, column: str, values) -> None:
+        """Store a derived column, aligned by index like a frame column."""
+
+        if column in self.data:
+            raise KeyError(f"Column '{column}' of the data is read-only")
+
+        if isinstance(values, pd.Series):
+            if not values.index.equals(self.data.index):
+                values = values.reindex(self.data.index)
+            values = values.to_numpy()
+        values = np.asarray(values)
+
+        buffer = self.buffers.get(column, values.dtype, len(self.data))
+        np.copyto(buffer, values)
+        self._derived[column] = buffer
+
+    def attach(self, column: str, values: np.ndarray) -> None:
+        """Add a derived column held in an array of the caller, without copying.
+
+        The array must have one value per row and stay unchanged while the
+        context is used.
+        """
+
+        if len(values) != len(self.data):
+            raise ValueError(f"Column '{column}' doesn't match the rows of the data")
+
+        self._derived[column] = values
+
+    def to_frame(self) -> pd.DataFrame:
+        """Return a copy of the data with the derived columns added."""
+
+        frame = self.data.copy()
+        for column in self._derived:
+            frame[column] = self[column].copy()
+
+        return frame
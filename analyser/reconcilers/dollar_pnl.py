@@ -1,12 +1,10 @@
 import logging
 from decimal import Decimal
-from typing import Iterator
 
 import pandas as pd
 
 from analyser.enums import PortfolioDataHeader
-from analyser.errors import PortfolioErrorCalculation
-from analyser.interfaces import PortfolioError
+from analyser.errors import PortfolioErrorBlock, PortfolioErrorCalculation
 from analyser.reconcilers.base import PortfolioDataReconcilerBase
 
 logger = logging.getLogger(__name__)
@@ -16,6 +14,8 @@ class PortfolioDataReconcilerDollarPnL(PortfolioDataReconcilerBase):
     """Reconcile portfolio data for dollar PnL."""
 
     ERROR_TOLERANCE = Decimal("0.01")
+    EXPRESSION = "total_return * nav_yesterday"
+    DEVIATION_EXPRESSION = "abs(dollar_pnl_recalc - dollar_pnl)"
 
     def __init__(self):
         super().__init__()
@@ -27,7 +27,13 @@ class PortfolioDataReconcilerDollarPnL(PortfolioDataReconcilerBase):
             PortfolioDataHeader.DOLLAR_PNL.value
         )
 
-    def reconcile(self, data: pd.DataFrame) -> Iterator[PortfolioError]:
+        self.required_columns = (
+            PortfolioDataHeader.TOTAL_RETURN.value,
+            PortfolioDataHeader.NAV_YESTERDAY.value,
+            PortfolioDataHeader.DOLLAR_PNL.value,
+        )
+
+    def reconcile_block(self, data: pd.DataFrame) -> PortfolioErrorBlock:
         """Reconcile the data for dollar PnL."""
 
         logger.info("Reconciling 'dollar PnL'")
@@ -37,28 +43,33 @@ class PortfolioDataReconcilerDollarPnL(PortfolioDataReconcilerBase):
             data[self._recalc_column] - data[PortfolioDataHeader.DOLLAR_PNL.value]
         )
         # find the rows where the difference is greater than the tolerance
-        mask = data[self._diff_column].abs() > self.ERROR_TOLERANCE
-        for _, row in data[mask].iterrows():
-            error = PortfolioErrorCalculation(
-                ticker=row[PortfolioDataHeader.P_TICKER.value],
-                location=PortfolioDataHeader.DOLLAR_PNL.value,
-                date=row[PortfolioDataHeader.DATE.value].date(),
-                value=row[PortfolioDataHeader.DOLLAR_PNL.value],
-                correct_value=row[self._recalc_column],
-            )
-            yield error
+        mask = self._exceeds_tolerance(data[self._diff_column])
+        errors = self.error_block(data, mask, data[self._recalc_column])
 
         logger.info("'dollar PnL' reconciled")
+        return errors
 
-    def recalculate(self, data):
-        """Recalculate the data for dollar PnL."""
+    def error_block(
+        self, data: pd.DataFrame, mask: pd.Series, calculated: pd.Series
+    ) -> PortfolioErrorBlock:
+        """Build the block of errors for the masked rows."""
 
-        if self._recalc_column in data:
-            return
+        return PortfolioErrorBlock.from_frame(
+            data,
+            mask,
+            error_class=PortfolioErrorCalculation,
+            location=PortfolioDataHeader.DOLLAR_PNL.value,
+            value_column=PortfolioDataHeader.DOLLAR_PNL.value,
+            correct_values=calculated,
+        )
+
+    def calculate(self, data: pd.DataFrame) -> pd.Series:
+        """Recalculate the data for dollar PnL."""
 
         logger.debug("Recalculating 'dollar PnL'")
-        data[self._recalc_column] = (
+        recalculated = (
             data[PortfolioDataHeader.TOTAL_RETURN]
             * data[PortfolioDataHeader.NAV_YESTERDAY.value]
         )
         logger.debug("Recalculated 'dollar PnL'")
+        return recalculated
@@ -0,0 +1,248 @@
+import logging
+from concurrent.futures import Executor
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype
+
+from analyser.enums import PortfolioDataHeader
+from analyser.errors import PortfolioErrorBlock
+from analyser.metrics import ReconcilerMetrics, measure_reconciler
+from analyser.reconcilers.base import PortfolioDataReconcilerBase
+from analyser.reconcilers.context import PortfolioReconciliationContext
+from analyser.reconcilers.graph import PortfolioReconcilerGraph
+
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
+logger = logging.getLogger(__name__)
+
+# functions available in reconciler expressions when numexpr is not installed
+_NUMPY_FUNCTIONS = {"abs": np.abs, "where": np.where}
+# constants available in reconciler expressions
+_CONSTANTS = {"nan": np.nan}
+# arrays derived from `short_pos` which expressions branch on
+_POSITION_ARRAYS = ("is_short", "has_side")
+
+
+class PortfolioFusedReconciler:
+    """Reconcile data with the formulas of all reconcilers fused into one plan.
+
+    Every required input column is converted to a float64 (or bool) array
+    once per chunk, and `short_pos` to the `is_short` and `has_side` bool
+    arrays, so rows without a position side get NaN as with
+    `_select_by_position` whatever the dtype of the column. The `EXPRESSION` of every reconciler is evaluated in
+    dependency order into a reused buffer, and its `DEVIATION_EXPRESSION` is
+    compared with the error tolerance straight into one row of an error bitmap.
+    The data itself is not modified. Expressions are evaluated with numexpr
+    when it is installed, which avoids full-size temporaries, and with numpy
+    otherwise.
+
+    Reconcilers without expressions, and reconcilers depending on them, are
+    reconciled the regular way after the fused ones, in a
+    `PortfolioReconciliationContext` which shares the fused results.
+    """
+
+    def __init__(self, reconciler_graph: PortfolioReconcilerGraph):
+        self.reconciler_graph = reconciler_graph
+        self._fused, self._regular = self._split_reconcilers()
+        self._input_columns = self._resolve_input_columns()
+        self._expressions = [
+            (reconciler.EXPRESSION, self._compile(reconciler.EXPRESSION))
+            for reconciler in self._fused
+        ]
+        self._checks = [
+            (
+                f"({reconciler.DEVIATION_EXPRESSION}) > {float(reconciler.ERROR_TOLERANCE)!r}",
+                self._compile(reconciler.DEVIATION_EXPRESSION),
+                float(reconciler.ERROR_TOLERANCE),
+            )
+            for reconciler in self._fused
+        ]
+        self._values = np.empty((len(self._fused), 0))
+        self._bitmap = np.empty((len(self._fused), 0), dtype=bool)
+
+        logger.debug(
+            "Fused reconcilers: %s",
+            [type(reconciler).__name__ for reconciler in self._fused],
+        )
+
+    @property
+    def derived_bytes_per_row(self) -> int:
+        """Return the bytes per row of the arrays and buffers of a chunk.
+
+        Input columns are counted as float64 arrays, their largest size.
+        """
+
+        return (
+            self._values.itemsize * len(self._fused)
+            + self._bitmap.itemsize * len(self._fused)
+            + np.dtype("float64").itemsize * len(self._input_columns)
+            + self.reconciler_graph.derived_bytes_per_row
+        )
+
+    def reconcile(
+        self,
+        data: pd.DataFrame,
+        executor: Optional[Executor] = None,
+        timings: Optional[Dict[str, ReconcilerMetrics]] = None,
+    ) -> List[PortfolioErrorBlock]:
+        """Reconcile the data with every reconciler, in the order they were given.
+
+        The time spent on the expressions, checks and errors of every
+        reconciler is added to `timings`, if given.
+        """
+
+        row_count = len(data)
+        values, bitmap = self._get_buffers(row_count)
+        arrays = self._input_arrays(data)
+
+        for index, reconciler in enumerate(self._fused):
+            with measure_reconciler(timings, type(reconciler).__name__):
+                expression, code = self._expressions[index]
+                self._evaluate(expression, code, arrays, out=values[index])
+                arrays[reconciler.provided_columns[0]] = values[index]
+
+        for index, (check, code, tolerance) in enumerate(self._checks):
+            with measure_reconciler(timings, type(self._fused[index]).__name__):
+                if numexpr is not None:
+                    numexpr.evaluate(check, local_dict=arrays, out=bitmap[index])
+                else:
+                    np.greater(
+                        self._evaluate(check, code, arrays), tolerance, bitmap[index]
+                    )
+
+        error_blocks = {}
+        for index, reconciler in enumerate(self._fused):
+            with measure_reconciler(timings, type(reconciler).__name__):
+                error_blocks[reconciler] = reconciler.error_block(
+                    data, bitmap[index], values[index]
+                )
+
+        if self._regular:
+            data = PortfolioReconciliationContext.wrap(
+                data, self.reconciler_graph.buffers
+            )
+            for reconciler in self._fused:
+                column = reconciler.provided_columns[0]
+                if column not in data:
+                    data.attach(column, arrays[column])
+            for reconciler in self._regular:
+                with measure_reconciler(timings, type(reconciler).__name__):
+                    reconciler.recalculate(data)
+                    error_blocks[reconciler] = reconciler.reconcile_block(data)
+
+        return [
+            error_blocks[reconciler] for reconciler in self.reconciler_graph.reconcilers
+        ]
+
+    def _split_reconcilers(self) -> tuple:
+        """Split reconcilers into fused and regular ones, in dependency order."""
+
+        providers = {
+            column: reconciler
+            for reconciler in self.reconciler_graph.reconcilers
+            for column in reconciler.provided_columns
+        }
+        fused = []
+        regular = []
+        for level in self.reconciler_graph.levels:
+            for reconciler in level:
+                dependencies = {
+                    providers[column]
+                    for column in reconciler.required_columns
+                    if column in providers and providers[column] is not reconciler
+                }
+                if (
+                    reconciler.EXPRESSION is not None
+                    and reconciler.DEVIATION_EXPRESSION is not None
+                    and len(reconciler.provided_columns) == 1
+                    and all(dependency in fused for dependency in dependencies)
+                ):
+                    fused.append(reconciler)
+                else:
+                    regular.append(reconciler)
+
+        return fused, regular
+
+    def _resolve_input_columns(self) -> List[str]:
+        """Return data columns read by the fused expressions."""
+
+        provided = set()
+        input_columns = []
+        for reconciler in self._fused:
+            names = set(
+                self._compile(reconciler.EXPRESSION).co_names
+                + self._compile(reconciler.DEVIATION_EXPRESSION).co_names
+            )
+            names -= set(_NUMPY_FUNCTIONS) | set(_CONSTANTS)
+            if names & set(_POSITION_ARRAYS):
+                names -= set(_POSITION_ARRAYS)
+                names.add(PortfolioDataHeader.SHORT_POS.value)
+            known = set(reconciler.required_columns) | set(reconciler.provided_columns)
+            if not names <= known:
+                raise ValueError(
+                    f"Expressions of {type(reconciler).__name__} use undeclared "
+                    f"columns: {', '.join(sorted(names - known))}."
+                )
+
+            provided.update(reconciler.provided_columns)
+            for column in reconciler.required_columns:
+                if column not in provided and column not in input_columns:
+                    input_columns.append(column)
+
+        return input_columns
+
+    def _get_buffers(self, row_count: int) -> tuple:
+        """Return value and bitmap buffers for the rows, reusing allocations."""
+
+        if self._values.shape[1] < row_count:
+            self._values = np.empty((len(self._fused), row_count))
+            self._bitmap = np.empty((len(self._fused), row_count), dtype=bool)
+
+        return self._values[:, :row_count], self._bitmap[:, :row_count]
+
+    def _input_arrays(self, data: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Convert the input columns to float64 arrays, keeping bool columns."""
+
+        arrays = dict(_CONSTANTS)
+        for column in self._input_columns:
+            series = data[column]
+            if column == PortfolioDataHeader.SHORT_POS.value:
+                is_short = (series == True).to_numpy(dtype=bool, na_value=False)
+                arrays["is_short"] = is_short
+                arrays["has_side"] = is_short | (series == False).to_numpy(
+                    dtype=bool, na_value=False
+                )
+            elif is_bool_dtype(series.dtype):
+                arrays[column] = series.to_numpy(dtype=bool)
+            else:
+                arrays[column] = series.to_numpy(dtype="float64", na_value=np.nan)
+
+        return arrays
+
+    @staticmethod
+    def _compile(expression: str):
+        return compile(expression, "<expression>", "eval")
+
+    @staticmethod
+    def _evaluate(
+        expression: str,
+        code,
+        arrays: Dict[str, np.ndarray],
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Evaluate an expression over the arrays."""
+
+        if numexpr is not None:
+            return numexpr.evaluate(expression, local_dict=arrays, out=out)
+
+        result = eval(code, {"__builtins__": {}, **_NUMPY_FUNCTIONS}, arrays)
+        if out is None:
+            return result
+
+        np.copyto(out, result)
+        return out
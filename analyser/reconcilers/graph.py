@@ -0,0 +1,172 @@
+import logging
+from concurrent.futures import Executor
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from analyser.errors import PortfolioErrorBlock
+from analyser.metrics import ReconcilerMetrics, measure_reconciler
+from analyser.reconcilers.base import PortfolioDataReconcilerBase
+from analyser.reconcilers.context import (
+    PortfolioColumnBuffers,
+    PortfolioReconciliationContext,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ReconcilerGraphError(ValueError):
+    """Reconciler dependencies can not be resolved."""
+
+
+class PortfolioReconcilerGraph:
+    """Dependency graph of reconcilers built from their declared columns.
+
+    A reconciler depends on every reconciler providing one of its required
+    columns. Reconcilers are grouped into levels, where every level only
+    depends on the levels before it, so reconcilers of the same level can
+    calculate their derived columns independently.
+    """
+
+    def __init__(
+        self,
+        reconcilers: Iterable[PortfolioDataReconcilerBase],
+        available_columns: Iterable[str],
+    ):
+        self.reconcilers = list(reconcilers)
+        self.available_columns = set(available_columns)
+        self.levels = self._resolve_levels()
+        # derived columns of every chunk, kept out of the chunk data
+        self.buffers = PortfolioColumnBuffers()
+
+    @property
+    def derived_bytes_per_row(self) -> int:
+        """Return the bytes per row of the derived columns of the last chunk."""
+
+        return self.buffers.bytes_per_row
+
+    @property
+    def input_columns(self) -> List[str]:
+        """Return the data columns read by the reconcilers."""
+
+        provided = {
+            column
+            for reconciler in self.reconcilers
+            for column in reconciler.provided_columns
+        }
+        columns = list(PortfolioDataReconcilerBase.ERROR_CONTEXT_COLUMNS)
+        for reconciler in self.reconcilers:
+            for column in reconciler.required_columns:
+                if column not in provided and column not in columns:
+                    columns.append(column)
+
+        return columns
+
+    def reconcile(
+        self,
+        data: pd.DataFrame,
+        executor: Optional[Executor] = None,
+        timings: Optional[Dict[str, ReconcilerMetrics]] = None,
+    ) -> List[PortfolioErrorBlock]:
+        """Reconcile the data with every reconciler, in the order they were given.
+
+        Derived columns are kept in a `PortfolioReconciliationContext`, the
+        data itself is not modified. The time spent in every reconciler is
+        added to `timings`, if given.
+        """
+
+        data = PortfolioReconciliationContext.wrap(data, self.buffers)
+        self.recalculate(data, executor, timings)
+
+        error_blocks = []
+        for reconciler in self.reconcilers:
+            with measure_reconciler(timings, type(reconciler).__name__):
+                error_blocks.append(reconciler.reconcile_block(data))
+
+        return error_blocks
+
+    def recalculate(
+        self,
+        data: pd.DataFrame,
+        executor: Optional[Executor] = None,
+        timings: Optional[Dict[str, ReconcilerMetrics]] = None,
+    ) -> None:
+        """Calculate all derived columns of the data, each exactly once.
+
+        Reconcilers of the same level are calculated concurrently when an
+        executor is given. Results are stored in the data one by one after the
+        whole level is calculated, so the data is never modified concurrently.
+        """
+
+        def calculate(reconciler: PortfolioDataReconcilerBase) -> pd.Series:
+            with measure_reconciler(timings, type(reconciler).__name__):
+                return reconciler.calculate(data)
+
+        for level in self.levels:
+            pending = [
+                reconciler
+                for reconciler in level
+                if not all(column in data for column in reconciler.provided_columns)
+            ]
+            if executor is None or len(pending) < 2:
+                results = [calculate(reconciler) for reconciler in pending]
+            else:
+                results = list(executor.map(calculate, pending))
+
+            for reconciler, calculated in zip(pending, results):
+                reconciler.store_calculated(data, calculated)
+
+    def _resolve_levels(self) -> List[List[PortfolioDataReconcilerBase]]:
+        """Order reconcilers into dependency levels."""
+
+        providers = {}
+        for reconciler in self.reconcilers:
+            for column in reconciler.provided_columns:
+                if column in self.available_columns or column in providers:
+                    raise ReconcilerGraphError(
+                        f"Column '{column}' is provided more than once "
+                        f"(by {type(reconciler).__name__})."
+                    )
+                providers[column] = reconciler
+
+        dependencies = {}
+        for reconciler in self.reconcilers:
+            dependencies[reconciler] = set()
+            for column in reconciler.required_columns:
+                if column in self.available_columns:
+                    continue
+                if column not in providers:
+                    raise ReconcilerGraphError(
+                        f"Column '{column}' required by {type(reconciler).__name__} "
+                        "is neither in the data nor provided by a reconciler."
+                    )
+                if providers[column] is not reconciler:
+                    dependencies[reconciler].add(providers[column])
+
+        levels = []
+        resolved = set()
+        while len(resolved) < len(self.reconcilers):
+            level = [
+                reconciler
+                for reconciler in self.reconcilers
+                if reconciler not in resolved and dependencies[reconciler] <= resolved
+            ]
+            if not level:
+                unresolved = [
+                    type(reconciler).__name__
+                    for reconciler in self.reconcilers
+                    if reconciler not in resolved
+                ]
+                raise ReconcilerGraphError(
+                    f"Cyclic dependency between reconcilers: {', '.join(unresolved)}."
+                )
+
+            levels.append(level)
+            resolved.update(level)
+
+        logger.debug(
+            "Reconciler levels: %s",
+            [[type(reconciler).__name__ for reconciler in level] for level in levels],
+        )
+
+        return levels
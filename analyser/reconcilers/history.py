@@ -0,0 +1,242 @@
+import logging
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from analyser.enums import PortfolioDataHeader
+from analyser.errors import PortfolioErrorBlock, PortfolioErrorCalculation
+from analyser.reconcilers.base import PortfolioDataReconcilerBase
+
+logger = logging.getLogger(__name__)
+
+# last reported date and value of a ticker, followed by the ones before them
+_TickerEntry = Tuple[pd.Timestamp, float, Optional[pd.Timestamp], Optional[float]]
+
+
+class PortfolioTickerHistory:
+    """Rolling per-ticker state carried across chunks and runs.
+
+    For every ticker only the values of its last two reported dates are kept,
+    together with the last two portfolio dates, so memory grows with the
+    number of tickers and not with the number of rows. Data must be fed in
+    ascending date order; a date may be split across consecutive chunks.
+    """
+
+    def __init__(self):
+        self.last_date: Optional[pd.Timestamp] = None
+        self.previous_date: Optional[pd.Timestamp] = None
+        self._entries: Dict[str, _TickerEntry] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def expected_values(self, daily: pd.Series) -> np.ndarray:
+        """Return the value reported on the previous portfolio date for every
+        ticker and date.
+
+        `daily` holds the last value of every ticker and date, indexed by
+        ticker and date and sorted by them. Tickers which were not reported on
+        the previous portfolio date get NaN.
+        """
+
+        tickers = daily.index.get_level_values(0)
+        dates = daily.index.get_level_values(1)
+        values = daily.to_numpy(dtype=float)
+        previous_portfolio_dates = self._previous_portfolio_dates(dates)
+
+        # the previous row belongs to the same ticker unless it's the first one
+        first = ~tickers.duplicated()
+        previous_dates = np.roll(dates.to_numpy(), 1)
+        previous_values = np.roll(values, 1)
+
+        for position in np.flatnonzero(first):
+            previous_dates[position], previous_values[position] = self._previous(
+                tickers[position], dates[position]
+            )
+
+        matches = previous_dates == previous_portfolio_dates
+        return np.where(matches, previous_values, np.nan)
+
+    def update(self, daily: pd.Series) -> None:
+        """Remember the last two reported values of every ticker."""
+
+        for ticker, ticker_daily in daily.groupby(level=0, sort=False):
+            dates = list(ticker_daily.index.get_level_values(1))
+            values = ticker_daily.tolist()
+            entry = self._entries.get(ticker, (None, None, None, None))
+
+            if entry[0] == dates[0]:
+                # the first date continues the last date of the previous chunk
+                dates.insert(0, entry[2])
+                values.insert(0, entry[3])
+            else:
+                dates[:0] = [entry[2], entry[0]]
+                values[:0] = [entry[3], entry[1]]
+
+            self._entries[ticker] = (dates[-1], values[-1], dates[-2], values[-2])
+
+        portfolio_dates = self._portfolio_dates(daily.index.get_level_values(1))
+        self.last_date = portfolio_dates[-1]
+        if len(portfolio_dates) > 1:
+            self.previous_date = portfolio_dates[-2]
+
+    def to_dict(self) -> dict:
+        """Convert the state to a JSON serializable dictionary."""
+
+        def isoformat(date: Optional[pd.Timestamp]) -> Optional[str]:
+            return None if date is None else date.isoformat()
+
+        return {
+            "last_date": isoformat(self.last_date),
+            "previous_date": isoformat(self.previous_date),
+            "tickers": {
+                ticker: [isoformat(date), value, isoformat(previous_date), previous]
+                for ticker, (date, value, previous_date, previous) in (
+                    self._entries.items()
+                )
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "PortfolioTickerHistory":
+        """Restore the state from a dictionary created by `to_dict`."""
+
+        def timestamp(date: Optional[str]) -> Optional[pd.Timestamp]:
+            return None if date is None else pd.Timestamp(date)
+
+        history = cls()
+        history.last_date = timestamp(state["last_date"])
+        history.previous_date = timestamp(state["previous_date"])
+        history._entries = {
+            ticker: (timestamp(date), value, timestamp(previous_date), previous)
+            for ticker, (date, value, previous_date, previous) in (
+                state["tickers"].items()
+            )
+        }
+        return history
+
+    def _previous(
+        self, ticker: str, date: pd.Timestamp
+    ) -> Tuple[Optional[pd.Timestamp], float]:
+        """Return the last date and value of the ticker reported before the date."""
+
+        entry = self._entries.get(ticker)
+        if entry is None:
+            return None, math.nan
+        if entry[0] < date:
+            return entry[0], entry[1]
+        if entry[0] == date and entry[2] is not None:
+            return entry[2], entry[3]
+
+        return None, math.nan
+
+    def _portfolio_dates(self, dates: pd.Index) -> List[pd.Timestamp]:
+        """Return the sorted portfolio dates known so far and found in the dates."""
+
+        known_dates = {self.previous_date, self.last_date} - {None}
+        return sorted(known_dates.union(dates.unique()))
+
+    def _previous_portfolio_dates(self, dates: pd.Index) -> np.ndarray:
+        """Return the portfolio date before every date."""
+
+        portfolio_dates = self._portfolio_dates(dates)
+        previous = dict(zip(portfolio_dates[1:], portfolio_dates[:-1]))
+        return np.array([previous.get(date) for date in dates], dtype="datetime64[ns]")
+
+
+class PortfolioDataReconcilerHistoryBase(PortfolioDataReconcilerBase):
+    """Base class for reconcilers checking values reported for the previous
+    day against the values actually reported on the previous portfolio date.
+
+    The reconcilers keep a `PortfolioTickerHistory` across chunks, so they
+    must see every chunk in order and can not run in chunk worker processes.
+    """
+
+    # column holding the value reported for the day
+    VALUE_COLUMN: str
+    # column holding the value reported for the previous day
+    YESTERDAY_COLUMN: str
+
+    def __init__(self):
+        super().__init__()
+
+        self.history = PortfolioTickerHistory()
+        self._recalc_column = self._recalculate_column_name_factory(
+            self.YESTERDAY_COLUMN
+        )
+        self._diff_column = self._difference_column_name_factory(self.YESTERDAY_COLUMN)
+
+        self.required_columns = (self.VALUE_COLUMN, self.YESTERDAY_COLUMN)
+
+    def reconcile_block(self, data: pd.DataFrame) -> PortfolioErrorBlock:
+        """Reconcile the data against the previous portfolio date and
+        remember its values for the next chunk."""
+
+        logger.info(f"Reconciling '{self.YESTERDAY_COLUMN}' history")
+        daily = self._daily_values(data)
+        calculated = self._row_values(data, daily, self.history.expected_values(daily))
+        self.store_calculated(data, calculated)
+        self.history.update(daily)
+
+        # relative deviation, as the values are compared across days
+        reported = data[self.YESTERDAY_COLUMN].astype(float)
+        data[self._diff_column] = reported / calculated - 1
+
+        mask = self._exceeds_tolerance(data[self._diff_column])
+        errors = self.error_block(data, mask, calculated)
+
+        logger.info(f"'{self.YESTERDAY_COLUMN}' history reconciled")
+        return errors
+
+    def error_block(
+        self, data: pd.DataFrame, mask: pd.Series, calculated: pd.Series
+    ) -> PortfolioErrorBlock:
+        """Build the block of errors for the masked rows."""
+
+        return PortfolioErrorBlock.from_frame(
+            data,
+            mask,
+            error_class=PortfolioErrorCalculation,
+            location=self.YESTERDAY_COLUMN,
+            value_column=self.YESTERDAY_COLUMN,
+            correct_values=calculated,
+        )
+
+    def calculate(self, data: pd.DataFrame) -> pd.Series:
+        """Look up the value reported on the previous portfolio date."""
+
+        daily = self._daily_values(data)
+        return self._row_values(data, daily, self.history.expected_values(daily))
+
+    def _daily_values(self, data: pd.DataFrame) -> pd.Series:
+        """Return the last value of every ticker and date, sorted by them."""
+
+        return (
+            data[self.VALUE_COLUMN]
+            .astype(float)
+            .groupby(
+                [
+                    data[PortfolioDataHeader.P_TICKER.value],
+                    data[PortfolioDataHeader.DATE.value],
+                ],
+                sort=True,
+            )
+            .last()
+        )
+
+    @staticmethod
+    def _row_values(
+        data: pd.DataFrame, daily: pd.Series, values: np.ndarray
+    ) -> pd.Series:
+        """Align values of every ticker and date with the rows of the data."""
+
+        rows = pd.MultiIndex.from_arrays(
+            [
+                data[PortfolioDataHeader.P_TICKER.value],
+                data[PortfolioDataHeader.DATE.value],
+            ]
+        )
+        aligned = pd.Series(values, index=daily.index).reindex(rows)
+        return pd.Series(aligned.to_numpy(), index=data.index)
@@ -1,12 +1,10 @@
 import logging
 from decimal import Decimal
-from typing import Iterator
 
 import pandas as pd
 
 from analyser.enums import PortfolioDataHeader
-from analyser.errors import PortfolioErrorCalculation
-from analyser.interfaces import PortfolioError
+from analyser.errors import PortfolioErrorBlock, PortfolioErrorCalculation
 from analyser.reconcilers.base import PortfolioDataReconcilerBase
 
 logger = logging.getLogger(__name__)
@@ -16,6 +14,8 @@ class PortfolioDataReconcilerMarketCap(PortfolioDataReconcilerBase):
     """Reconcile portfolio data for market cap."""
 
     ERROR_TOLERANCE = Decimal("1.0")
+    EXPRESSION = "sharesout * price * exchange_rate"
+    DEVIATION_EXPRESSION = "abs(market_cap_recalc - market_cap)"
 
     def __init__(self):
         super().__init__()
@@ -27,7 +27,14 @@ class PortfolioDataReconcilerMarketCap(PortfolioDataReconcilerBase):
             PortfolioDataHeader.MARKET_CAP.value
         )
 
-    def reconcile(self, data: pd.DataFrame) -> Iterator[PortfolioError]:
+        self.required_columns = (
+            PortfolioDataHeader.SHARESOUT.value,
+            PortfolioDataHeader.PRICE.value,
+            PortfolioDataHeader.EXCHANGE_RATE.value,
+            PortfolioDataHeader.MARKET_CAP.value,
+        )
+
+    def reconcile_block(self, data: pd.DataFrame) -> PortfolioErrorBlock:
         """Reconcile the data for market cap."""
 
         logger.info("Reconciling 'market cap'")
@@ -37,29 +44,34 @@ class PortfolioDataReconcilerMarketCap(PortfolioDataReconcilerBase):
             data[self._recalc_column] - data[PortfolioDataHeader.MARKET_CAP.value]
         )
         # find the rows where the difference is greater than the tolerance
-        mask = data[self._diff_column].abs() > self.ERROR_TOLERANCE
-        for _, row in data[mask].iterrows():
-            error = PortfolioErrorCalculation(
-                ticker=row[PortfolioDataHeader.P_TICKER.value],
-                location=PortfolioDataHeader.MARKET_CAP.value,
-                date=row[PortfolioDataHeader.DATE.value].date(),
-                value=row[PortfolioDataHeader.MARKET_CAP.value],
-                correct_value=row[self._recalc_column],
-            )
-            yield error
+        mask = self._exceeds_tolerance(data[self._diff_column])
+        errors = self.error_block(data, mask, data[self._recalc_column])
 
         logger.info("'market cap' reconciled")
+        return errors
 
-    def recalculate(self, data):
-        """Recalculate the data for market cap."""
+    def error_block(
+        self, data: pd.DataFrame, mask: pd.Series, calculated: pd.Series
+    ) -> PortfolioErrorBlock:
+        """Build the block of errors for the masked rows."""
 
-        if self._recalc_column in data:
-            return
+        return PortfolioErrorBlock.from_frame(
+            data,
+            mask,
+            error_class=PortfolioErrorCalculation,
+            location=PortfolioDataHeader.MARKET_CAP.value,
+            value_column=PortfolioDataHeader.MARKET_CAP.value,
+            correct_values=calculated,
+        )
+
+    def calculate(self, data: pd.DataFrame) -> pd.Series:
+        """Recalculate the data for market cap."""
 
         logger.debug("Recalculating 'market cap'")
-        data[self._recalc_column] = (
+        recalculated = (
             data[PortfolioDataHeader.SHARESOUT.value]
             * data[PortfolioDataHeader.PRICE.value]
             * data[PortfolioDataHeader.EXCHANGE_RATE.value]
         )
         logger.debug("Recalculated 'market cap'")
+        return recalculated
@@ -0,0 +1,13 @@
+from decimal import Decimal
+
+from analyser.enums import PortfolioDataHeader
+from analyser.reconcilers.history import PortfolioDataReconcilerHistoryBase
+
+
+class PortfolioDataReconcilerNavYesterday(PortfolioDataReconcilerHistoryBase):
+    """Reconcile yesterday's NAV against the NAV calculated the day before."""
+
+    # reported NAV usually differs slightly from the calculated one
+    ERROR_TOLERANCE = Decimal("0.05")
+    VALUE_COLUMN = PortfolioDataHeader.CALCULATED_NAV.value
+    YESTERDAY_COLUMN = PortfolioDataHeader.NAV_YESTERDAY.value
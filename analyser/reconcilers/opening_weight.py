@@ -1,12 +1,10 @@
 import logging
 from decimal import Decimal
-from typing import Iterator
 
 import pandas as pd
 
 from analyser.enums import PortfolioDataHeader
-from analyser.errors import PortfolioErrorCalculation
-from analyser.interfaces import PortfolioError
+from analyser.errors import PortfolioErrorBlock, PortfolioErrorCalculation
 from analyser.reconcilers.base import PortfolioDataReconcilerBase
 
 logger = logging.getLogger(__name__)
@@ -16,6 +14,8 @@ class PortfolioDataReconcilerOpeningWeight(PortfolioDataReconcilerBase):
     """Reconcile portfolio data for opening weight."""
 
     ERROR_TOLERANCE = Decimal("0.01")
+    EXPRESSION = "open_quantity * exchange_rate * price_yesterday / nav_yesterday"
+    DEVIATION_EXPRESSION = "abs(opening_weights_recalc - opening_weights)"
 
     def __init__(self):
         super().__init__()
@@ -27,7 +27,15 @@ class PortfolioDataReconcilerOpeningWeight(PortfolioDataReconcilerBase):
             PortfolioDataHeader.OPENING_WEIGHTS.value
         )
 
-    def reconcile(self, data: pd.DataFrame) -> Iterator[PortfolioError]:
+        self.required_columns = (
+            PortfolioDataHeader.OPEN_QUANTITY.value,
+            PortfolioDataHeader.EXCHANGE_RATE.value,
+            PortfolioDataHeader.PRICE_YESTERDAY.value,
+            PortfolioDataHeader.NAV_YESTERDAY.value,
+            PortfolioDataHeader.OPENING_WEIGHTS.value,
+        )
+
+    def reconcile_block(self, data: pd.DataFrame) -> PortfolioErrorBlock:
         """Reconcile the opening weights calculation."""
 
         logger.info("Reconciling opening weights")
@@ -37,28 +45,35 @@ class PortfolioDataReconcilerOpeningWeight(PortfolioDataReconcilerBase):
             data[self._recalc_column] - data[PortfolioDataHeader.OPENING_WEIGHTS.value]
         )
         # find the rows where the difference is greater than the tolerance
-        mask = data[self._diff_column].abs() > self.ERROR_TOLERANCE
-        for _, row in data[mask].iterrows():
-            error = PortfolioErrorCalculation(
-                ticker=row[PortfolioDataHeader.P_TICKER.value],
-                location=PortfolioDataHeader.OPENING_WEIGHTS.value,
-                date=row[PortfolioDataHeader.DATE.value].date(),
-                value=row[PortfolioDataHeader.OPENING_WEIGHTS.value],
-                correct_value=row[self._recalc_column],
-            )
-            yield error
+        mask = self._exceeds_tolerance(data[self._diff_column])
+        errors = self.error_block(data, mask, data[self._recalc_column])
 
         logger.info("Opening weights reconciled")
+        return errors
+
+    def error_block(
+        self, data: pd.DataFrame, mask: pd.Series, calculated: pd.Series
+    ) -> PortfolioErrorBlock:
+        """Build the block of errors for the masked rows."""
+
+        return PortfolioErrorBlock.from_frame(
+            data,
+            mask,
+            error_class=PortfolioErrorCalculation,
+            location=PortfolioDataHeader.OPENING_WEIGHTS.value,
+            value_column=PortfolioDataHeader.OPENING_WEIGHTS.value,
+            correct_values=calculated,
+        )
 
-    def recalculate(self, data: pd.DataFrame) -> None:
-        if self._recalc_column in data:
-            return
+    def calculate(self, data: pd.DataFrame) -> pd.Series:
+        """Recalculate the opening weights."""
 
         logger.debug("Recalculating opening weights")
-        data[self._recalc_column] = (
+        recalculated = (
             data[PortfolioDataHeader.OPEN_QUANTITY.value]
             * data[PortfolioDataHeader.EXCHANGE_RATE.value]
             * data[PortfolioDataHeader.PRICE_YESTERDAY.value]
             / data[PortfolioDataHeader.NAV_YESTERDAY.value]
         )
         logger.debug("Opening weights recalculated")
+        return recalculated
@@ -0,0 +1,35 @@
+from decimal import Decimal
+
+import pandas as pd
+
+from analyser.enums import PortfolioDataHeader
+from analyser.reconcilers.aggregate import PortfolioDataReconcilerAggregateBase
+
+
+class PortfolioDataReconcilerPerformanceContributionTotal(
+    PortfolioDataReconcilerAggregateBase
+):
+    """Reconcile the performance contributions of every date summing up to the
+    move of the NAV."""
+
+    ERROR_TOLERANCE = Decimal("0.0001")
+    AGGREGATIONS = {
+        PortfolioDataHeader.PERFORMANCE_CONTRIBUTION.value: "sum",
+        PortfolioDataHeader.CALCULATED_NAV.value: "last",
+        PortfolioDataHeader.NAV_YESTERDAY.value: "last",
+    }
+    LOCATION = "performance_contribution_total"
+
+    def total(self, totals: pd.DataFrame) -> pd.Series:
+        """Return the sum of performance contributions."""
+
+        return totals[PortfolioDataHeader.PERFORMANCE_CONTRIBUTION.value]
+
+    def expected(self, totals: pd.DataFrame) -> pd.Series:
+        """Return the relative move of the NAV since the previous day."""
+
+        return (
+            totals[PortfolioDataHeader.CALCULATED_NAV.value]
+            / totals[PortfolioDataHeader.NAV_YESTERDAY.value]
+            - 1
+        )
@@ -1,12 +1,10 @@
 import logging
 from decimal import Decimal
-from typing import Iterator
 
 import pandas as pd
 
 from analyser.enums import PortfolioDataHeader
-from analyser.errors import PortfolioErrorHighVolatility
-from analyser.interfaces import PortfolioError
+from analyser.errors import PortfolioErrorBlock, PortfolioErrorHighVolatility
 from analyser.reconcilers.base import PortfolioDataReconcilerBase
 
 logger = logging.getLogger(__name__)
@@ -16,40 +14,52 @@ class PortfolioDataReconcilerPriceFluctuation(PortfolioDataReconcilerBase):
     """Reconcile portfolio data for price fluctuation."""
 
     ERROR_TOLERANCE = Decimal("0.10")  # detech price changes greater than 10%
+    EXPRESSION = "price_yesterday / price - 1"
+    DEVIATION_EXPRESSION = "abs(price_volatility)"
 
     def __init__(self):
         super().__init__()
 
         self._recalc_column = "price_volatility"
 
-    def reconcile(self, data: pd.DataFrame) -> Iterator[PortfolioError]:
+        self.required_columns = (
+            PortfolioDataHeader.PRICE_YESTERDAY.value,
+            PortfolioDataHeader.PRICE.value,
+        )
+
+    def reconcile_block(self, data: pd.DataFrame) -> PortfolioErrorBlock:
         """Reconcile the data for price fluctuation."""
 
         logger.info("Reconciling 'price fluctuation'")
         self.recalculate(data)
 
-        mask = data[self._recalc_column].abs() > self.ERROR_TOLERANCE
-        for _, row in data[mask].iterrows():
-            error = PortfolioErrorHighVolatility(
-                ticker=row[PortfolioDataHeader.P_TICKER.value],
-                location=self._recalc_column,
-                date=row[PortfolioDataHeader.DATE.value].date(),
-                value=row[PortfolioDataHeader.PRICE.value],
-            )
-            yield error
+        mask = self._exceeds_tolerance(data[self._recalc_column])
+        errors = self.error_block(data, mask, data[self._recalc_column])
 
         logger.info("'price fluctuation' reconciled")
+        return errors
 
-    def recalculate(self, data):
-        """Recalculate the data for price fluctuation."""
+    def error_block(
+        self, data: pd.DataFrame, mask: pd.Series, calculated: pd.Series
+    ) -> PortfolioErrorBlock:
+        """Build the block of errors for the masked rows."""
 
-        if self._recalc_column in data:
-            return
+        return PortfolioErrorBlock.from_frame(
+            data,
+            mask,
+            error_class=PortfolioErrorHighVolatility,
+            location=self._recalc_column,
+            value_column=PortfolioDataHeader.PRICE.value,
+        )
+
+    def calculate(self, data: pd.DataFrame) -> pd.Series:
+        """Recalculate the data for price fluctuation."""
 
         logger.debug("Calculating 'price fluctuation'")
-        data[self._recalc_column] = (
+        recalculated = (
             data[PortfolioDataHeader.PRICE_YESTERDAY.value]
             / data[PortfolioDataHeader.PRICE.value]
             - 1
         )
         logger.debug("'price fluctuation' calculated")
+        return recalculated
@@ -0,0 +1,12 @@
+from decimal import Decimal
+
+from analyser.enums import PortfolioDataHeader
+from analyser.reconcilers.history import PortfolioDataReconcilerHistoryBase
+
+
+class PortfolioDataReconcilerPriceYesterday(PortfolioDataReconcilerHistoryBase):
+    """Reconcile yesterday's price against the price reported the day before."""
+
+    ERROR_TOLERANCE = Decimal("0.0001")
+    VALUE_COLUMN = PortfolioDataHeader.PRICE.value
+    YESTERDAY_COLUMN = PortfolioDataHeader.PRICE_YESTERDAY.value
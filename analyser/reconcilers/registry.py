@@ -0,0 +1,289 @@
+import importlib
+import json
+import logging
+from dataclasses import dataclass, field
+from decimal import Decimal
+from importlib.metadata import entry_points
+from typing import Dict, List, Optional, Sequence, Set, Type
+
+from analyser.enums import PortfolioDataHeader
+from analyser.reconcilers.base import PortfolioDataReconcilerBase
+
+logger = logging.getLogger(__name__)
+
+# entry point group of reconcilers installed by other packages
+ENTRY_POINT_GROUP = "portfolio_analyser.reconcilers"
+
+# Built-in reconcilers by name, as "module:class". Modules are only imported
+# when their reconciler is selected.
+BUILTIN_RECONCILERS = {
+    "opening_weight": (
+        "analyser.reconcilers.opening_weight:PortfolioDataReconcilerOpeningWeight"
+    ),
+    "closing_weight": (
+        "analyser.reconcilers.closing_weight:PortfolioDataReconcilerClosingWeight"
+    ),
+    "value_in_usd": (
+        "analyser.reconcilers.value_in_usd:PortfolioDataReconcilerValueInUSD"
+    ),
+    "traded_today": (
+        "analyser.reconcilers.traded_today:PortfolioDataReconcilerTradedToday"
+    ),
+    "trade_day_move": (
+        "analyser.reconcilers.trade_day_move:PortfolioDataReconcilerTradeDayMove"
+    ),
+    "trade_weight": (
+        "analyser.reconcilers.trade_weight:PortfolioDataReconcilerTradeWeight"
+    ),
+    "return_adjustments": (
+        "analyser.reconcilers.return_adjustments:"
+        "PortfolioDataReconcilerReturnAdjustments"
+    ),
+    "total_return": (
+        "analyser.reconcilers.total_return:PortfolioDataReconcilerTotalReturn"
+    ),
+    "close_weight_abs": (
+        "analyser.reconcilers.close_weight_abs:PortfolioDataReconcilerCloseWeightAbs"
+    ),
+    "dollar_pnl": "analyser.reconcilers.dollar_pnl:PortfolioDataReconcilerDollarPnL",
+    "market_cap": "analyser.reconcilers.market_cap:PortfolioDataReconcilerMarketCap",
+    "price_fluctuation": (
+        "analyser.reconcilers.price_fluctuation:"
+        "PortfolioDataReconcilerPriceFluctuation"
+    ),
+    "price_yesterday": (
+        "analyser.reconcilers.price_yesterday:PortfolioDataReconcilerPriceYesterday"
+    ),
+    "nav_yesterday": (
+        "analyser.reconcilers.nav_yesterday:PortfolioDataReconcilerNavYesterday"
+    ),
+    "closing_weight_total": (
+        "analyser.reconcilers.closing_weight_total:"
+        "PortfolioDataReconcilerClosingWeightTotal"
+    ),
+    "close_weight_abs_total": (
+        "analyser.reconcilers.close_weight_abs_total:"
+        "PortfolioDataReconcilerCloseWeightAbsTotal"
+    ),
+    "value_in_usd_total": (
+        "analyser.reconcilers.value_in_usd_total:"
+        "PortfolioDataReconcilerValueInUSDTotal"
+    ),
+    "performance_contribution_total": (
+        "analyser.reconcilers.performance_contribution_total:"
+        "PortfolioDataReconcilerPerformanceContributionTotal"
+    ),
+}
+
+# reconcilers run by default, in the order their errors are reported
+DEFAULT_RECONCILERS = (
+    "opening_weight",
+    "closing_weight",
+    "value_in_usd",
+    "traded_today",
+    "trade_day_move",
+    "trade_weight",
+    "return_adjustments",
+    "total_return",
+    "close_weight_abs",
+    "dollar_pnl",
+    "market_cap",
+    "price_fluctuation",
+)
+# reconcilers added by `history_checks`
+HISTORY_RECONCILERS = ("price_yesterday", "nav_yesterday")
+# reconcilers added by `aggregate_checks`
+AGGREGATE_RECONCILERS = (
+    "closing_weight_total",
+    "close_weight_abs_total",
+    "value_in_usd_total",
+    "performance_contribution_total",
+)
+
+
+class ReconcilerRegistryError(ValueError):
+    """Reconciler can not be found or loaded."""
+
+
+class PortfolioReconcilerRegistry:
+    """Registry of reconcilers by name.
+
+    Reconcilers are registered as "module:class" targets, the built-in ones
+    from `BUILTIN_RECONCILERS` and others from the `ENTRY_POINT_GROUP` entry
+    points of installed packages or with `register`. A module is only
+    imported when one of its reconcilers is created, so running a subset of
+    checks doesn't pay for importing the others.
+
+    Reconcilers providing the derived columns a selected reconciler requires
+    are added to the selection, so e.g. "total_return" can be selected alone.
+    Only then are other modules imported, to find the providers.
+    """
+
+    def __init__(self, targets: Optional[Dict[str, str]] = None):
+        self._targets = dict(BUILTIN_RECONCILERS if targets is None else targets)
+        self._entry_points = None
+
+    @property
+    def names(self) -> List[str]:
+        """Return the names of all known reconcilers."""
+
+        return list(self._targets) + [
+            name for name in self._load_entry_points() if name not in self._targets
+        ]
+
+    def register(self, name: str, target: str) -> None:
+        """Register a reconciler class given as "module:class"."""
+
+        self._targets[name] = target
+
+    def load(self, name: str) -> Type[PortfolioDataReconcilerBase]:
+        """Import and return the class of a reconciler."""
+
+        target = self._targets.get(name)
+        if target is None:
+            entry_point = self._load_entry_points().get(name)
+            if entry_point is None:
+                raise ReconcilerRegistryError(
+                    f"Unknown reconciler '{name}', "
+                    f"known reconcilers: {', '.join(self.names)}."
+                )
+            return entry_point.load()
+
+        module_name, _, class_name = target.partition(":")
+        try:
+            return getattr(importlib.import_module(module_name), class_name)
+        except (ImportError, AttributeError) as exc:
+            raise ReconcilerRegistryError(
+                f"Reconciler '{name}' can not be loaded from '{target}': {exc}"
+            ) from exc
+
+    def create(
+        self,
+        names: Sequence[str],
+        tolerances: Optional[Dict[str, Decimal]] = None,
+    ) -> List[PortfolioDataReconcilerBase]:
+        """Create the reconcilers, in the given order.
+
+        `tolerances` overrides the `ERROR_TOLERANCE` of reconcilers by name.
+        Reconcilers providing columns required by the selected ones, and not
+        selected themselves, are added before the first reconciler requiring
+        them, with their errors reported too.
+        """
+
+        tolerances = tolerances or {}
+        unknown = set(tolerances) - set(names)
+        if unknown:
+            raise ReconcilerRegistryError(
+                f"Tolerances given for reconcilers which are not selected: "
+                f"{', '.join(sorted(unknown))}."
+            )
+
+        selected = []
+        for name in names:
+            reconciler = self.load(name)()
+            if name in tolerances:
+                reconciler.ERROR_TOLERANCE = Decimal(str(tolerances[name]))
+                logger.info(
+                    f"Error tolerance of '{name}' set to {reconciler.ERROR_TOLERANCE}"
+                )
+            selected.append((name, reconciler))
+
+        return self._with_providers(selected)
+
+    def _with_providers(self, selected: list) -> List[PortfolioDataReconcilerBase]:
+        """Add the providers of derived columns missing from the selection."""
+
+        available = {header.value for header in PortfolioDataHeader}
+        available.update(
+            column
+            for _, reconciler in selected
+            for column in reconciler.provided_columns
+        )
+        names = {name for name, _ in selected}
+        reconcilers = []
+
+        def add(name: str, reconciler: PortfolioDataReconcilerBase) -> None:
+            for column in reconciler.required_columns:
+                if column in available:
+                    continue
+                provider_name, provider = self._find_provider(column, names)
+                if provider is None:
+                    raise ReconcilerRegistryError(
+                        f"Column '{column}' required by reconciler '{name}' is "
+                        "neither in the data nor provided by a known reconciler."
+                    )
+                logger.info(
+                    f"Reconciler '{provider_name}' added, '{name}' requires "
+                    f"its column '{column}'"
+                )
+                names.add(provider_name)
+                available.update(provider.provided_columns)
+                add(provider_name, provider)
+            reconcilers.append(reconciler)
+
+        for name, reconciler in selected:
+            add(name, reconciler)
+
+        return reconcilers
+
+    def _find_provider(self, column: str, excluded: Set[str]) -> tuple:
+        """Return the name and a new instance of the reconciler providing the
+        column, or (None, None)."""
+
+        for name in self.names:
+            if name in excluded:
+                continue
+            try:
+                reconciler = self.load(name)()
+            except (ReconcilerRegistryError, ImportError, AttributeError):
+                logger.debug(f"Reconciler '{name}' skipped, it can not be loaded")
+                continue
+            if column in reconciler.provided_columns:
+                return name, reconciler
+
+        return None, None
+
+    def _load_entry_points(self) -> dict:
+        if self._entry_points is None:
+            self._entry_points = {
+                entry_point.name: entry_point
+                for entry_point in entry_points(group=ENTRY_POINT_GROUP)
+            }
+
+        return self._entry_points
+
+
+@dataclass
+class PortfolioReconcilerConfig:
+    """Selection of reconcilers and their tolerance overrides.
+
+    Read from a JSON file like
+
+        {"reconcilers": ["price_fluctuation"],
+         "tolerances": {"price_fluctuation": "0.2"}}
+
+    Without "reconcilers", the default reconcilers are selected.
+    """
+
+    reconcilers: Optional[List[str]] = None
+    tolerances: Dict[str, Decimal] = field(default_factory=dict)
+
+    @classmethod
+    def from_file(cls, config_path: str) -> "PortfolioReconcilerConfig":
+        with open(config_path) as config_file:
+            config = json.load(config_file)
+
+        unknown = set(config) - {"reconcilers", "tolerances"}
+        if unknown:
+            raise ReconcilerRegistryError(
+                f"Unknown keys in reconciler config {config_path}: "
+                f"{', '.join(sorted(unknown))}."
+            )
+
+        return cls(
+            reconcilers=config.get("reconcilers"),
+            tolerances={
+                name: Decimal(str(tolerance))
+                for name, tolerance in config.get("tolerances", {}).items()
+            },
+        )
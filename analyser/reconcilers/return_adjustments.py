@@ -1,12 +1,10 @@
 import logging
 from decimal import Decimal
-from typing import Iterator
 
 import pandas as pd
 
 from analyser.enums import PortfolioDataHeader
-from analyser.errors import PortfolioErrorCalculation
-from analyser.interfaces import PortfolioError
+from analyser.errors import PortfolioErrorBlock, PortfolioErrorCalculation
 from analyser.reconcilers.base import PortfolioDataReconcilerBase
 
 logger = logging.getLogger(__name__)
@@ -16,6 +14,12 @@ class PortfolioDataReconcilerReturnAdjustments(PortfolioDataReconcilerBase):
     """Reconcile portfolio data for return adjustments."""
 
     ERROR_TOLERANCE = Decimal("0.01")
+    EXPRESSION = (
+        "where(has_side, where(is_short,"
+        " -traded_today * (trade_price - price) / calculated_nav,"
+        " traded_today * (price - trade_price) / calculated_nav), nan)"
+    )
+    DEVIATION_EXPRESSION = "abs(return_adjustments_recalc - return_adjustments)"
 
     def __init__(self):
         super().__init__()
@@ -27,7 +31,16 @@ class PortfolioDataReconcilerReturnAdjustments(PortfolioDataReconcilerBase):
             PortfolioDataHeader.RETURN_ADJUSTMENTS.value
         )
 
-    def reconcile(self, data: pd.DataFrame) -> Iterator[PortfolioError]:
+        self.required_columns = (
+            PortfolioDataHeader.SHORT_POS.value,
+            PortfolioDataHeader.TRADED_TODAY.value,
+            PortfolioDataHeader.TRADE_PRICE.value,
+            PortfolioDataHeader.PRICE.value,
+            PortfolioDataHeader.CALCULATED_NAV.value,
+            PortfolioDataHeader.RETURN_ADJUSTMENTS.value,
+        )
+
+    def reconcile_block(self, data: pd.DataFrame) -> PortfolioErrorBlock:
         """Reconcile the data for return adjustments."""
 
         logger.info("Reconciling 'return adjustments'")
@@ -38,46 +51,40 @@ class PortfolioDataReconcilerReturnAdjustments(PortfolioDataReconcilerBase):
             - data[PortfolioDataHeader.RETURN_ADJUSTMENTS.value]
         )
         # find the rows where the difference is greater than the tolerance
-        mask = data[self._diff_column].abs() > self.ERROR_TOLERANCE
-        for _, row in data[mask].iterrows():
-            error = PortfolioErrorCalculation(
-                ticker=row[PortfolioDataHeader.P_TICKER.value],
-                location=PortfolioDataHeader.RETURN_ADJUSTMENTS.value,
-                date=row[PortfolioDataHeader.DATE.value].date(),
-                value=row[PortfolioDataHeader.RETURN_ADJUSTMENTS.value],
-                correct_value=row[self._recalc_column],
-            )
-            yield error
+        mask = self._exceeds_tolerance(data[self._diff_column])
+        errors = self.error_block(data, mask, data[self._recalc_column])
 
         logger.info("'return adjustments' reconciled")
+        return errors
 
-    def recalculate(self, data):
-        """Recalculate the data for return adjustments."""
+    def error_block(
+        self, data: pd.DataFrame, mask: pd.Series, calculated: pd.Series
+    ) -> PortfolioErrorBlock:
+        """Build the block of errors for the masked rows."""
 
-        if self._recalc_column in data:
-            return
+        return PortfolioErrorBlock.from_frame(
+            data,
+            mask,
+            error_class=PortfolioErrorCalculation,
+            location=PortfolioDataHeader.RETURN_ADJUSTMENTS.value,
+            value_column=PortfolioDataHeader.RETURN_ADJUSTMENTS.value,
+            correct_values=calculated,
+        )
+
+    def calculate(self, data: pd.DataFrame) -> pd.Series:
+        """Recalculate the data for return adjustments."""
 
         logger.debug("Recalculating 'return adjustments'")
-        short_pos_data = data.loc[data[PortfolioDataHeader.SHORT_POS.value] == True]
-        data.loc[
-            data[PortfolioDataHeader.SHORT_POS.value] == True, self._recalc_column
-        ] = (
-            -short_pos_data[PortfolioDataHeader.TRADED_TODAY.value]
-            * (
-                short_pos_data[PortfolioDataHeader.TRADE_PRICE.value]
-                - short_pos_data[PortfolioDataHeader.PRICE.value]
-            )
-            / short_pos_data[PortfolioDataHeader.CALCULATED_NAV.value]
-        )
-        long_pos_data = data.loc[data[PortfolioDataHeader.SHORT_POS.value] == False]
-        data.loc[
-            data[PortfolioDataHeader.SHORT_POS.value] == False, self._recalc_column
-        ] = (
-            long_pos_data[PortfolioDataHeader.TRADED_TODAY.value]
-            * (
-                long_pos_data[PortfolioDataHeader.PRICE.value]
-                - long_pos_data[PortfolioDataHeader.TRADE_PRICE.value]
+        traded_today = data[PortfolioDataHeader.TRADED_TODAY.value]
+        trade_price = data[PortfolioDataHeader.TRADE_PRICE.value]
+        price = data[PortfolioDataHeader.PRICE.value]
+        recalculated = (
+            self._select_by_position(
+                data,
+                short_values=-traded_today * (trade_price - price),
+                long_values=traded_today * (price - trade_price),
             )
-            / long_pos_data[PortfolioDataHeader.CALCULATED_NAV.value]
+            / data[PortfolioDataHeader.CALCULATED_NAV.value]
         )
         logger.debug("Recalculated 'return adjustments'")
+        return recalculated
@@ -1,12 +1,10 @@
 import logging
 from decimal import Decimal
-from typing import Iterator
 
 import pandas as pd
 
 from analyser.enums import PortfolioDataHeader
-from analyser.errors import PortfolioErrorCalculation
-from analyser.interfaces import PortfolioError
+from analyser.errors import PortfolioErrorBlock, PortfolioErrorCalculation
 from analyser.reconcilers.base import PortfolioDataReconcilerBase
 
 logger = logging.getLogger(__name__)
@@ -16,6 +14,15 @@ class PortfolioDataReconcilerTotalReturn(PortfolioDataReconcilerBase):
     """Reconcile portfolio data for total return."""
 
     ERROR_TOLERANCE = Decimal("0.01")
+    EXPRESSION = (
+        "where(has_side, where(is_short,"
+        " (price_yesterday - price) / price_yesterday,"
+        " (price - price_yesterday) / price_yesterday), nan)"
+        " * abs((close_quantity - traded_today) * price * exchange_rate)"
+        " / calculated_nav"
+        " + return_adjustments_recalc"
+    )
+    DEVIATION_EXPRESSION = "abs(total_return_recalc - total_return)"
 
     def __init__(self):
         super().__init__()
@@ -30,7 +37,19 @@ class PortfolioDataReconcilerTotalReturn(PortfolioDataReconcilerBase):
             PortfolioDataHeader.RETURN_ADJUSTMENTS.value
         )
 
-    def reconcile(self, data: pd.DataFrame) -> Iterator[PortfolioError]:
+        self.required_columns = (
+            PortfolioDataHeader.SHORT_POS.value,
+            PortfolioDataHeader.PRICE_YESTERDAY.value,
+            PortfolioDataHeader.PRICE.value,
+            PortfolioDataHeader.CLOSE_QUANTITY.value,
+            PortfolioDataHeader.TRADED_TODAY.value,
+            PortfolioDataHeader.EXCHANGE_RATE.value,
+            PortfolioDataHeader.CALCULATED_NAV.value,
+            self._recalc_column_return_adjustments,
+            PortfolioDataHeader.TOTAL_RETURN.value,
+        )
+
+    def reconcile_block(self, data: pd.DataFrame) -> PortfolioErrorBlock:
         """Reconcile the data for total return."""
 
         logger.info("Reconciling 'total return'")
@@ -40,66 +59,48 @@ class PortfolioDataReconcilerTotalReturn(PortfolioDataReconcilerBase):
             data[self._recalc_column] - data[PortfolioDataHeader.TOTAL_RETURN.value]
         )
         # find the rows where the difference is greater than the tolerance
-        mask = data[self._diff_column].abs() > self.ERROR_TOLERANCE
-        for _, row in data[mask].iterrows():
-            error = PortfolioErrorCalculation(
-                ticker=row[PortfolioDataHeader.P_TICKER.value],
-                location=PortfolioDataHeader.TOTAL_RETURN.value,
-                date=row[PortfolioDataHeader.DATE.value].date(),
-                value=row[PortfolioDataHeader.TOTAL_RETURN.value],
-                correct_value=row[self._recalc_column],
-            )
-            yield error
+        mask = self._exceeds_tolerance(data[self._diff_column])
+        errors = self.error_block(data, mask, data[self._recalc_column])
 
         logger.info("'total return' reconciled")
+        return errors
 
-    def recalculate(self, data):
-        """Recalculate the data for total return."""
+    def error_block(
+        self, data: pd.DataFrame, mask: pd.Series, calculated: pd.Series
+    ) -> PortfolioErrorBlock:
+        """Build the block of errors for the masked rows."""
+
+        return PortfolioErrorBlock.from_frame(
+            data,
+            mask,
+            error_class=PortfolioErrorCalculation,
+            location=PortfolioDataHeader.TOTAL_RETURN.value,
+            value_column=PortfolioDataHeader.TOTAL_RETURN.value,
+            correct_values=calculated,
+        )
 
-        if self._recalc_column in data:
-            return
+    def calculate(self, data: pd.DataFrame) -> pd.Series:
+        """Recalculate the data for total return."""
 
         logger.debug("Recalculating 'total return'")
-        short_pos_data = data.loc[data[PortfolioDataHeader.SHORT_POS.value] == True]
-        data.loc[
-            data[PortfolioDataHeader.SHORT_POS.value] == True, self._recalc_column
-        ] = (
-            (
-                short_pos_data[PortfolioDataHeader.PRICE_YESTERDAY.value]
-                - short_pos_data[PortfolioDataHeader.PRICE.value]
-            )
-            / short_pos_data[PortfolioDataHeader.PRICE_YESTERDAY.value]
-            * (
-                (
-                    short_pos_data[PortfolioDataHeader.CLOSE_QUANTITY.value]
-                    - short_pos_data[PortfolioDataHeader.TRADED_TODAY.value]
-                )
-                * short_pos_data[PortfolioDataHeader.PRICE.value]
-                * short_pos_data[PortfolioDataHeader.EXCHANGE_RATE.value]
-            ).abs()
-            / short_pos_data[PortfolioDataHeader.CALCULATED_NAV.value]
-        ) + short_pos_data[
-            self._recalc_column_return_adjustments
-        ]
-        long_pos_data = data.loc[data[PortfolioDataHeader.SHORT_POS.value] == False]
-        data.loc[
-            data[PortfolioDataHeader.SHORT_POS.value] == False, self._recalc_column
-        ] = (
-            (
-                long_pos_data[PortfolioDataHeader.PRICE.value]
-                - long_pos_data[PortfolioDataHeader.PRICE_YESTERDAY.value]
+        price = data[PortfolioDataHeader.PRICE.value]
+        price_yesterday = data[PortfolioDataHeader.PRICE_YESTERDAY.value]
+        recalculated = (
+            self._select_by_position(
+                data,
+                short_values=price_yesterday - price,
+                long_values=price - price_yesterday,
             )
-            / long_pos_data[PortfolioDataHeader.PRICE_YESTERDAY.value]
+            / price_yesterday
             * (
                 (
-                    long_pos_data[PortfolioDataHeader.CLOSE_QUANTITY.value]
-                    - long_pos_data[PortfolioDataHeader.TRADED_TODAY.value]
+                    data[PortfolioDataHeader.CLOSE_QUANTITY.value]
+                    - data[PortfolioDataHeader.TRADED_TODAY.value]
                 )
-                * long_pos_data[PortfolioDataHeader.PRICE.value]
-                * long_pos_data[PortfolioDataHeader.EXCHANGE_RATE.value]
+                * price
+                * data[PortfolioDataHeader.EXCHANGE_RATE.value]
             ).abs()
-            / long_pos_data[PortfolioDataHeader.CALCULATED_NAV.value]
-        ) + long_pos_data[
-            self._recalc_column_return_adjustments
-        ]
+            / data[PortfolioDataHeader.CALCULATED_NAV.value]
+        ) + data[self._recalc_column_return_adjustments]
         logger.debug("'total return' recalculated")
+        return recalculated
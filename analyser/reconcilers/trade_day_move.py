@@ -1,12 +1,10 @@
 import logging
 from decimal import Decimal
-from typing import Iterator
 
 import pandas as pd
 
 from analyser.enums import PortfolioDataHeader
-from analyser.errors import PortfolioErrorCalculation
-from analyser.interfaces import PortfolioError
+from analyser.errors import PortfolioErrorBlock, PortfolioErrorCalculation
 from analyser.reconcilers.base import PortfolioDataReconcilerBase
 
 logger = logging.getLogger(__name__)
@@ -16,6 +14,8 @@ class PortfolioDataReconcilerTradeDayMove(PortfolioDataReconcilerBase):
     """Reconcile portfolio data for trade day move."""
 
     ERROR_TOLERANCE = Decimal("0.01")
+    EXPRESSION = "(price - trade_price) / trade_price"
+    DEVIATION_EXPRESSION = "abs(trade_day_move_recalc - trade_day_move)"
 
     def __init__(self):
         super().__init__()
@@ -27,7 +27,13 @@ class PortfolioDataReconcilerTradeDayMove(PortfolioDataReconcilerBase):
             PortfolioDataHeader.TRADE_DAY_MOVE.value
         )
 
-    def reconcile(self, data: pd.DataFrame) -> Iterator[PortfolioError]:
+        self.required_columns = (
+            PortfolioDataHeader.PRICE.value,
+            PortfolioDataHeader.TRADE_PRICE.value,
+            PortfolioDataHeader.TRADE_DAY_MOVE.value,
+        )
+
+    def reconcile_block(self, data: pd.DataFrame) -> PortfolioErrorBlock:
         """Reconcile the data for trade day move."""
 
         logger.info("Reconciling 'trade day move'")
@@ -37,28 +43,33 @@ class PortfolioDataReconcilerTradeDayMove(PortfolioDataReconcilerBase):
             data[self._recalc_column] - data[PortfolioDataHeader.TRADE_DAY_MOVE.value]
         )
         # find the rows where the difference is greater than the tolerance
-        mask = data[self._diff_column].abs() > self.ERROR_TOLERANCE
-        for _, row in data[mask].iterrows():
-            error = PortfolioErrorCalculation(
-                ticker=row[PortfolioDataHeader.P_TICKER.value],
-                location=PortfolioDataHeader.TRADE_DAY_MOVE.value,
-                date=row[PortfolioDataHeader.DATE.value].date(),
-                value=row[PortfolioDataHeader.TRADE_DAY_MOVE.value],
-                correct_value=row[self._recalc_column],
-            )
-            yield error
+        mask = self._exceeds_tolerance(data[self._diff_column])
+        errors = self.error_block(data, mask, data[self._recalc_column])
 
         logger.info("'trade day move' reconciled")
+        return errors
 
-    def recalculate(self, data):
-        """Recalculate the data for trade day move."""
+    def error_block(
+        self, data: pd.DataFrame, mask: pd.Series, calculated: pd.Series
+    ) -> PortfolioErrorBlock:
+        """Build the block of errors for the masked rows."""
 
-        if self._recalc_column in data:
-            return
+        return PortfolioErrorBlock.from_frame(
+            data,
+            mask,
+            error_class=PortfolioErrorCalculation,
+            location=PortfolioDataHeader.TRADE_DAY_MOVE.value,
+            value_column=PortfolioDataHeader.TRADE_DAY_MOVE.value,
+            correct_values=calculated,
+        )
+
+    def calculate(self, data: pd.DataFrame) -> pd.Series:
+        """Recalculate the data for trade day move."""
 
         logger.debug("Recalculating 'trade day move'")
-        data[self._recalc_column] = (
+        recalculated = (
             data[PortfolioDataHeader.PRICE.value]
             - data[PortfolioDataHeader.TRADE_PRICE.value]
         ) / data[PortfolioDataHeader.TRADE_PRICE.value]
         logger.debug("Recalculated 'trade day move'")
+        return recalculated
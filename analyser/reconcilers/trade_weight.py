@@ -1,12 +1,10 @@
 import logging
 from decimal import Decimal
-from typing import Iterator
 
 import pandas as pd
 
 from analyser.enums import PortfolioDataHeader
-from analyser.errors import PortfolioErrorCalculation
-from analyser.interfaces import PortfolioError
+from analyser.errors import PortfolioErrorBlock, PortfolioErrorCalculation
 from analyser.reconcilers.base import PortfolioDataReconcilerBase
 
 logger = logging.getLogger(__name__)
@@ -16,6 +14,8 @@ class PortfolioDataReconcilerTradeWeight(PortfolioDataReconcilerBase):
     """Reconcile portfolio data for trade weight."""
 
     ERROR_TOLERANCE = Decimal("0.01")
+    EXPRESSION = "traded_today * trade_price * exchange_rate / nav_yesterday"
+    DEVIATION_EXPRESSION = "abs(trade_weight_recalc - trade_weight)"
 
     def __init__(self):
         super().__init__()
@@ -27,7 +27,15 @@ class PortfolioDataReconcilerTradeWeight(PortfolioDataReconcilerBase):
             PortfolioDataHeader.TRADE_WEIGHT.value
         )
 
-    def reconcile(self, data: pd.DataFrame) -> Iterator[PortfolioError]:
+        self.required_columns = (
+            PortfolioDataHeader.TRADED_TODAY.value,
+            PortfolioDataHeader.TRADE_PRICE.value,
+            PortfolioDataHeader.EXCHANGE_RATE.value,
+            PortfolioDataHeader.NAV_YESTERDAY.value,
+            PortfolioDataHeader.TRADE_WEIGHT.value,
+        )
+
+    def reconcile_block(self, data: pd.DataFrame) -> PortfolioErrorBlock:
         """Reconcile the trade weight calculation."""
 
         logger.info("Reconciling trade weight")
@@ -37,30 +45,35 @@ class PortfolioDataReconcilerTradeWeight(PortfolioDataReconcilerBase):
             data[self._recalc_column] - data[PortfolioDataHeader.TRADE_WEIGHT.value]
         )
         # find the rows where the difference is greater than the tolerance
-        mask = data[self._diff_column].abs() > self.ERROR_TOLERANCE
-        for _, row in data[mask].iterrows():
-            error = PortfolioErrorCalculation(
-                ticker=row[PortfolioDataHeader.P_TICKER.value],
-                location=PortfolioDataHeader.TRADE_WEIGHT.value,
-                date=row[PortfolioDataHeader.DATE.value].date(),
-                value=row[PortfolioDataHeader.TRADE_WEIGHT.value],
-                correct_value=row[self._recalc_column],
-            )
-            yield error
+        mask = self._exceeds_tolerance(data[self._diff_column])
+        errors = self.error_block(data, mask, data[self._recalc_column])
 
         logger.info("Trade weight reconciled")
+        return errors
 
-    def recalculate(self, data: pd.DataFrame):
-        """Recalculate the trade weight."""
+    def error_block(
+        self, data: pd.DataFrame, mask: pd.Series, calculated: pd.Series
+    ) -> PortfolioErrorBlock:
+        """Build the block of errors for the masked rows."""
 
-        if self._recalc_column in data:
-            return
+        return PortfolioErrorBlock.from_frame(
+            data,
+            mask,
+            error_class=PortfolioErrorCalculation,
+            location=PortfolioDataHeader.TRADE_WEIGHT.value,
+            value_column=PortfolioDataHeader.TRADE_WEIGHT.value,
+            correct_values=calculated,
+        )
+
+    def calculate(self, data: pd.DataFrame) -> pd.Series:
+        """Recalculate the trade weight."""
 
         logger.debug("Recalculating trade weight")
-        data[self._recalc_column] = (
+        recalculated = (
             data[PortfolioDataHeader.TRADED_TODAY.value]
             * data[PortfolioDataHeader.TRADE_PRICE.value]
             * data[PortfolioDataHeader.EXCHANGE_RATE.value]
             / data[PortfolioDataHeader.NAV_YESTERDAY.value]
         )
         logger.debug("Trade weight recalculated")
+        return recalculated
@@ -1,12 +1,10 @@
 import logging
 from decimal import Decimal
-from typing import Iterator
 
 import pandas as pd
 
 from analyser.enums import PortfolioDataHeader
-from analyser.errors import PortfolioErrorCalculation
-from analyser.interfaces import PortfolioError
+from analyser.errors import PortfolioErrorBlock, PortfolioErrorCalculation
 from analyser.reconcilers.base import PortfolioDataReconcilerBase
 
 logger = logging.getLogger(__name__)
@@ -16,6 +14,8 @@ class PortfolioDataReconcilerTradedToday(PortfolioDataReconcilerBase):
     """Reconcile portfolio data for traded today."""
 
     ERROR_TOLERANCE = Decimal("0.0")
+    EXPRESSION = "close_quantity - open_quantity"
+    DEVIATION_EXPRESSION = "abs(traded_today_recalc - traded_today)"
 
     def __init__(self):
         super().__init__()
@@ -27,7 +27,13 @@ class PortfolioDataReconcilerTradedToday(PortfolioDataReconcilerBase):
             PortfolioDataHeader.TRADED_TODAY.value
         )
 
-    def reconcile(self, data: pd.DataFrame) -> Iterator[PortfolioError]:
+        self.required_columns = (
+            PortfolioDataHeader.CLOSE_QUANTITY.value,
+            PortfolioDataHeader.OPEN_QUANTITY.value,
+            PortfolioDataHeader.TRADED_TODAY.value,
+        )
+
+    def reconcile_block(self, data: pd.DataFrame) -> PortfolioErrorBlock:
         """Reconcile the data for traded today."""
 
         logger.info("Reconciling 'traded today'")
@@ -37,28 +43,33 @@ class PortfolioDataReconcilerTradedToday(PortfolioDataReconcilerBase):
             data[self._recalc_column] - data[PortfolioDataHeader.TRADED_TODAY.value]
         )
         # find the rows where the difference is greater than the tolerance
-        mask = data[self._diff_column].abs() > self.ERROR_TOLERANCE
-        for _, row in data[mask].iterrows():
-            error = PortfolioErrorCalculation(
-                ticker=row[PortfolioDataHeader.P_TICKER.value],
-                location=PortfolioDataHeader.TRADED_TODAY.value,
-                date=row[PortfolioDataHeader.DATE.value].date(),
-                value=row[PortfolioDataHeader.TRADED_TODAY.value],
-                correct_value=row[self._recalc_column],
-            )
-            yield error
+        mask = self._exceeds_tolerance(data[self._diff_column])
+        errors = self.error_block(data, mask, data[self._recalc_column])
 
         logger.info("'traded today' reconciled")
+        return errors
 
-    def recalculate(self, data):
-        """Recalculate the data for traded today."""
+    def error_block(
+        self, data: pd.DataFrame, mask: pd.Series, calculated: pd.Series
+    ) -> PortfolioErrorBlock:
+        """Build the block of errors for the masked rows."""
 
-        if self._recalc_column in data:
-            return
+        return PortfolioErrorBlock.from_frame(
+            data,
+            mask,
+            error_class=PortfolioErrorCalculation,
+            location=PortfolioDataHeader.TRADED_TODAY.value,
+            value_column=PortfolioDataHeader.TRADED_TODAY.value,
+            correct_values=calculated,
+        )
+
+    def calculate(self, data: pd.DataFrame) -> pd.Series:
+        """Recalculate the data for traded today."""
 
         logger.debug("Recalculating 'traded today'")
-        data[self._recalc_column] = (
+        recalculated = (
             data[PortfolioDataHeader.CLOSE_QUANTITY.value]
             - data[PortfolioDataHeader.OPEN_QUANTITY.value]
         )
         logger.debug("'traded today' recalculated")
+        return recalculated
@@ -1,12 +1,10 @@
 import logging
 from decimal import Decimal
-from typing import Iterator
 
 import pandas as pd
 
 from analyser.enums import PortfolioDataHeader
-from analyser.errors import PortfolioErrorCalculation
-from analyser.interfaces import PortfolioError
+from analyser.errors import PortfolioErrorBlock, PortfolioErrorCalculation
 from analyser.reconcilers.base import PortfolioDataReconcilerBase
 
 logger = logging.getLogger(__name__)
@@ -24,10 +22,18 @@ class PortfolioDataReconcilerValueInUSD(PortfolioDataReconcilerBase):
         self._recalc_column = self._recalculate_column_name_factory(
             PortfolioDataHeader.VALUE_IN_USD.value
         )
+        self.required_columns = (
+            PortfolioDataHeader.CLOSE_QUANTITY.value,
+            PortfolioDataHeader.EXCHANGE_RATE.value,
+            PortfolioDataHeader.PRICE.value,
+            PortfolioDataHeader.VALUE_IN_USD.value,
+        )
 
     ERROR_TOLERANCE = Decimal("1.00")
+    EXPRESSION = "close_quantity * exchange_rate * price"
+    DEVIATION_EXPRESSION = "abs(value_in_usd_recalc - value_in_usd)"
 
-    def reconcile(self, data: pd.DataFrame) -> Iterator[PortfolioError]:
+    def reconcile_block(self, data: pd.DataFrame) -> PortfolioErrorBlock:
         """Reconcile the data for value in USD."""
 
         logger.info("Reconciling value in USD")
@@ -37,29 +43,34 @@ class PortfolioDataReconcilerValueInUSD(PortfolioDataReconcilerBase):
             data[self._recalc_column] - data[PortfolioDataHeader.VALUE_IN_USD.value]
         )
         # find the rows where the difference is greater than the tolerance
-        mask = data[self._diff_column].abs() > self.ERROR_TOLERANCE
-        for _, row in data[mask].iterrows():
-            error = PortfolioErrorCalculation(
-                ticker=row[PortfolioDataHeader.P_TICKER.value],
-                location=PortfolioDataHeader.VALUE_IN_USD.value,
-                date=row[PortfolioDataHeader.DATE.value].date(),
-                value=row[PortfolioDataHeader.VALUE_IN_USD.value],
-                correct_value=row[self._recalc_column],
-            )
-            yield error
+        mask = self._exceeds_tolerance(data[self._diff_column])
+        errors = self.error_block(data, mask, data[self._recalc_column])
 
         logger.info("Value in USD reconciled")
+        return errors
 
-    def recalculate(self, data: pd.DataFrame) -> None:
-        """Recalculate the data for value in USD."""
+    def error_block(
+        self, data: pd.DataFrame, mask: pd.Series, calculated: pd.Series
+    ) -> PortfolioErrorBlock:
+        """Build the block of errors for the masked rows."""
 
-        if self._recalc_column in data:
-            return
+        return PortfolioErrorBlock.from_frame(
+            data,
+            mask,
+            error_class=PortfolioErrorCalculation,
+            location=PortfolioDataHeader.VALUE_IN_USD.value,
+            value_column=PortfolioDataHeader.VALUE_IN_USD.value,
+            correct_values=calculated,
+        )
+
+    def calculate(self, data: pd.DataFrame) -> pd.Series:
+        """Recalculate the data for value in USD."""
 
         logger.debug("Recalculating value in USD")
-        data[self._recalc_column] = (
+        recalculated = (
             data[PortfolioDataHeader.CLOSE_QUANTITY.value]
             * data[PortfolioDataHeader.EXCHANGE_RATE.value]
             * data[PortfolioDataHeader.PRICE.value]
         )
         logger.debug("Value in USD recalculated")
+        return recalculated
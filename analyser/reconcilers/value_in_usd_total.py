@@ -0,0 +1,28 @@
+from decimal import Decimal
+
+import pandas as pd
+
+from analyser.enums import PortfolioDataHeader
+from analyser.reconcilers.aggregate import PortfolioDataReconcilerAggregateBase
+
+
+class PortfolioDataReconcilerValueInUSDTotal(PortfolioDataReconcilerAggregateBase):
+    """Reconcile the values in USD of every date summing up to the NAV."""
+
+    ERROR_TOLERANCE = Decimal("1.00")
+    AGGREGATIONS = {
+        PortfolioDataHeader.VALUE_IN_USD.value: "sum",
+        # the NAV is repeated on every row, the last one is taken
+        PortfolioDataHeader.CALCULATED_NAV.value: "last",
+    }
+    LOCATION = "value_in_usd_total"
+
+    def total(self, totals: pd.DataFrame) -> pd.Series:
+        """Return the sum of values in USD."""
+
+        return totals[PortfolioDataHeader.VALUE_IN_USD.value]
+
+    def expected(self, totals: pd.DataFrame) -> pd.Series:
+        """Return the NAV."""
+
+        return totals[PortfolioDataHeader.CALCULATED_NAV.value]
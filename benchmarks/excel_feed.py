@@ -0,0 +1,89 @@
+"""Benchmark per-chunk read cost of the Excel data feed as the file grows.
+
+Workbooks of increasing size are generated by repeating the rows of the
+template workbook. For every size the feed is drained chunk by chunk and the
+time spent producing each chunk is recorded. The chunked mode re-parses the
+workbook from the top for every chunk, so its per-chunk cost grows with the
+file; the streaming mode should stay flat.
+
+Usage:
+
+    python -m benchmarks.excel_feed --rows 2000 8000 16000
+"""
+
+import argparse
+import itertools
+import os
+import statistics
+import tempfile
+import time
+
+import openpyxl
+
+from analyser.data_feeds.excel import PortfolioDataFeedExcel
+
+TEMPLATE_FILE = "data/Test.xlsx"
+
+
+def generate_workbook(template_path: str, output_path: str, rows: int) -> None:
+    """Write a workbook with `rows` data rows repeated from the template."""
+
+    template = openpyxl.load_workbook(template_path, read_only=True)
+    template_rows = template.worksheets[0].iter_rows(values_only=True)
+    headers = next(template_rows)
+    data_rows = list(template_rows)
+    template.close()
+
+    workbook = openpyxl.Workbook(write_only=True)
+    worksheet = workbook.create_sheet()
+    worksheet.append(headers)
+    for row in itertools.islice(itertools.cycle(data_rows), rows):
+        worksheet.append(row)
+    workbook.save(output_path)
+
+
+def measure_chunk_times(feed: PortfolioDataFeedExcel) -> list:
+    """Drain the feed and return the time taken to produce every chunk."""
+
+    data = feed.get_data()
+    next(data)  # headers
+    timings = []
+    start = time.perf_counter()
+    for _ in data:
+        end = time.perf_counter()
+        timings.append(end - start)
+        start = end
+
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[2000, 8000, 16000])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--template", default=TEMPLATE_FILE)
+    args = parser.parse_args()
+
+    print(
+        f"{'mode':<10} {'rows':>8} {'chunks':>7} {'total s':>9} "
+        f"{'first ms':>9} {'last ms':>9} {'median ms':>10}"
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for rows in args.rows:
+            file_path = os.path.join(tmp_dir, f"portfolio_{rows}.xlsx")
+            generate_workbook(args.template, file_path, rows)
+
+            for mode, streaming in (("chunked", False), ("streaming", True)):
+                feed = PortfolioDataFeedExcel(
+                    file_path, chunk_size=args.chunk_size, streaming=streaming
+                )
+                timings = measure_chunk_times(feed)
+                print(
+                    f"{mode:<10} {rows:>8} {len(timings):>7} {sum(timings):>9.2f} "
+                    f"{timings[0] * 1000:>9.1f} {timings[-1] * 1000:>9.1f} "
+                    f"{statistics.median(timings) * 1000:>10.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Compare the fused reconciler with the per-reconciler path.
+
+Rows of the input file are repeated into chunks of the given size. Every
+chunk is reconciled by the reconciler graph, which runs each reconciler on the
+chunk in turn, and by the fused reconciler. Time and peak memory allocated
+while reconciling a chunk are reported for both, and the reported errors are
+checked to be equal.
+
+Usage:
+
+    python -m benchmarks.fused --chunk-size 100000 --repeat 5
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+from analyser.analyser import PortfolioAnalyzer
+from analyser.data_feeds.excel import PortfolioDataFeedExcel
+from analyser.enums import NumericBackend
+from analyser.reconcilers.fused import PortfolioFusedReconciler, numexpr
+
+TEMPLATE_FILE = "data/Test.xlsx"
+
+
+def load_chunk(file_path: str, chunk_size: int) -> pd.DataFrame:
+    """Read the file and repeat its rows into a chunk of the given size."""
+
+    feed = PortfolioDataFeedExcel(
+        file_path,
+        chunk_size=chunk_size,
+        streaming=True,
+        numeric_backend=NumericBackend.FLOAT,
+    )
+    data = feed.get_data()
+    next(data)  # headers
+    rows = pd.concat(list(data), ignore_index=True)
+    repeats = -(-chunk_size // len(rows))
+
+    return pd.concat([rows] * repeats, ignore_index=True).iloc[:chunk_size]
+
+
+def measure(chunk_reconciler, chunk: pd.DataFrame, repeat: int) -> tuple:
+    """Reconcile copies of the chunk and return errors, best time and peak memory."""
+
+    best_time = float("inf")
+    peak_memory = 0
+    for _ in range(repeat):
+        data = chunk.copy()
+        tracemalloc.start()
+        start = time.perf_counter()
+        error_blocks = chunk_reconciler.reconcile(data)
+        best_time = min(best_time, time.perf_counter() - start)
+        peak_memory = max(peak_memory, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    errors = [error for block in error_blocks for error in block.to_dicts()]
+
+    return errors, best_time, peak_memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--file", default=TEMPLATE_FILE)
+    parser.add_argument("--chunk-size", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    chunk = load_chunk(args.file, args.chunk_size)
+    graph = PortfolioAnalyzer(
+        PortfolioDataFeedExcel(args.file), error_exporter=None
+    ).reconciler_graph
+    engine = "numexpr" if numexpr is not None else "numpy"
+
+    results = {}
+    for name, chunk_reconciler in (
+        ("per-reconciler", graph),
+        (f"fused ({engine})", PortfolioFusedReconciler(graph)),
+    ):
+        errors, best_time, peak_memory = measure(chunk_reconciler, chunk, args.repeat)
+        results[name] = errors
+        print(
+            f"{name:<16} {len(chunk):>9} rows {best_time * 1000:>9.1f} ms "
+            f"{peak_memory / 2**20:>9.1f} MiB peak {len(errors):>7} errors"
+        )
+
+    expected, actual = results.values()
+    if expected != actual:
+        print("Reported errors differ")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
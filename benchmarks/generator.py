@@ -0,0 +1,281 @@
+"""Generate synthetic portfolio data at scale.
+
+Rows are generated for every column of `PortfolioDataHeader`, date by date for
+a fixed set of tickers with a realistic mix of long and short positions,
+foreign currencies and futures. Prices follow a random walk and every derived
+column is calculated with the formulas of the reconcilers, so valid rows
+reconcile without errors. A share of the rows is deliberately corrupted by
+offsetting one checked column beyond its error tolerance.
+
+Usage:
+
+    python -m benchmarks.generator --rows 1000000 --output data/synthetic.parquet
+"""
+
+import argparse
+import time
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from analyser.data_feeds.arrow import write_arrow_ipc, write_parquet
+from analyser.data_feeds.base import PortfolioDataFeedBase
+from analyser.enums import NumericBackend, PortfolioDataHeader
+
+# currency of a position, its exchange rate to USD and share of positions
+CURRENCIES = {
+    "USD": (1.0, 0.6),
+    "EURUSD": (1.1, 0.2),
+    "GBPUSD": (1.3, 0.08),
+    "USDHKD": (0.128, 0.06),
+    "USDCHF": (1.08, 0.06),
+}
+COUNTRIES = {"USD": "US", "EURUSD": "DE", "GBPUSD": "GB", "USDHKD": "HK"}
+SECTORS = ["Information Technology", "Health Care", "Financials", "Energy"]
+CAP_CLASSES = ["Micro", "SMID", "Large", "Mega"]
+
+# Columns which are corrupted, with an offset beyond their error tolerance.
+# Trade columns are only corrupted on rows with a trade.
+CORRUPTIONS = {
+    PortfolioDataHeader.OPENING_WEIGHTS.value: 0.05,
+    PortfolioDataHeader.CLOSING_WEIGHTS.value: 0.05,
+    PortfolioDataHeader.VALUE_IN_USD.value: 100.0,
+    PortfolioDataHeader.TRADED_TODAY.value: 1.0,
+    PortfolioDataHeader.TRADE_DAY_MOVE.value: 0.05,
+    PortfolioDataHeader.TRADE_WEIGHT.value: 0.05,
+    PortfolioDataHeader.RETURN_ADJUSTMENTS.value: 0.05,
+    PortfolioDataHeader.TOTAL_RETURN.value: 0.05,
+    PortfolioDataHeader.CLOSE_WEIGHT_ABS.value: 0.05,
+    PortfolioDataHeader.DOLLAR_PNL.value: 100.0,
+    PortfolioDataHeader.MARKET_CAP.value: 100.0,
+}
+
+
+class PortfolioDataFeedSynthetic(PortfolioDataFeedBase):
+    """Feed generating synthetic portfolio data, one chunk of whole dates at a
+    time.
+
+    The number of tickers grows with the number of rows, so large data sets
+    span years of dates for thousands of tickers. The data only depends on
+    the seed.
+    """
+
+    def __init__(
+        self,
+        rows: int,
+        chunk_size: int = 100000,
+        corruption_rate: float = 0.01,
+        short_ratio: float = 0.35,
+        future_ratio: float = 0.05,
+        trade_ratio: float = 0.1,
+        seed: int = 0,
+        numeric_backend: NumericBackend = NumericBackend.FLOAT,
+    ):
+        super().__init__(numeric_backend)
+
+        self.rows = rows
+        self.chunk_size = chunk_size
+        self.corruption_rate = corruption_rate
+        self.short_ratio = short_ratio
+        self.future_ratio = future_ratio
+        self.trade_ratio = trade_ratio
+        self.seed = seed
+        self.ticker_count = int(np.clip(rows // 2500, 50, 5000))
+
+    def get_data(self) -> Iterator[pd.DataFrame]:
+        """Get the data for portfolio."""
+
+        yield [header.value for header in PortfolioDataHeader]
+
+        random = np.random.default_rng(self.seed)
+        tickers = self._tickers(random)
+        dates_per_chunk = max(self.chunk_size // self.ticker_count, 1)
+        date_count = -(-self.rows // self.ticker_count)
+        dates = pd.bdate_range("2000-01-03", periods=date_count)
+
+        # state carried from one date to the next
+        prices = random.lognormal(4, 1, self.ticker_count)
+        quantities = random.integers(10, 5000, self.ticker_count)
+        quantities = np.where(tickers["short_pos"], -quantities, quantities)
+        nav_yesterday = None
+
+        rows_left = self.rows
+        for start in range(0, date_count, dates_per_chunk):
+            frames = []
+            for date in dates[start : start + dates_per_chunk]:
+                df, prices, quantities, nav_yesterday = self._generate_date(
+                    random, date, tickers, prices, quantities, nav_yesterday
+                )
+                frames.append(df)
+
+            df = pd.concat(frames, ignore_index=True).iloc[:rows_left]
+            rows_left -= len(df)
+            self._corrupt(random, df)
+
+            df = self._project(df)
+            self._convert_numeric(df)
+            yield df
+
+    def _tickers(self, random: np.random.Generator) -> pd.DataFrame:
+        """Return the static attributes of every ticker."""
+
+        count = self.ticker_count
+        currencies = random.choice(
+            list(CURRENCIES),
+            size=count,
+            p=[share for _, share in CURRENCIES.values()],
+        )
+        names = [f"T{index:05d}" for index in range(count)]
+
+        return pd.DataFrame(
+            {
+                "p_ticker": names,
+                "short_name": [f"SYNTHETIC {name}" for name in names],
+                "currency": currencies,
+                "country": [COUNTRIES.get(currency, "CH") for currency in currencies],
+                "sector": random.choice(SECTORS, size=count),
+                "industry": random.choice(["Software", "Banks", "Oil"], size=count),
+                "sub_ind": random.choice(["Application", "Regional"], size=count),
+                "is_currency": False,
+                "is_future": random.random(count) < self.future_ratio,
+                "short_pos": random.random(count) < self.short_ratio,
+                "sharesout": random.lognormal(6, 1, count),
+                "cap_class": random.choice(CAP_CLASSES, size=count),
+                "fx_base": [CURRENCIES[currency][0] for currency in currencies],
+            }
+        )
+
+    def _generate_date(
+        self,
+        random: np.random.Generator,
+        date: pd.Timestamp,
+        tickers: pd.DataFrame,
+        prices_yesterday: np.ndarray,
+        open_quantity: np.ndarray,
+        nav_yesterday: float,
+    ) -> tuple:
+        """Generate the rows of one date and return the state for the next."""
+
+        count = len(tickers)
+        short_pos = tickers["short_pos"].to_numpy()
+        exchange_rate = tickers["fx_base"].to_numpy() * (
+            1 + random.normal(0, 0.002, count)
+        )
+        exchange_rate[tickers["currency"].to_numpy() == "USD"] = 1.0
+        price = prices_yesterday * np.exp(random.normal(0, 0.02, count))
+
+        traded = random.random(count) < self.trade_ratio
+        trade_size = random.integers(-500, 500, count)
+        close_quantity = open_quantity + np.where(traded, trade_size, 0)
+        traded_today = np.where(traded, close_quantity - open_quantity, np.nan)
+        trade_price = np.where(
+            traded, price * (1 + random.normal(0, 0.01, count)), np.nan
+        )
+
+        value_in_usd = close_quantity * exchange_rate * price
+        calculated_nav = np.abs(value_in_usd).sum() * 1.05
+        if nav_yesterday is None:
+            nav_yesterday = calculated_nav
+
+        return_adjustments = np.where(
+            short_pos,
+            -traded_today * (trade_price - price) / calculated_nav,
+            traded_today * (price - trade_price) / calculated_nav,
+        )
+        stock_return = np.where(
+            short_pos,
+            (prices_yesterday - price) / prices_yesterday,
+            (price - prices_yesterday) / prices_yesterday,
+        )
+        total_return = stock_return * np.abs(
+            (close_quantity - np.nan_to_num(traded_today)) * price * exchange_rate
+        ) / calculated_nav + np.nan_to_num(return_adjustments)
+        opening_weights = (
+            open_quantity * exchange_rate * prices_yesterday / nav_yesterday
+        )
+        closing_weights = value_in_usd / calculated_nav
+
+        df = pd.DataFrame(
+            {
+                "date": np.full(count, date.to_datetime64()),
+                "p_ticker": tickers["p_ticker"],
+                "short_name": tickers["short_name"],
+                "opening_weights": opening_weights,
+                "open_quantity": open_quantity,
+                "close_quantity": close_quantity,
+                "closing_weights": closing_weights,
+                "currency": tickers["currency"],
+                "price": price,
+                "exchange_rate": exchange_rate,
+                "value_in_usd": value_in_usd,
+                "price_yesterday": prices_yesterday,
+                "stock_movement": price / prices_yesterday - 1,
+                "performance_contribution": (price / prices_yesterday - 1)
+                * opening_weights,
+                "traded_today": traded_today,
+                "trade_price": trade_price,
+                "trade_day_move": (price - trade_price) / trade_price,
+                "trade_weight": traded_today
+                * trade_price
+                * exchange_rate
+                / nav_yesterday,
+                "return_adjustments": return_adjustments,
+                "total_return": total_return,
+                "calculated_nav": calculated_nav,
+                "nav_yesterday": nav_yesterday,
+                "country": tickers["country"],
+                "sector": tickers["sector"],
+                "industry": tickers["industry"],
+                "sub_ind": tickers["sub_ind"],
+                "is_currency": tickers["is_currency"],
+                "close_weight_abs": np.abs(closing_weights),
+                "is_future": tickers["is_future"],
+                "short_pos": tickers["short_pos"],
+                "dollar_pnl": total_return * nav_yesterday,
+                "sharesout": tickers["sharesout"],
+                "market_cap": tickers["sharesout"] * price * exchange_rate,
+                "cap_class": tickers["cap_class"],
+            }
+        )
+
+        return df, price, close_quantity, calculated_nav
+
+    def _corrupt(self, random: np.random.Generator, df: pd.DataFrame) -> None:
+        """Offset one checked column of a share of the rows."""
+
+        corrupted = np.flatnonzero(random.random(len(df)) < self.corruption_rate)
+        columns = random.choice(list(CORRUPTIONS), size=len(corrupted))
+        for column, offset in CORRUPTIONS.items():
+            rows = corrupted[columns == column]
+            position = df.columns.get_loc(column)
+            df.iloc[rows, position] = df.iloc[rows, position] + offset
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--chunk-size", type=int, default=100000)
+    parser.add_argument("--corruption-rate", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output", required=True, help="Parquet (.parquet) or Arrow IPC file"
+    )
+    args = parser.parse_args()
+
+    feed = PortfolioDataFeedSynthetic(
+        args.rows,
+        chunk_size=args.chunk_size,
+        corruption_rate=args.corruption_rate,
+        seed=args.seed,
+    )
+    start = time.perf_counter()
+    if args.output.endswith(".parquet"):
+        write_parquet(feed, args.output)
+    else:
+        write_arrow_ipc(feed, args.output)
+    print(f"{args.rows} rows written in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Compare the Decimal and float numeric backends for speed and parity.
+
+The input file is parsed once per backend and every reconciler is run over the
+parsed chunks. Reconciliation time is reported per backend, and the reported
+errors of both backends are checked to match within the error tolerance of the
+reconciler that reported them. The script exits with a non-zero status when
+the backends disagree.
+
+Usage:
+
+    python -m benchmarks.numeric_backend --file data/Test.xlsx
+"""
+
+import argparse
+import sys
+import time
+from decimal import Decimal
+
+from analyser.analyser import PortfolioAnalyzer
+from analyser.data_feeds.excel import PortfolioDataFeedExcel
+from analyser.enums import NumericBackend
+
+TEMPLATE_FILE = "data/Test.xlsx"
+
+
+def reconcile_chunks(reconcilers, chunks) -> tuple:
+    """Run all reconcilers over the chunks and return errors and elapsed time."""
+
+    errors = []
+    start = time.perf_counter()
+    for chunk in chunks:
+        for reconciler in reconcilers:
+            for error in reconciler.reconcile(chunk):
+                errors.append((reconciler, error.to_dict()))
+
+    return errors, time.perf_counter() - start
+
+
+def compare_errors(expected: list, actual: list) -> list:
+    """Return descriptions of errors that differ between the two backends."""
+
+    mismatches = []
+    if len(expected) != len(actual):
+        mismatches.append(f"error count {len(expected)} != {len(actual)}")
+        return mismatches
+
+    for (reconciler, expected_error), (_, actual_error) in zip(expected, actual):
+        expected_context = expected_error["context"]
+        actual_context = actual_error["context"]
+        keys = ("ticker", "date", "location")
+        if any(expected_context[key] != actual_context[key] for key in keys):
+            mismatches.append(f"{expected_error} != {actual_error}")
+            continue
+
+        value_pairs = [(expected_context["value"], actual_context["value"])]
+        if "correct_value" in expected_error:
+            value_pairs.append(
+                (expected_error["correct_value"], actual_error["correct_value"])
+            )
+        for expected_value, actual_value in value_pairs:
+            if expected_value.is_nan() and actual_value.is_nan():
+                continue
+            if abs(Decimal(expected_value) - Decimal(actual_value)) > (
+                reconciler.ERROR_TOLERANCE
+            ):
+                mismatches.append(f"{expected_error} != {actual_error}")
+
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--file", default=TEMPLATE_FILE)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    results = {}
+    for backend in NumericBackend:
+        feed = PortfolioDataFeedExcel(
+            args.file,
+            chunk_size=args.chunk_size,
+            streaming=True,
+            numeric_backend=backend,
+        )
+        analyser = PortfolioAnalyzer(feed, error_exporter=None)
+        chunks = list(analyser.get_data())
+        errors, elapsed = reconcile_chunks(analyser.reconcilers, chunks)
+        results[backend] = errors
+        print(f"{backend.value:<8} {len(errors):>8} errors {elapsed:>8.3f} s")
+
+    mismatches = compare_errors(
+        results[NumericBackend.DECIMAL], results[NumericBackend.FLOAT]
+    )
+    for mismatch in mismatches:
+        print(mismatch)
+    print(f"{len(mismatches)} mismatches")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
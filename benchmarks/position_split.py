@@ -0,0 +1,158 @@
+"""Compare long/short formula evaluation by position selection with filtering.
+
+Return adjustments and total return use different formulas for short and
+long positions. The filtering approach splits the data into short and long
+rows, evaluates each formula on its rows and scatters the results back; the
+reconcilers select the differing terms by `short_pos` in one pass instead.
+Both are timed on generated portfolios with different shares of short
+positions, and their results are checked to be equal.
+
+Usage:
+
+    python -m benchmarks.position_split --rows 100000 --short-ratio 0 0.35 0.5
+"""
+
+import argparse
+import sys
+import time
+
+import pandas as pd
+
+from analyser.enums import NumericBackend, PortfolioDataHeader
+from analyser.reconcilers.return_adjustments import (
+    PortfolioDataReconcilerReturnAdjustments,
+)
+from analyser.reconcilers.total_return import PortfolioDataReconcilerTotalReturn
+from benchmarks.generator import PortfolioDataFeedSynthetic
+
+SHORT_POS = PortfolioDataHeader.SHORT_POS.value
+TRADED_TODAY = PortfolioDataHeader.TRADED_TODAY.value
+TRADE_PRICE = PortfolioDataHeader.TRADE_PRICE.value
+PRICE = PortfolioDataHeader.PRICE.value
+PRICE_YESTERDAY = PortfolioDataHeader.PRICE_YESTERDAY.value
+CLOSE_QUANTITY = PortfolioDataHeader.CLOSE_QUANTITY.value
+EXCHANGE_RATE = PortfolioDataHeader.EXCHANGE_RATE.value
+CALCULATED_NAV = PortfolioDataHeader.CALCULATED_NAV.value
+
+
+def filtered_return_adjustments(data: pd.DataFrame) -> pd.Series:
+    """Return adjustments evaluated on filtered short and long rows."""
+
+    short = data.loc[data[SHORT_POS] == True]
+    short_recalculated = (
+        -short[TRADED_TODAY]
+        * (short[TRADE_PRICE] - short[PRICE])
+        / short[CALCULATED_NAV]
+    )
+    long = data.loc[data[SHORT_POS] == False]
+    long_recalculated = (
+        long[TRADED_TODAY] * (long[PRICE] - long[TRADE_PRICE]) / long[CALCULATED_NAV]
+    )
+
+    return pd.concat([short_recalculated, long_recalculated]).reindex(data.index)
+
+
+def filtered_total_return(
+    data: pd.DataFrame, return_adjustments: pd.Series
+) -> pd.Series:
+    """Total return evaluated on filtered short and long rows."""
+
+    def position_return(rows: pd.DataFrame, move: pd.Series) -> pd.Series:
+        return (
+            move
+            / rows[PRICE_YESTERDAY]
+            * (
+                (rows[CLOSE_QUANTITY] - rows[TRADED_TODAY])
+                * rows[PRICE]
+                * rows[EXCHANGE_RATE]
+            ).abs()
+            / rows[CALCULATED_NAV]
+            + return_adjustments[rows.index]
+        )
+
+    short = data.loc[data[SHORT_POS] == True]
+    long = data.loc[data[SHORT_POS] == False]
+    recalculated = pd.concat(
+        [
+            position_return(short, short[PRICE_YESTERDAY] - short[PRICE]),
+            position_return(long, long[PRICE] - long[PRICE_YESTERDAY]),
+        ]
+    )
+
+    return recalculated.reindex(data.index)
+
+
+def selected(data: pd.DataFrame) -> tuple:
+    """Return adjustments and total return as calculated by the reconcilers."""
+
+    return_adjustments = PortfolioDataReconcilerReturnAdjustments()
+    total_return = PortfolioDataReconcilerTotalReturn()
+    adjustments = return_adjustments.calculate(data)
+    data[return_adjustments.provided_columns[0]] = adjustments
+
+    return adjustments, total_return.calculate(data)
+
+
+def filtered(data: pd.DataFrame) -> tuple:
+    adjustments = filtered_return_adjustments(data)
+
+    return adjustments, filtered_total_return(data, adjustments)
+
+
+def measure(calculate, data: pd.DataFrame, repeat: int) -> tuple:
+    """Return the results and the best time of calculating on copies of the data."""
+
+    best_time = float("inf")
+    for _ in range(repeat):
+        chunk = data.copy()
+        start = time.perf_counter()
+        results = calculate(chunk)
+        best_time = min(best_time, time.perf_counter() - start)
+
+    return results, best_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument(
+        "--short-ratio", type=float, nargs="+", default=[0.0, 0.35, 0.5]
+    )
+    parser.add_argument(
+        "--numeric-backend",
+        choices=[backend.value for backend in NumericBackend],
+        default=NumericBackend.FLOAT.value,
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    mismatches = 0
+    for short_ratio in args.short_ratio:
+        feed = PortfolioDataFeedSynthetic(
+            args.rows,
+            chunk_size=args.rows,
+            short_ratio=short_ratio,
+            numeric_backend=NumericBackend(args.numeric_backend),
+        )
+        data = feed.get_data()
+        next(data)  # headers
+        data = next(data)
+
+        expected, filtered_time = measure(filtered, data, args.repeat)
+        actual, selected_time = measure(selected, data, args.repeat)
+        equal = all(left.equals(right) for left, right in zip(expected, actual))
+        mismatches += not equal
+        print(
+            f"short ratio {short_ratio:>4.2f} {len(data):>9} rows "
+            f"filtered {filtered_time * 1000:>8.1f} ms "
+            f"selected {selected_time * 1000:>8.1f} ms "
+            f"{filtered_time / selected_time:>5.2f}x"
+            f"{'' if equal else ' MISMATCH'}"
+        )
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
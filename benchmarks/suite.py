@@ -0,0 +1,296 @@
+"""Measure throughput and peak memory of the analyser on synthetic data.
+
+For every size, synthetic portfolio data is written to a Parquet file and
+every component is measured in a fresh process, so the peak resident set size
+(RSS) of one component is not inflated by another:
+
+- `feed`: reading the Parquet file chunk by chunk,
+- `reconciler:<name>`: the feed plus one reconciler and the reconcilers it
+  depends on, timed for the reconciler alone,
+- `fused`: the feed plus all reconcilers fused into one plan,
+- `export`: exporting the errors of all reconcilers to a JSON lines file,
+- `end_to_end`: feed, reconcilers and export through `PortfolioAnalyzer`.
+
+Results are written as JSON, and can be compared with the results of an
+earlier run.
+
+Usage:
+
+    python -m benchmarks.suite --rows 10000 1000000 --output results.json
+    python -m benchmarks.suite --rows 10000 --compare results.json
+"""
+
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import tempfile
+import time
+
+from analyser.analyser import PortfolioAnalyzer
+from analyser.data_feeds.arrow import PortfolioDataFeedParquet, write_parquet
+from analyser.enums import NumericBackend, PortfolioDataHeader
+from analyser.exporters.json_exporter import PortfolioErrorExporterJSON
+from analyser.reconcilers.fused import PortfolioFusedReconciler
+from analyser.reconcilers.graph import PortfolioReconcilerGraph
+from benchmarks.generator import PortfolioDataFeedSynthetic
+
+AVAILABLE_COLUMNS = [header.value for header in PortfolioDataHeader]
+
+
+def open_feed(file_path: str) -> PortfolioDataFeedParquet:
+    return PortfolioDataFeedParquet(file_path, numeric_backend=NumericBackend.FLOAT)
+
+
+def read_chunks(feed: PortfolioDataFeedParquet):
+    """Iterate over the chunks of a feed, skipping the headers."""
+
+    data = feed.get_data()
+    next(data)
+    yield from data
+
+
+def analyser_reconcilers(file_path: str) -> list:
+    """Return the reconcilers of the analyser."""
+
+    return PortfolioAnalyzer(open_feed(file_path), error_exporter=None).reconcilers
+
+
+def reconciler_graph(reconcilers: list, name: str) -> PortfolioReconcilerGraph:
+    """Return the graph of a reconciler and the reconcilers it depends on."""
+
+    providers = {
+        column: reconciler
+        for reconciler in reconcilers
+        for column in reconciler.provided_columns
+    }
+    target = next(r for r in reconcilers if type(r).__name__ == name)
+    selected = [target]
+    for reconciler in selected:
+        for column in reconciler.required_columns:
+            provider = providers.get(column)
+            if provider is not None and provider not in selected:
+                selected.append(provider)
+
+    return PortfolioReconcilerGraph(
+        [reconciler for reconciler in reconcilers if reconciler in selected],
+        available_columns=AVAILABLE_COLUMNS,
+    )
+
+
+def measure_feed(file_path: str) -> dict:
+    rows = sum(len(chunk) for chunk in read_chunks(open_feed(file_path)))
+    return {"rows": rows}
+
+
+def measure_reconciler(file_path: str, name: str) -> dict:
+    """Time one reconciler, excluding the feed and its dependencies."""
+
+    graph = reconciler_graph(analyser_reconcilers(file_path), name)
+    feed = open_feed(file_path)
+    feed.select_columns(graph.input_columns)
+
+    index = [type(reconciler).__name__ for reconciler in graph.reconcilers].index(name)
+    timings, rows, errors = {}, 0, 0
+    for chunk in read_chunks(feed):
+        error_blocks = graph.reconcile(chunk, timings=timings)
+        rows += len(chunk)
+        errors += len(error_blocks[index])
+
+    return {
+        "rows": rows,
+        "errors": errors,
+        "seconds": timings[name].wall_seconds,
+        "cpu_seconds": timings[name].cpu_seconds,
+    }
+
+
+def measure_fused(file_path: str) -> dict:
+    """Time the fused reconciler, excluding the feed."""
+
+    graph = PortfolioReconcilerGraph(
+        analyser_reconcilers(file_path), available_columns=AVAILABLE_COLUMNS
+    )
+    fused = PortfolioFusedReconciler(graph)
+    feed = open_feed(file_path)
+    feed.select_columns(graph.input_columns)
+
+    seconds, rows, errors = 0.0, 0, 0
+    for chunk in read_chunks(feed):
+        start = time.perf_counter()
+        errors += sum(len(block) for block in fused.reconcile(chunk))
+        seconds += time.perf_counter() - start
+        rows += len(chunk)
+
+    return {"rows": rows, "errors": errors, "seconds": seconds}
+
+
+def measure_export(file_path: str) -> dict:
+    """Time the export of all errors, excluding reconciliation."""
+
+    analyser = PortfolioAnalyzer(open_feed(file_path), error_exporter=None, fused=True)
+    error_blocks = list(analyser.analyse_blocks())
+
+    with tempfile.TemporaryFile("w") as output_file:
+        exporter = PortfolioErrorExporterJSON(output_file, batched=True)
+        start = time.perf_counter()
+        exporter.export_blocks(error_blocks)
+        seconds = time.perf_counter() - start
+
+    errors = sum(len(block) for block in error_blocks)
+    return {"rows": analyser.metrics.rows, "errors": errors, "seconds": seconds}
+
+
+def measure_end_to_end(file_path: str) -> dict:
+    with tempfile.TemporaryFile("w") as output_file:
+        analyser = PortfolioAnalyzer(
+            open_feed(file_path),
+            PortfolioErrorExporterJSON(output_file, batched=True),
+            fused=True,
+        )
+        analyser.export_error_blocks(analyser.analyse_blocks())
+
+    report = analyser.metrics.to_dict()
+    return {
+        "rows": report["rows"],
+        "errors": report["errors"],
+        "stages": report["stages"],
+    }
+
+
+def generate(file_path: str, rows: int, chunk_size: int) -> dict:
+    write_parquet(PortfolioDataFeedSynthetic(rows, chunk_size=chunk_size), file_path)
+    return {"rows": rows}
+
+
+def peak_rss_mib() -> float:
+    """Return the peak RSS of this process in MiB.
+
+    The maximum RSS reported by getrusage is kept across exec on Linux, so it
+    would include the parent process; the high water mark of the address
+    space is used instead when it's available.
+    """
+
+    try:
+        with open("/proc/self/status") as status_file:
+            for line in status_file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_component(function, *args) -> dict:
+    """Run a measurement and add its elapsed time and peak RSS."""
+
+    start = time.perf_counter()
+    result = function(*args)
+    result.setdefault("seconds", time.perf_counter() - start)
+    result["peak_rss_mib"] = peak_rss_mib()
+
+    return result
+
+
+def run_isolated(function, *args) -> dict:
+    """Run a measurement in a fresh process."""
+
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        return pool.apply(run_component, (function, *args))
+
+
+def run_size(rows: int, chunk_size: int, work_dir: str) -> list:
+    """Generate data of the given size and measure every component."""
+
+    file_path = os.path.join(work_dir, f"portfolio-{rows}.parquet")
+    result = run_isolated(generate, file_path, rows, chunk_size)
+    print(f"{rows} rows generated in {result['seconds']:.1f}s")
+
+    components = [("feed", measure_feed, ())]
+    for reconciler in analyser_reconcilers(file_path):
+        name = type(reconciler).__name__
+        components.append((f"reconciler:{name}", measure_reconciler, (name,)))
+    components += [
+        ("fused", measure_fused, ()),
+        ("export", measure_export, ()),
+        ("end_to_end", measure_end_to_end, ()),
+    ]
+
+    results = []
+    for component, function, args in components:
+        result = run_isolated(function, file_path, *args)
+        result["component"] = component
+        result["size"] = rows
+        result["rows_per_second"] = result["rows"] / result["seconds"]
+        results.append(result)
+        print(
+            f"{rows:>10} {component:<50} {result['seconds']:>8.3f}s "
+            f"{result['rows_per_second']:>12.0f} rows/s "
+            f"{result['peak_rss_mib']:>8.1f} MiB peak RSS"
+        )
+
+    os.remove(file_path)
+    return results
+
+
+def compare(results: list, baseline_path: str) -> None:
+    """Print the throughput of every component relative to a baseline run."""
+
+    with open(baseline_path) as baseline_file:
+        baseline = {
+            (result["size"], result["component"]): result
+            for result in json.load(baseline_file)["results"]
+        }
+
+    for result in results:
+        previous = baseline.get((result["size"], result["component"]))
+        if previous is None:
+            continue
+
+        speedup = result["rows_per_second"] / previous["rows_per_second"]
+        memory = result["peak_rss_mib"] - previous["peak_rss_mib"]
+        print(
+            f"{result['size']:>10} {result['component']:<50} "
+            f"{speedup:>6.2f}x throughput {memory:>+8.1f} MiB peak RSS"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000])
+    parser.add_argument("--chunk-size", type=int, default=100000)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Compare with results of an earlier run")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for rows in args.rows:
+            results += run_size(rows, args.chunk_size, work_dir)
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(
+                {
+                    "created": datetime.datetime.now().isoformat(),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "cpus": os.cpu_count(),
+                    "chunk_size": args.chunk_size,
+                    "results": results,
+                },
+                output_file,
+                indent=2,
+            )
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
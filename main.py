@@ -1,28 +1,95 @@
+import contextlib
 import logging
 import uuid
 
 from analyser.analyser import PortfolioAnalyzer
+from analyser.chunking import PortfolioChunkSizer
+from analyser.data_feeds.cache import PortfolioDataFeedCache
 from analyser.data_feeds.excel import PortfolioDataFeedExcel
+from analyser.enums import NumericBackend
+from analyser.exporters.arrow_exporter import (
+    PortfolioErrorExporterArrowIPC,
+    PortfolioErrorExporterParquet,
+)
 from analyser.exporters.json_exporter import PortfolioErrorExporterJSON
+from analyser.exporters.sqlite_exporter import PortfolioErrorExporterSQLite
+from analyser.reconcilers.registry import PortfolioReconcilerConfig
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
 DATA_FEED_CHUNK_SIZE = 1000
+DATA_FEED_ADAPTIVE_CHUNK_SIZE = False  # grow chunks while throughput improves
+DATA_FEED_CHUNK_MEMORY_BUDGET = 64 << 20  # bytes per chunk, for adaptive sizing
+DATA_FEED_CACHE_DIR = None  # e.g. ".cache" to keep parsed chunks between runs
+DATA_FEED_NUMERIC_BACKEND = NumericBackend.FLOAT
+ERROR_EXPORT_FORMAT = "jsonl"  # or "parquet", "arrow", "sqlite"
 ERROR_EXPORT_CHUNK_SIZE = 1000
+ERROR_EXPORT_BATCHED = True
+ERROR_EXPORT_FAST_ENCODER = False
+ANALYSER_CHUNK_WORKERS = 1
+ANALYSER_FUSED = True
+ANALYSER_HISTORY_CHECKS = False
+ANALYSER_AGGREGATE_CHECKS = False  # portfolio totals of every date
+ANALYSER_HISTORY_PATH = None
+ANALYSER_INCREMENTAL_PATH = None
+ANALYSER_METRICS_FORMAT = "json"  # or "prometheus"
+ANALYSER_RECONCILER_CONFIG = None  # e.g. "reconcilers.json", see README
 error_file_folder = "results"
 reference = str(uuid.uuid4())
-error_file_path = f"{error_file_folder}/{reference}.jsonl"
+error_file_path = f"{error_file_folder}/{reference}.{ERROR_EXPORT_FORMAT}"
+error_database_path = f"{error_file_folder}/errors.sqlite"  # shared by all runs
+metrics_file_path = None  # e.g. f"{error_file_folder}/{reference}.metrics.json"
 
-with open(error_file_path, "w") as error_output_file:
+with contextlib.ExitStack() as exit_stack:
     data_feed = PortfolioDataFeedExcel(
-        "data/Test.xlsx", chunk_size=DATA_FEED_CHUNK_SIZE
+        "data/Test.xlsx",
+        chunk_size=DATA_FEED_CHUNK_SIZE,
+        streaming=True,
+        numeric_backend=DATA_FEED_NUMERIC_BACKEND,
     )
-    error_exporter = PortfolioErrorExporterJSON(
-        error_output_file, chunk_size=ERROR_EXPORT_CHUNK_SIZE
+    if DATA_FEED_CACHE_DIR:
+        data_feed = PortfolioDataFeedCache(data_feed, DATA_FEED_CACHE_DIR)
+    if ERROR_EXPORT_FORMAT == "parquet":
+        error_exporter = PortfolioErrorExporterParquet(error_file_path)
+    elif ERROR_EXPORT_FORMAT == "arrow":
+        error_exporter = PortfolioErrorExporterArrowIPC(error_file_path)
+    elif ERROR_EXPORT_FORMAT == "sqlite":
+        error_exporter = PortfolioErrorExporterSQLite(error_database_path, reference)
+    else:
+        error_output_file = exit_stack.enter_context(open(error_file_path, "w"))
+        error_exporter = PortfolioErrorExporterJSON(
+            error_output_file,
+            chunk_size=ERROR_EXPORT_CHUNK_SIZE,
+            batched=ERROR_EXPORT_BATCHED,
+            fast_encoder=ERROR_EXPORT_FAST_ENCODER,
+        )
+    chunk_sizer = None
+    if DATA_FEED_ADAPTIVE_CHUNK_SIZE:
+        chunk_sizer = PortfolioChunkSizer(
+            memory_budget=DATA_FEED_CHUNK_MEMORY_BUDGET,
+            initial_size=DATA_FEED_CHUNK_SIZE,
+        )
+    reconciler_config = PortfolioReconcilerConfig()
+    if ANALYSER_RECONCILER_CONFIG:
+        reconciler_config = PortfolioReconcilerConfig.from_file(
+            ANALYSER_RECONCILER_CONFIG
+        )
+    portfolio_analyzer = PortfolioAnalyzer(
+        data_feed,
+        error_exporter,
+        chunk_workers=ANALYSER_CHUNK_WORKERS,
+        fused=ANALYSER_FUSED,
+        history_checks=ANALYSER_HISTORY_CHECKS,
+        aggregate_checks=ANALYSER_AGGREGATE_CHECKS,
+        history_path=ANALYSER_HISTORY_PATH,
+        incremental_path=ANALYSER_INCREMENTAL_PATH,
+        metrics_path=metrics_file_path,
+        metrics_format=ANALYSER_METRICS_FORMAT,
+        reconcilers=reconciler_config.reconcilers,
+        tolerances=reconciler_config.tolerances,
+        chunk_sizer=chunk_sizer,
     )
-    portfolio_analyzer = PortfolioAnalyzer(data_feed, error_exporter)
     logger.info("Starting portfolio analysis. Reference: %s", reference)
-    errors = portfolio_analyzer.analyse()
-    portfolio_analyzer.export_errors(errors)
+    portfolio_analyzer.run_pipelined()
     logger.info("Portfolio analysis completed")
@@ -0,0 +1,33 @@
+import os
+
+import pytest
+
+from analyser.data_feeds.arrow import write_parquet
+from analyser.data_feeds.excel import PortfolioDataFeedExcel
+from analyser.enums import NumericBackend
+from tests.helpers import TEST_FILE
+
+
+@pytest.fixture(autouse=True)
+def repository_root(monkeypatch):
+    """Run tests from the repository root, where the data files are."""
+
+    monkeypatch.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def test_parquet(tmp_path_factory) -> str:
+    """Return a Parquet copy of the test workbook, one row group per 1000 rows."""
+
+    file_path = str(tmp_path_factory.mktemp("data") / "Test.parquet")
+    write_parquet(
+        PortfolioDataFeedExcel(
+            os.path.join(os.path.dirname(os.path.dirname(__file__)), TEST_FILE),
+            chunk_size=1000,
+            streaming=True,
+            numeric_backend=NumericBackend.FLOAT,
+        ),
+        file_path,
+    )
+
+    return file_path
@@ -0,0 +1,19 @@
+from typing import List
+
+from analyser.analyser import PortfolioAnalyzer
+from analyser.exporters.json_exporter import encode_blocks
+from analyser.interfaces import PortfolioDataFeed
+
+TEST_FILE = "data/Test.xlsx"
+# errors reported for TEST_FILE by the default reconcilers
+TEST_FILE_ERRORS = 555
+
+
+def analyse(data_feed: PortfolioDataFeed, **kwargs) -> List[str]:
+    """Analyse the data of a feed and return its errors as JSON lines.
+
+    JSON lines compare NaN values as equal, unlike error dictionaries.
+    """
+
+    analyser = PortfolioAnalyzer(data_feed, error_exporter=None, **kwargs)
+    return encode_blocks(analyser.analyse_blocks()).splitlines()
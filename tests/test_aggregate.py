@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from analyser.enums import PortfolioDataHeader
+from analyser.reconcilers.closing_weight_total import (
+    PortfolioDataReconcilerClosingWeightTotal,
+)
+
+
+def weights(date: str, rows: int, total: float) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            PortfolioDataHeader.DATE.value: pd.Timestamp(date),
+            PortfolioDataHeader.CLOSING_WEIGHTS.value: np.full(rows, total / rows),
+        }
+    )
+
+
+def test_tolerance_grows_with_summed_rows():
+    reconciler = PortfolioDataReconcilerClosingWeightTotal()
+    # off by 0.2: within 30 rows * 0.01, split across chunks
+    first_date = weights("2022-01-03", 30, 1.2)
+    # off by 0.2: beyond 10 rows * 0.01
+    second_date = weights("2022-01-04", 10, 1.2)
+
+    blocks = [
+        reconciler.reconcile_block(first_date[:20]),
+        reconciler.reconcile_block(pd.concat([first_date[20:], second_date])),
+        reconciler.finalize(),
+    ]
+
+    dates = [date for block in blocks for date in block.dates]
+    assert dates == [pd.Timestamp("2022-01-04").date()]
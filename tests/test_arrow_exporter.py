@@ -0,0 +1,116 @@
+import datetime
+import json
+from decimal import Decimal
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from analyser.analyser import PortfolioAnalyzer
+from analyser.data_feeds.arrow import PortfolioDataFeedParquet
+from analyser.enums import NumericBackend
+from analyser.errors import PortfolioErrorBlock, PortfolioErrorCalculation
+from analyser.exporters.arrow_exporter import (
+    PORTFOLIO_ERROR_SCHEMA,
+    PortfolioErrorExporterArrowIPC,
+    PortfolioErrorExporterParquet,
+)
+from analyser.exporters.json_exporter import encode_blocks
+from tests.helpers import TEST_FILE_ERRORS, analyse
+
+EXPORTERS = {
+    "parquet": (PortfolioErrorExporterParquet, pq.read_table),
+    "arrow": (
+        PortfolioErrorExporterArrowIPC,
+        lambda file_path: pa.ipc.open_file(file_path).read_all(),
+    ),
+}
+
+
+def without_negative_zeros(error: dict) -> dict:
+    """Return a JSON error with negative zeros as zeros, as decimals have no
+    negative zero."""
+
+    if error["context"]["value"] == "-0.0000":
+        error["context"]["value"] = "0.0000"
+    if error.get("correct_value") == "-0.0000":
+        error["correct_value"] = "0.0000"
+
+    return error
+
+
+def as_json(row: dict) -> dict:
+    """Convert a row of an error table to the dictionary of its JSON line."""
+
+    def text(value):
+        return None if value is None else str(value)
+
+    error = {
+        "error_code": row["error_code"],
+        "description": row["description"],
+        "context": {
+            "ticker": row["ticker"],
+            "date": text(row["date"]),
+            "location": row["location"],
+            "value": text(row["value"]),
+        },
+    }
+    if row["correct_value"] is not None:
+        error["correct_value"] = text(row["correct_value"])
+
+    return error
+
+
+@pytest.mark.parametrize("exporter", list(EXPORTERS))
+def test_round_trip(test_parquet, tmp_path, exporter):
+    exporter_class, read_table = EXPORTERS[exporter]
+    file_path = str(tmp_path / f"errors.{exporter}")
+    data_feed = PortfolioDataFeedParquet(
+        test_parquet, numeric_backend=NumericBackend.FLOAT
+    )
+
+    PortfolioAnalyzer(
+        data_feed, exporter_class(file_path, chunk_size=100)
+    ).run_pipelined()
+
+    table = read_table(file_path)
+    assert table.schema == PORTFOLIO_ERROR_SCHEMA
+    assert table.num_rows == TEST_FILE_ERRORS
+    expected = [
+        without_negative_zeros(json.loads(error))
+        for error in analyse(
+            PortfolioDataFeedParquet(test_parquet, numeric_backend=NumericBackend.FLOAT)
+        )
+    ]
+    assert [as_json(row) for row in table.to_pylist()] == expected
+
+
+@pytest.mark.parametrize("exporter", list(EXPORTERS))
+def test_values_out_of_fixed_point_range(tmp_path, exporter):
+    exporter_class, read_table = EXPORTERS[exporter]
+    file_path = str(tmp_path / f"errors.{exporter}")
+    block = PortfolioErrorBlock(
+        error_class=PortfolioErrorCalculation,
+        location="market_cap",
+        tickers=np.array(["A", "B", "C", "D"], dtype=object),
+        dates=np.array([datetime.date(2022, 1, 3)] * 4, dtype=object),
+        values=np.array([9.3e14, -2.5e18, 1.23456, 1e15 + 0.5]),
+        correct_values=np.array(
+            [Decimal("123456789012345678901.2345"), 0.0, 1.5, 1e15], dtype=object
+        ),
+    )
+
+    exporter_class(file_path).export_blocks([block])
+
+    rows = [as_json(row) for row in read_table(file_path).to_pylist()]
+    expected = [json.loads(error) for error in encode_blocks([block]).splitlines()]
+    assert [row["context"]["value"] for row in rows] == [
+        "930000000000000.0000",
+        "-2500000000000000000.0000",
+        "1.2346",
+        "1000000000000000.5000",
+    ]
+    assert [row.get("correct_value") for row in rows] == [
+        error.get("correct_value") for error in expected
+    ]
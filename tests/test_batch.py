@@ -0,0 +1,81 @@
+import json
+import shutil
+
+import pytest
+
+from analyser.batch import PortfolioBatchAnalyzer, main
+from tests.helpers import TEST_FILE_ERRORS
+
+
+@pytest.fixture
+def input_files(test_parquet, tmp_path):
+    """Return a good Parquet file and a CSV file without portfolio headers."""
+
+    good_path = str(tmp_path / "good.parquet")
+    shutil.copy(test_parquet, good_path)
+    bad_path = str(tmp_path / "bad.csv")
+    with open(bad_path, "w") as bad_file:
+        bad_file.write("not,portfolio,data\n1,2,3\n")
+
+    return good_path, bad_path
+
+
+def read_errors(file_path: str) -> list:
+    with open(file_path) as error_file:
+        return error_file.read().splitlines()
+
+
+@pytest.mark.parametrize("processes", [True, False])
+def test_batch_reports_errors_and_failures(input_files, tmp_path, processes):
+    good_path, bad_path = input_files
+    output_dir = str(tmp_path / "results")
+
+    batch = PortfolioBatchAnalyzer(
+        [good_path, bad_path], output_dir, concurrency=2, processes=processes
+    )
+    good, bad = batch.run()
+
+    assert good.failure is None
+    assert good.rows == 7721
+    assert good.errors == TEST_FILE_ERRORS
+    assert len(read_errors(good.error_file_path)) == TEST_FILE_ERRORS
+    assert bad.failure is not None
+    assert not (tmp_path / "results" / f"{bad.reference}.jsonl").exists()
+
+    with open(tmp_path / "results" / f"batch-{batch.reference}.json") as manifest:
+        files = json.load(manifest)["files"]
+    assert [(entry["file_path"], entry["errors"]) for entry in files] == [
+        (good_path, TEST_FILE_ERRORS),
+        (bad_path, 0),
+    ]
+    assert files[1]["failure"] == bad.failure
+
+
+def test_threads_and_processes_write_the_same_errors(input_files, tmp_path):
+    good_path, _ = input_files
+
+    errors = []
+    for processes in (True, False):
+        (result,) = PortfolioBatchAnalyzer(
+            [good_path], str(tmp_path / str(processes)), processes=processes
+        ).run()
+        errors.append(read_errors(result.error_file_path))
+
+    assert errors[0] == errors[1]
+
+
+def test_main_exits_with_failure(input_files, tmp_path):
+    with pytest.raises(SystemExit) as exit_info:
+        main([*input_files, "--output", str(tmp_path / "results"), "--threads"])
+
+    assert exit_info.value.code == 1
+
+
+@pytest.mark.parametrize("argument", ["--chunk-size", "--concurrency"])
+def test_main_rejects_non_positive_numbers(input_files, tmp_path, argument, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main([input_files[0], "--output", str(tmp_path), argument, "0"])
+
+    assert exit_info.value.code == 2
+    assert "must be at least 1, got 0" in capsys.readouterr().err
+    assert not list(tmp_path.glob("batch-*.json"))
@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+from analyser.analyser import PortfolioAnalyzer
+from analyser.chunking import PortfolioChunkSizer
+from analyser.data_feeds.csv_feed import PortfolioDataFeedCSV
+from analyser.enums import NumericBackend
+
+
+class RecordingChunkSizer(PortfolioChunkSizer):
+    """Chunk sizer recording the bytes per row of the chunks it observes."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.observed = []
+
+    def observe(self, rows: int, memory_bytes: int, seconds: float) -> int:
+        self.observed.append(memory_bytes / rows)
+        return super().observe(rows, memory_bytes, seconds)
+
+
+@pytest.mark.parametrize("fused", [False, True])
+@pytest.mark.parametrize("chunk_workers", [1, 2])
+def test_chunk_memory_includes_derived_columns(
+    test_parquet, tmp_path, fused, chunk_workers
+):
+    csv_path = str(tmp_path / "Test.csv")
+    pd.read_parquet(test_parquet).to_csv(csv_path, index=False)
+
+    chunk_sizer = RecordingChunkSizer(initial_size=500)
+    analyser = PortfolioAnalyzer(
+        PortfolioDataFeedCSV(
+            csv_path, chunk_size=500, numeric_backend=NumericBackend.FLOAT
+        ),
+        error_exporter=None,
+        fused=fused,
+        chunk_workers=chunk_workers,
+        chunk_sizer=chunk_sizer,
+    )
+    for _ in analyser.reconcile_chunks(analyser.get_data()):
+        pass
+
+    data_feed = PortfolioDataFeedCSV(
+        csv_path, chunk_size=100000, numeric_backend=NumericBackend.FLOAT
+    )
+    data_feed.select_columns(analyser.input_columns)
+    data = data_feed.get_data()
+    next(data)  # headers
+    frame = next(data)
+    frame_bytes_per_row = frame.memory_usage(deep=True).sum() / len(frame)
+
+    # every reconciler derives at least one float64 column
+    derived_bytes_per_row = sum(chunk_sizer.observed) / len(chunk_sizer.observed) - (
+        frame_bytes_per_row
+    )
+    assert derived_bytes_per_row >= 8 * len(analyser.reconcilers)
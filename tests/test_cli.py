@@ -0,0 +1,70 @@
+import os
+
+import pandas as pd
+import pytest
+
+from analyser.cli import main
+from tests.helpers import TEST_FILE, TEST_FILE_ERRORS
+
+
+def write_csv(file_path, columns):
+    pd.DataFrame([range(len(columns))], columns=columns).to_csv(file_path, index=False)
+
+
+def test_validate_headers(tmp_path, test_parquet, capsys):
+    columns = list(pd.read_excel(TEST_FILE, nrows=0).columns)
+    good_csv = str(tmp_path / "good.csv.bz2")
+    write_csv(good_csv, columns)
+
+    assert main(["validate-headers", TEST_FILE, test_parquet, good_csv]) == 0
+    assert capsys.readouterr().out.splitlines() == [
+        f"{TEST_FILE}: OK",
+        f"{test_parquet}: OK",
+        f"{good_csv}: OK",
+    ]
+
+
+def test_validate_headers_invalid(tmp_path, capsys):
+    columns = list(pd.read_excel(TEST_FILE, nrows=0).columns)
+    bad_csv = str(tmp_path / "bad.csv")
+    write_csv(bad_csv, columns[1:] + ["Comment"])
+    reordered_csv = str(tmp_path / "reordered.csv")
+    write_csv(reordered_csv, columns[::-1])
+
+    assert main(["validate-headers", TEST_FILE, bad_csv, reordered_csv]) == 1
+    output = capsys.readouterr().out.splitlines()
+    assert output[0] == f"{TEST_FILE}: OK"
+    assert output[1] == f"{bad_csv}: missing date; unexpected comment"
+    assert output[2] == f"{reordered_csv}: columns out of order"
+
+
+def test_validate_headers_without_files(tmp_path):
+    assert main(["validate-headers", str(tmp_path)]) == 1
+
+
+def test_run(tmp_path, test_parquet):
+    output = str(tmp_path / "results")
+
+    assert main(["run", test_parquet, "--output", output]) == 0
+
+    (result,) = os.listdir(output)
+    assert result.endswith(".jsonl")
+    with open(os.path.join(output, result)) as error_file:
+        assert sum(1 for _ in error_file) == TEST_FILE_ERRORS
+
+
+def test_run_failure(tmp_path, test_parquet):
+    bad_csv = str(tmp_path / "bad.csv")
+    write_csv(bad_csv, ["Comment"])
+    output = str(tmp_path / "results")
+
+    assert main(["run", bad_csv, test_parquet, "--output", output]) == 1
+    assert len(os.listdir(output)) == 2
+
+
+@pytest.mark.parametrize("value", ["0", "-1", "x"])
+def test_non_positive_chunk_size(test_parquet, value):
+    with pytest.raises(SystemExit) as exc_info:
+        main(["run", test_parquet, "--chunk-size", value])
+
+    assert exc_info.value.code == 2
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analyser.data_feeds.arrow import PortfolioDataFeedParquet
+from analyser.data_feeds.csv_feed import PortfolioDataFeedCSV
+from analyser.enums import NumericBackend, PortfolioDataHeader
+from tests.helpers import TEST_FILE_ERRORS, analyse
+
+
+@pytest.fixture(scope="module")
+def missing_values(test_parquet, tmp_path_factory):
+    """Return CSV and Parquet copies of the test data with missing values."""
+
+    data = pd.read_parquet(test_parquet)
+    for header in (
+        PortfolioDataHeader.OPEN_QUANTITY,
+        PortfolioDataHeader.CLOSE_QUANTITY,
+    ):
+        data.loc[[3, 5000], header.value] = np.nan
+    for header in (PortfolioDataHeader.SHORT_POS, PortfolioDataHeader.IS_FUTURE):
+        data[header.value] = data[header.value].astype(object)
+        data.loc[[7, 5001], header.value] = None
+
+    directory = tmp_path_factory.mktemp("missing")
+    csv_path = str(directory / "missing.csv")
+    data.to_csv(csv_path, index=False)
+    parquet_path = str(directory / "missing.parquet")
+    data.to_parquet(parquet_path, row_group_size=1000, index=False)
+
+    return csv_path, parquet_path
+
+
+def test_missing_values_are_read(missing_values):
+    csv_path, _ = missing_values
+    data_feed = PortfolioDataFeedCSV(
+        csv_path, chunk_size=4000, numeric_backend=NumericBackend.FLOAT
+    )
+    data = data_feed.get_data()
+    next(data)  # headers
+    first, second = data
+
+    open_quantity = PortfolioDataHeader.OPEN_QUANTITY.value
+    short_pos = PortfolioDataHeader.SHORT_POS.value
+    assert first[open_quantity].dtype == "float64"
+    assert np.isnan(first[open_quantity][3])
+    assert first[short_pos].dtype == object
+    assert first[short_pos][7] is np.nan
+    # chunks without missing values keep their dtypes
+    assert second[PortfolioDataHeader.OPENING_WEIGHTS.value].dtype == "float64"
+    assert second[PortfolioDataHeader.IS_CURRENCY.value].dtype == bool
+
+
+@pytest.mark.parametrize("fused", [False, True])
+def test_missing_values_are_reported(missing_values, fused):
+    csv_path, parquet_path = missing_values
+
+    errors = analyse(
+        PortfolioDataFeedCSV(
+            csv_path, chunk_size=1000, numeric_backend=NumericBackend.FLOAT
+        ),
+        fused=fused,
+    )
+
+    assert len(errors) > TEST_FILE_ERRORS
+    assert errors == analyse(
+        PortfolioDataFeedParquet(parquet_path, numeric_backend=NumericBackend.FLOAT),
+        fused=fused,
+    )
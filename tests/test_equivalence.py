@@ -0,0 +1,88 @@
+"""Options which change how data is analysed must not change the errors."""
+
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+
+from analyser.data_feeds.arrow import PortfolioDataFeedParquet
+from analyser.data_feeds.cache import PortfolioDataFeedCache
+from analyser.enums import NumericBackend, PortfolioDataHeader
+from tests.helpers import TEST_FILE_ERRORS, analyse
+
+
+def parquet_feed(file_path: str) -> PortfolioDataFeedParquet:
+    return PortfolioDataFeedParquet(file_path, numeric_backend=NumericBackend.FLOAT)
+
+
+@pytest.fixture(scope="module")
+def expected_errors(test_parquet):
+    errors = analyse(parquet_feed(test_parquet))
+    assert len(errors) == TEST_FILE_ERRORS
+
+    return errors
+
+
+def test_fused(test_parquet, expected_errors):
+    assert analyse(parquet_feed(test_parquet), fused=True) == expected_errors
+
+
+def test_reconciler_workers(test_parquet, expected_errors):
+    assert analyse(parquet_feed(test_parquet), reconciler_workers=4) == expected_errors
+
+
+@pytest.mark.parametrize("fused", [False, True])
+def test_chunk_workers(test_parquet, expected_errors, fused):
+    errors = analyse(parquet_feed(test_parquet), chunk_workers=2, fused=fused)
+
+    assert errors == expected_errors
+
+
+def test_cache(test_parquet, expected_errors, tmp_path):
+    for _ in range(2):  # filling the cache, then reading from it
+        data_feed = PortfolioDataFeedCache(parquet_feed(test_parquet), str(tmp_path))
+        assert analyse(data_feed) == expected_errors
+
+    assert list(tmp_path.iterdir())
+
+
+def test_incremental(test_parquet, expected_errors, tmp_path):
+    state_path = str(tmp_path / "state.pkl")
+    for _ in range(2):  # reconciling every row, then none
+        errors = analyse(parquet_feed(test_parquet), incremental_path=state_path)
+        assert errors == expected_errors
+
+    # a corrected file only reconciles the changed rows
+    data = pd.read_parquet(test_parquet)
+    price = PortfolioDataHeader.PRICE.value
+    data.loc[::50, price] = data.loc[::50, price] * 1.5
+    changed_path = str(tmp_path / "changed.parquet")
+    data.to_parquet(changed_path, row_group_size=1000, index=False)
+
+    errors = analyse(parquet_feed(changed_path), incremental_path=state_path)
+    assert errors == analyse(parquet_feed(changed_path))
+    assert errors != expected_errors
+
+
+def test_incremental_tolerance_change(test_parquet, tmp_path):
+    state_path = str(tmp_path / "state.pkl")
+    analyse(parquet_feed(test_parquet), incremental_path=state_path)
+
+    tolerances = {"price_fluctuation": Decimal("0.5")}
+    errors = analyse(
+        parquet_feed(test_parquet), incremental_path=state_path, tolerances=tolerances
+    )
+    assert errors == analyse(parquet_feed(test_parquet), tolerances=tolerances)
+
+
+def test_fused_without_position_side(test_parquet, tmp_path):
+    data = pd.read_parquet(test_parquet)
+    column = PortfolioDataHeader.SHORT_POS.value
+    data[column] = data[column].astype(object)
+    data.loc[[10, 4000], column] = None
+    changed_path = str(tmp_path / "short_pos.parquet")
+    data.to_parquet(changed_path, row_group_size=1000, index=False)
+
+    errors = analyse(parquet_feed(changed_path), fused=True)
+    assert errors == analyse(parquet_feed(changed_path), fused=False)
+    assert len(errors) >= TEST_FILE_ERRORS
@@ -0,0 +1,77 @@
+import datetime
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from analyser.analyser import PortfolioAnalyzer
+from analyser.data_feeds.arrow import PortfolioDataFeedParquet
+from analyser.enums import NumericBackend
+from analyser.error_store import PortfolioErrorStore
+from analyser.errors import (
+    PortfolioErrorBlock,
+    PortfolioErrorCalculation,
+    PortfolioErrorHighVolatility,
+)
+from analyser.exporters.json_exporter import encode_blocks
+from tests.helpers import TEST_FILE_ERRORS, analyse
+
+
+@pytest.mark.parametrize("numeric_backend", list(NumericBackend))
+def test_spilled_store_matches_direct_export(test_parquet, numeric_backend):
+    def data_feed():
+        return PortfolioDataFeedParquet(test_parquet, numeric_backend=numeric_backend)
+
+    analyser = PortfolioAnalyzer(data_feed(), error_exporter=None)
+    with analyser.collect_errors(memory_threshold=1000) as store:
+        assert len(store) == TEST_FILE_ERRORS
+        assert store.spilled > 0
+        errors = encode_blocks(store.blocks()).splitlines()
+
+    assert errors == analyse(data_feed())
+
+
+def test_errors_without_tickers(test_parquet):
+    def data_feed():
+        return PortfolioDataFeedParquet(
+            test_parquet, numeric_backend=NumericBackend.FLOAT
+        )
+
+    # aggregate errors are reported without a ticker
+    analyser = PortfolioAnalyzer(
+        data_feed(), error_exporter=None, aggregate_checks=True
+    )
+    with analyser.collect_errors(memory_threshold=1000) as store:
+        errors = encode_blocks(store.blocks()).splitlines()
+
+    assert errors == analyse(data_feed(), aggregate_checks=True)
+
+
+def test_special_values_are_kept():
+    blocks = [
+        PortfolioErrorBlock(
+            error_class=PortfolioErrorCalculation,
+            location="value_in_usd",
+            tickers=np.array(["A", "B", None, "A", "C"], dtype=object),
+            dates=np.array([datetime.date(2022, 1, 3)] * 5, dtype=object),
+            # rounding boundary, negative zero, out of the fixed-point range
+            values=np.array([1.23456, -0.0, 1e16, 12345.00005, 2.0]),
+            correct_values=np.array(
+                [Decimal("1.5"), 0.0, -1e-9, Decimal("-12345.6789"), 3], dtype=object
+            ),
+        ),
+        PortfolioErrorBlock(
+            error_class=PortfolioErrorHighVolatility,
+            location="price_volatility",
+            tickers=np.array(["A", "B", "C"], dtype=object),
+            dates=np.array([datetime.date(2022, 1, 4)] * 2 + [None], dtype=object),
+            values=np.array([np.nan, "n/a", None], dtype=object),
+        ),
+    ]
+
+    # one record per spill, read back two at a time
+    with PortfolioErrorStore(memory_threshold=1, read_size=2) as store:
+        store.add_blocks(blocks)
+        assert store.spilled == len(store) == 8
+
+        assert encode_blocks(store.blocks()) == encode_blocks(blocks)
@@ -0,0 +1,61 @@
+import openpyxl
+import pandas as pd
+import pytest
+from openpyxl.styles import PatternFill
+
+from analyser.data_feeds.excel import PortfolioDataFeedExcel
+from analyser.enums import NumericBackend
+from tests.helpers import TEST_FILE
+
+
+def read_chunks(file_path: str, streaming: bool, chunk_size: int) -> list:
+    data = PortfolioDataFeedExcel(
+        file_path,
+        chunk_size=chunk_size,
+        streaming=streaming,
+        numeric_backend=NumericBackend.FLOAT,
+    ).get_data()
+    headers = next(data)
+
+    return [headers, *data]
+
+
+def assert_same_chunks(file_path: str, chunk_size: int) -> None:
+    expected = read_chunks(file_path, streaming=False, chunk_size=chunk_size)
+    actual = read_chunks(file_path, streaming=True, chunk_size=chunk_size)
+
+    assert actual[0] == expected[0]
+    assert len(actual) == len(expected)
+    for actual_chunk, expected_chunk in zip(actual[1:], expected[1:]):
+        pd.testing.assert_frame_equal(actual_chunk, expected_chunk)
+
+
+def test_streaming_matches_chunked_reading():
+    assert_same_chunks(TEST_FILE, chunk_size=4000)
+
+
+@pytest.fixture
+def workbook_with_blank_rows(tmp_path) -> str:
+    """Return the start of the test workbook with an empty row in the data and
+    formatted empty rows after it."""
+
+    workbook = openpyxl.load_workbook(TEST_FILE)
+    sheet = workbook.active
+    sheet.delete_rows(40, sheet.max_row)
+    sheet.insert_rows(10)
+    for row in range(sheet.max_row + 1, sheet.max_row + 6):
+        sheet.cell(row, 1).fill = PatternFill("solid", fgColor="FFFF00")
+        sheet.cell(row, 3).number_format = "0.00"
+
+    file_path = str(tmp_path / "blank_rows.xlsx")
+    workbook.save(file_path)
+
+    return file_path
+
+
+@pytest.mark.parametrize("chunk_size", [10, 1000])
+def test_streaming_drops_trailing_empty_rows(workbook_with_blank_rows, chunk_size):
+    assert_same_chunks(workbook_with_blank_rows, chunk_size)
+
+    chunks = read_chunks(workbook_with_blank_rows, streaming=True, chunk_size=1000)
+    assert len(chunks[1]) == 39  # 38 rows of data and the empty row
@@ -0,0 +1,75 @@
+import os
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from analyser.data_feeds.headers import (
+    feed_type_for_file,
+    find_input_files,
+    read_headers,
+)
+from analyser.enums import PortfolioDataHeader
+from tests.helpers import TEST_FILE
+
+EXPECTED_HEADERS = [header.value for header in PortfolioDataHeader]
+
+CSV_EXTENSIONS = (".csv", ".csv.gz", ".csv.bz2", ".csv.xz", ".csv.zst")
+
+
+@pytest.fixture(scope="module")
+def raw_headers():
+    """Return the headers of the test workbook as they are in the file."""
+
+    return list(pd.read_excel(TEST_FILE, nrows=0).columns)
+
+
+def test_excel_headers():
+    assert read_headers(TEST_FILE) == EXPECTED_HEADERS
+
+
+def test_excel_headers_out_of_order(tmp_path, raw_headers):
+    # openpyxl writes shared strings, with numbers and empty cells in between
+    file_path = str(tmp_path / "headers.xlsx")
+    workbook = openpyxl.Workbook()
+    workbook.active.append(["Ticker", 2022, None, raw_headers[0]])
+    workbook.active.append(["ABC", 1, 2, 3])
+    workbook.save(file_path)
+
+    assert read_headers(file_path) == ["ticker", "2022", "", "date"]
+
+
+@pytest.mark.parametrize("extension", CSV_EXTENSIONS)
+def test_csv_headers(tmp_path, raw_headers, extension):
+    file_path = str(tmp_path / f"data{extension}")
+    pd.DataFrame([range(len(raw_headers))], columns=raw_headers).to_csv(
+        file_path, index=False
+    )
+
+    assert feed_type_for_file(file_path) == "csv"
+    assert read_headers(file_path) == EXPECTED_HEADERS
+
+
+def test_parquet_headers(test_parquet):
+    assert read_headers(test_parquet) == EXPECTED_HEADERS
+
+
+def test_unknown_extension():
+    with pytest.raises(ValueError, match="No data feed"):
+        feed_type_for_file("data.txt")
+
+
+def test_find_input_files(tmp_path):
+    for name in ("a.xlsx", "b.csv.bz2", "c.csv.xz", "notes.txt"):
+        (tmp_path / name).write_text("")
+
+    file_paths = find_input_files(
+        [str(tmp_path), str(tmp_path / "*.txt"), str(tmp_path / "a.xlsx")]
+    )
+
+    assert [os.path.basename(file_path) for file_path in file_paths] == [
+        "a.xlsx",
+        "b.csv.bz2",
+        "c.csv.xz",
+        "notes.txt",
+    ]
@@ -0,0 +1,118 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analyser.data_feeds.csv_feed import PortfolioDataFeedCSV
+from analyser.enums import NumericBackend, PortfolioDataHeader
+from analyser.reconcilers.history import PortfolioTickerHistory
+from tests.helpers import analyse
+
+HISTORY_LOCATIONS = (
+    PortfolioDataHeader.PRICE_YESTERDAY.value,
+    PortfolioDataHeader.NAV_YESTERDAY.value,
+)
+
+
+@pytest.fixture(scope="module")
+def test_data(test_parquet) -> pd.DataFrame:
+    return pd.read_parquet(test_parquet)
+
+
+def history_errors(csv_path: str, chunk_size: int, **kwargs) -> list:
+    """Return the history errors of a CSV file, sorted as chunks change their
+    order."""
+
+    errors = analyse(
+        PortfolioDataFeedCSV(
+            csv_path, chunk_size=chunk_size, numeric_backend=NumericBackend.FLOAT
+        ),
+        reconcilers=[],
+        history_checks=True,
+        **kwargs,
+    )
+    assert all(
+        json.loads(error)["context"]["location"] in HISTORY_LOCATIONS
+        for error in errors
+    )
+
+    return sorted(errors)
+
+
+def write_csv(data: pd.DataFrame, csv_path) -> str:
+    data.to_csv(csv_path, index=False)
+
+    return str(csv_path)
+
+
+def test_chunk_boundaries_do_not_change_errors(test_data, tmp_path):
+    csv_path = write_csv(test_data, tmp_path / "Test.csv")
+
+    whole_file = history_errors(csv_path, chunk_size=len(test_data))
+    locations = {json.loads(error)["context"]["location"] for error in whole_file}
+    assert locations == set(HISTORY_LOCATIONS)
+    # chunks splitting dates, and chunks of whole dates
+    for chunk_size in (137, 1000):
+        assert history_errors(csv_path, chunk_size=chunk_size) == whole_file
+
+
+def test_saved_history_continues_next_run(test_data, tmp_path):
+    data = test_data.copy()
+    dates = data[PortfolioDataHeader.DATE.value]
+    split_date = dates.unique()[len(dates.unique()) // 2]
+    # only the history of the first run can find this error
+    first_row = dates[dates == split_date].index[0]
+    data.loc[first_row, PortfolioDataHeader.PRICE_YESTERDAY.value] *= 2
+    first_path = write_csv(data[dates < split_date], tmp_path / "first.csv")
+    second_path = write_csv(data[dates >= split_date], tmp_path / "second.csv")
+    history_path = str(tmp_path / "history.json")
+
+    first_errors = history_errors(first_path, chunk_size=500, history_path=history_path)
+    second_errors = history_errors(
+        second_path, chunk_size=500, history_path=history_path
+    )
+
+    whole_file = history_errors(write_csv(data, tmp_path / "Test.csv"), chunk_size=500)
+    assert sorted(first_errors + second_errors) == whole_file
+    split_date_errors = [
+        error
+        for error in second_errors
+        if json.loads(error)["context"]["date"] == str(split_date.date())
+    ]
+    assert split_date_errors
+    assert not set(split_date_errors) & set(history_errors(second_path, chunk_size=500))
+
+
+def test_history_state_round_trip():
+    daily = pd.Series(
+        [10.0, 11.0, 20.0],
+        index=pd.MultiIndex.from_tuples(
+            [
+                ("A", pd.Timestamp("2022-01-03")),
+                ("A", pd.Timestamp("2022-01-04")),
+                ("B", pd.Timestamp("2022-01-04")),
+            ]
+        ),
+    )
+    history = PortfolioTickerHistory()
+    history.update(daily)
+
+    restored = PortfolioTickerHistory.from_dict(
+        json.loads(json.dumps(history.to_dict()))
+    )
+    next_day = pd.Series(
+        [12.0, 21.0, 30.0],
+        index=pd.MultiIndex.from_tuples(
+            [
+                ("A", pd.Timestamp("2022-01-05")),
+                ("B", pd.Timestamp("2022-01-05")),
+                ("C", pd.Timestamp("2022-01-05")),
+            ]
+        ),
+    )
+
+    assert restored.to_dict() == history.to_dict()
+    expected = restored.expected_values(next_day)
+    # C was not reported on the previous portfolio date
+    np.testing.assert_array_equal(expected, [11.0, 20.0, np.nan])
@@ -0,0 +1,52 @@
+import io
+import threading
+import time
+
+from analyser.analyser import PortfolioAnalyzer
+from analyser.data_feeds.arrow import PortfolioDataFeedParquet
+from analyser.enums import NumericBackend
+from analyser.exporters.json_exporter import PortfolioErrorExporterJSON
+from analyser.metrics import PortfolioAnalysisMetrics
+
+
+def test_stage_seconds_are_kept_per_thread():
+    metrics = PortfolioAnalysisMetrics()
+    start = threading.Barrier(4)
+
+    def measure():
+        start.wait()
+        for _ in range(1000):
+            with metrics.measure_stage("feed"):
+                pass
+        with metrics.measure_stage("wait"):
+            time.sleep(0.2)
+
+    threads = [threading.Thread(target=measure, name=f"stage-{i}") for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    thread_seconds = metrics.thread_stage_seconds
+    assert sorted(thread_seconds) == [f"stage-{i}" for i in range(4)]
+    assert metrics.stage_seconds["feed"] == sum(
+        seconds["feed"] for seconds in thread_seconds.values()
+    )
+    # the threads waited at the same time
+    assert metrics.stage_seconds["wait"] == max(
+        seconds["wait"] for seconds in thread_seconds.values()
+    )
+    assert metrics.stage_seconds["wait"] < metrics.elapsed_seconds
+
+
+def test_pipelined_wait_does_not_exceed_elapsed_time(test_parquet):
+    analyser = PortfolioAnalyzer(
+        PortfolioDataFeedParquet(test_parquet, numeric_backend=NumericBackend.FLOAT),
+        PortfolioErrorExporterJSON(io.StringIO(), batched=True),
+    )
+
+    analyser.run_pipelined()
+
+    report = analyser.metrics.to_dict()
+    assert report["stages"]["wait"] <= report["elapsed_seconds"]
+    assert {"pipeline-feed", "pipeline-reconcile"} <= set(report["thread_stages"])
@@ -0,0 +1,54 @@
+import pytest
+
+from analyser.analyser import PortfolioAnalyzer
+from analyser.data_feeds.excel import PortfolioDataFeedExcel
+from analyser.enums import NumericBackend
+from benchmarks.generator import PortfolioDataFeedSynthetic
+from benchmarks.numeric_backend import compare_errors, reconcile_chunks
+from tests.helpers import TEST_FILE, TEST_FILE_ERRORS
+
+
+def backend_errors(create_feed) -> dict:
+    """Return the errors of every numeric backend, with their reconcilers."""
+
+    errors = {}
+    for backend in NumericBackend:
+        analyser = PortfolioAnalyzer(create_feed(backend), error_exporter=None)
+        errors[backend], _ = reconcile_chunks(
+            analyser.reconcilers, list(analyser.get_data())
+        )
+
+    return errors
+
+
+def test_backends_report_same_errors_for_test_file():
+    errors = backend_errors(
+        lambda backend: PortfolioDataFeedExcel(
+            TEST_FILE, chunk_size=1000, streaming=True, numeric_backend=backend
+        )
+    )
+
+    assert len(errors[NumericBackend.DECIMAL]) == TEST_FILE_ERRORS
+    assert (
+        compare_errors(errors[NumericBackend.DECIMAL], errors[NumericBackend.FLOAT])
+        == []
+    )
+
+
+@pytest.mark.parametrize("short_ratio", [0.0, 0.35, 1.0])
+def test_backends_report_same_errors_for_corrupted_data(short_ratio):
+    errors = backend_errors(
+        lambda backend: PortfolioDataFeedSynthetic(
+            5000,
+            chunk_size=1000,
+            corruption_rate=0.02,
+            short_ratio=short_ratio,
+            numeric_backend=backend,
+        )
+    )
+
+    assert errors[NumericBackend.DECIMAL]
+    assert (
+        compare_errors(errors[NumericBackend.DECIMAL], errors[NumericBackend.FLOAT])
+        == []
+    )
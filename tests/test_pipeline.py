@@ -0,0 +1,88 @@
+import io
+import threading
+from typing import Iterator
+
+import pandas as pd
+import pytest
+
+from analyser.analyser import PortfolioAnalyzer
+from analyser.data_feeds.csv_feed import PortfolioDataFeedCSV
+from analyser.enums import NumericBackend
+from analyser.exporters.json_exporter import PortfolioErrorExporterJSON
+from analyser.interfaces import PortfolioErrorExporter
+
+
+class RecordingCSVFeed(PortfolioDataFeedCSV):
+    """CSV feed recording how many chunks it read and whether it was closed."""
+
+    def __init__(self, *args, fail_after: int = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fail_after = fail_after
+        self.chunks = 0
+        self.closed = False
+
+    def get_data(self) -> Iterator[pd.DataFrame]:
+        try:
+            for item in super().get_data():
+                if isinstance(item, pd.DataFrame):
+                    if self.chunks == self.fail_after:
+                        raise ValueError("unreadable chunk")
+                    self.chunks += 1
+                yield item
+        finally:
+            self.closed = True
+
+
+class FailingExporter(PortfolioErrorExporter):
+    """Exporter failing after the first error."""
+
+    chunk_size = 1000
+
+    def export(self, errors):
+        next(iter(errors))
+        raise OSError("disk full")
+
+
+@pytest.fixture
+def csv_path(test_parquet, tmp_path) -> str:
+    csv_path = str(tmp_path / "Test.csv")
+    pd.read_parquet(test_parquet).to_csv(csv_path, index=False)
+
+    return csv_path
+
+
+def pipeline_threads():
+    return [
+        thread
+        for thread in threading.enumerate()
+        if thread.name.startswith("pipeline-")
+    ]
+
+
+def test_export_failure_stops_the_feed(csv_path):
+    data_feed = RecordingCSVFeed(
+        csv_path, chunk_size=100, numeric_backend=NumericBackend.FLOAT
+    )
+    analyser = PortfolioAnalyzer(data_feed, FailingExporter())
+
+    with pytest.raises(OSError, match="disk full"):
+        analyser.run_pipelined(queue_size=2)
+
+    assert not pipeline_threads()
+    assert data_feed.closed
+    # 78 chunks in the file, only those read before the failure was noticed
+    assert data_feed.chunks < 20
+
+
+def test_feed_failure_is_raised(csv_path):
+    data_feed = RecordingCSVFeed(
+        csv_path, chunk_size=100, numeric_backend=NumericBackend.FLOAT, fail_after=5
+    )
+    analyser = PortfolioAnalyzer(
+        data_feed, PortfolioErrorExporterJSON(io.StringIO(), batched=True)
+    )
+
+    with pytest.raises(ValueError, match="unreadable chunk"):
+        analyser.run_pipelined()
+
+    assert not pipeline_threads()
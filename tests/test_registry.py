@@ -0,0 +1,172 @@
+import json
+from decimal import Decimal
+from importlib.metadata import EntryPoint
+
+import pytest
+
+from analyser.data_feeds.arrow import PortfolioDataFeedParquet
+from analyser.enums import NumericBackend
+from analyser.reconcilers import registry
+from analyser.reconcilers.price_fluctuation import (
+    PortfolioDataReconcilerPriceFluctuation,
+)
+from analyser.reconcilers.registry import (
+    ENTRY_POINT_GROUP,
+    PortfolioReconcilerConfig,
+    PortfolioReconcilerRegistry,
+    ReconcilerRegistryError,
+)
+from tests.helpers import analyse
+
+
+class MissingInputReconciler(PortfolioDataReconcilerPriceFluctuation):
+    """Reconciler requiring a column nothing provides."""
+
+    def __init__(self):
+        super().__init__()
+
+        self.required_columns = ("unknown_recalc",)
+
+
+def names(reconcilers) -> list:
+    return [type(reconciler).__name__ for reconciler in reconcilers]
+
+
+def error_locations(errors) -> set:
+    return {json.loads(error)["context"]["location"] for error in errors}
+
+
+def test_providers_are_added():
+    reconcilers = PortfolioReconcilerRegistry().create(
+        ["dollar_pnl", "total_return", "close_weight_abs"]
+    )
+
+    assert names(reconcilers) == [
+        "PortfolioDataReconcilerDollarPnL",
+        "PortfolioDataReconcilerReturnAdjustments",
+        "PortfolioDataReconcilerTotalReturn",
+        "PortfolioDataReconcilerClosingWeight",
+        "PortfolioDataReconcilerCloseWeightAbs",
+    ]
+
+
+def test_selected_providers_are_not_added_again():
+    reconcilers = PortfolioReconcilerRegistry().create(
+        ["total_return", "return_adjustments"]
+    )
+
+    assert names(reconcilers) == [
+        "PortfolioDataReconcilerTotalReturn",
+        "PortfolioDataReconcilerReturnAdjustments",
+    ]
+
+
+@pytest.mark.parametrize("fused", [False, True])
+def test_subset_reports_the_same_errors(test_parquet, fused):
+    def data_feed():
+        return PortfolioDataFeedParquet(
+            test_parquet, numeric_backend=NumericBackend.FLOAT
+        )
+
+    locations = {"total_return", "return_adjustments"}
+    errors = analyse(data_feed(), fused=fused, reconcilers=["total_return"])
+
+    assert error_locations(errors) == locations
+    assert errors == [
+        error
+        for error in analyse(data_feed(), fused=fused)
+        if error_locations([error]) <= locations
+    ]
+
+
+def test_missing_provider_is_named():
+    reconciler_registry = PortfolioReconcilerRegistry()
+    reconciler_registry.register(
+        "missing_input", "tests.test_registry:MissingInputReconciler"
+    )
+
+    with pytest.raises(ReconcilerRegistryError, match="'missing_input'"):
+        reconciler_registry.create(["missing_input"])
+
+
+def test_unknown_reconciler():
+    with pytest.raises(ReconcilerRegistryError, match="Unknown reconciler 'nope'"):
+        PortfolioReconcilerRegistry().create(["nope"])
+
+
+def test_unloadable_target():
+    reconciler_registry = PortfolioReconcilerRegistry({"broken": "tests.nope:Nope"})
+
+    with pytest.raises(ReconcilerRegistryError, match="can not be loaded"):
+        reconciler_registry.load("broken")
+
+
+def test_entry_points(monkeypatch):
+    entry_point = EntryPoint(
+        name="prices",
+        value="tests.test_registry:MissingInputReconciler",
+        group=ENTRY_POINT_GROUP,
+    )
+    groups = []
+
+    def fake_entry_points(group):
+        groups.append(group)
+        return [entry_point]
+
+    monkeypatch.setattr(registry, "entry_points", fake_entry_points)
+    reconciler_registry = PortfolioReconcilerRegistry()
+
+    assert "prices" in reconciler_registry.names
+    assert reconciler_registry.load("prices") is MissingInputReconciler
+    assert groups == [ENTRY_POINT_GROUP]
+
+
+def test_tolerance_overrides():
+    (reconciler,) = PortfolioReconcilerRegistry().create(
+        ["price_fluctuation"], {"price_fluctuation": 0.2}
+    )
+
+    assert reconciler.ERROR_TOLERANCE == Decimal("0.2")
+    # the class keeps its tolerance
+    assert PortfolioDataReconcilerPriceFluctuation.ERROR_TOLERANCE == Decimal("0.10")
+
+
+def test_tolerance_of_unselected_reconciler():
+    with pytest.raises(ReconcilerRegistryError, match="market_cap"):
+        PortfolioReconcilerRegistry().create(
+            ["price_fluctuation"], {"market_cap": Decimal("1")}
+        )
+
+
+def test_config_from_file(tmp_path):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(
+        json.dumps(
+            {
+                "reconcilers": ["price_fluctuation"],
+                "tolerances": {"price_fluctuation": 0.2},
+            }
+        )
+    )
+
+    config = PortfolioReconcilerConfig.from_file(str(config_path))
+
+    assert config.reconcilers == ["price_fluctuation"]
+    assert config.tolerances == {"price_fluctuation": Decimal("0.2")}
+
+
+def test_config_without_reconcilers(tmp_path):
+    config_path = tmp_path / "config.json"
+    config_path.write_text("{}")
+
+    assert PortfolioReconcilerConfig.from_file(str(config_path)) == (
+        PortfolioReconcilerConfig()
+    )
+
+
+def test_config_with_unknown_keys(tmp_path):
+    config_path = tmp_path / "config.json"
+    config_path.write_text('{"checks": []}')
+
+    with pytest.raises(ReconcilerRegistryError, match="checks"):
+        PortfolioReconcilerConfig.from_file(str(config_path))
@@ -0,0 +1,90 @@
+import datetime
+import os
+import sqlite3
+
+import numpy as np
+import pytest
+
+from analyser.errors import PortfolioErrorBlock, PortfolioErrorCalculation
+from analyser.exporters.sqlite_exporter import PortfolioErrorExporterSQLite
+
+
+def error_blocks(count: int, block_size: int = 5000):
+    for start in range(0, count, block_size):
+        values = np.arange(start, start + block_size, dtype=float)
+        yield PortfolioErrorBlock(
+            error_class=PortfolioErrorCalculation,
+            location="price",
+            tickers=np.array([f"T{value:.0f}" for value in values], dtype=object),
+            dates=np.full(block_size, datetime.date(2024, 1, 2), dtype=object),
+            values=values,
+            correct_values=values + 1,
+        )
+
+
+@pytest.mark.parametrize("checkpoint_interval", [2, 1000])
+def test_wal_is_checkpointed_during_export(tmp_path, checkpoint_interval):
+    database_path = str(tmp_path / "errors.sqlite")
+    exporter = PortfolioErrorExporterSQLite(
+        database_path,
+        "reference",
+        chunk_size=1000,
+        checkpoint_interval=checkpoint_interval,
+    )
+    # an idle connection keeps the WAL file after the export
+    reader = exporter.connect()
+    reader.execute("PRAGMA wal_autocheckpoint=123")
+    try:
+        exporter.export_blocks(error_blocks(50000))
+
+        wal_size = os.path.getsize(f"{database_path}-wal")
+        database_size = os.path.getsize(database_path)
+        assert reader.execute("SELECT count(*) FROM errors").fetchone() == (50000,)
+    finally:
+        reader.close()
+
+    if checkpoint_interval == 2:
+        assert wal_size < database_size / 4
+    else:
+        assert wal_size > database_size / 2
+
+
+class RecordingConnection:
+    """Connection recording its autocheckpoint setting when it is closed."""
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+        self.closing_autocheckpoint = None
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+    def __enter__(self):
+        return self.connection.__enter__()
+
+    def __exit__(self, *exc_info):
+        return self.connection.__exit__(*exc_info)
+
+    def close(self):
+        (self.closing_autocheckpoint,) = self.connection.execute(
+            "PRAGMA wal_autocheckpoint"
+        ).fetchone()
+        self.connection.close()
+
+
+def test_autocheckpoint_is_restored(tmp_path, monkeypatch):
+    exporter = PortfolioErrorExporterSQLite(str(tmp_path / "errors.sqlite"), "ref")
+    connections = []
+
+    def connect():
+        connections.append(RecordingConnection(connect_database()))
+        return connections[-1]
+
+    connect_database = exporter.connect
+    monkeypatch.setattr(exporter, "connect", connect)
+    exporter.export_blocks(error_blocks(5000))
+
+    (default_autocheckpoint,) = (
+        sqlite3.connect(":memory:").execute("PRAGMA wal_autocheckpoint").fetchone()
+    )
+    assert connections[0].closing_autocheckpoint == default_autocheckpoint